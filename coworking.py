@@ -1,567 +1,4687 @@
 """Script de coworking."""
 
+from abc import ABC, abstractmethod
+import argparse
+import atexit
+import bisect
+import collections
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
 import datetime as dt
+import io
+import itertools
 import json
 import csv
+import functools
+import http.server
+import inspect
+import multiprocessing
 import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side
+import queue
+import random
 import sqlite3
 from sqlite3 import Error
 import sys
 import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable
 from tabulate import tabulate
 
+RUTA_BD = "coworking.db"
+DIAS_ANTICIPACION = 2
+HORIZONTE_CALENDARIO = 365
+MARGEN_CALENDARIO = 30
+FILAS_POR_LOTE = 100
+
+# Cada migración es una lista de sentencias que se aplican en una sola
+# transacción; PRAGMA user_version guarda cuántas se han aplicado.
+MIGRACIONES = (
+    [
+        # Las fechas se guardan como número de día (dt.date.toordinal), así que
+        # las reservaciones existentes pasan de texto ISO a ese número;
+        # julianday('0001-01-01') = 1721425.5 corresponde al día 1. Las
+        # reservaciones por horario no tienen turno y llevan su inicio y fin en
+        # minutos desde la medianoche; las de turno, al revés.
+        """
+        CREATE TABLE reservaciones_nueva (
+            folio INTEGER PRIMARY KEY,
+            id_cliente INTEGER NOT NULL,
+            fecha INTEGER NOT NULL,
+            id_turno INTEGER,
+            id_sala INTEGER NOT NULL,
+            nombre_evento TEXT NOT NULL,
+            cancelado INTEGER,
+            inicio INTEGER,
+            fin INTEGER,
+            CHECK ((id_turno IS NULL) = (inicio IS NOT NULL AND fin IS NOT NULL AND inicio < fin)),
+            FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente),
+            FOREIGN KEY (id_sala) REFERENCES salas(id_sala),
+            FOREIGN KEY (id_turno) REFERENCES turnos(id_turno)
+        );
+        """,
+        """
+        INSERT INTO reservaciones_nueva (folio, id_cliente, fecha, id_turno, id_sala, nombre_evento, cancelado)
+        SELECT folio, id_cliente, CAST(ROUND(julianday(fecha) - 1721424.5) AS INTEGER), id_turno, id_sala, nombre_evento, cancelado
+        FROM reservaciones;
+        """,
+        """
+        DROP TABLE reservaciones;
+        """,
+        """
+        ALTER TABLE reservaciones_nueva RENAME TO reservaciones;
+        """,
+        """
+        CREATE INDEX idx_reservaciones_fecha ON reservaciones (fecha, id_sala, id_turno) WHERE cancelado IS NULL;
+        """,
+        """
+        CREATE TABLE calendario (
+            fecha INTEGER PRIMARY KEY,
+            dia_semana INTEGER NOT NULL,
+            festivo INTEGER NOT NULL DEFAULT 0,
+            cerrado INTEGER NOT NULL DEFAULT 0,
+            descripcion TEXT,
+            reservable INTEGER GENERATED ALWAYS AS (dia_semana <> 6 AND festivo = 0 AND cerrado = 0) VIRTUAL
+        );
+        """,
+        """
+        CREATE INDEX idx_calendario_reservable ON calendario (reservable, fecha);
+        """,
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS eventos_reservacion (
+            secuencia INTEGER PRIMARY KEY AUTOINCREMENT,
+            folio INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            datos TEXT NOT NULL,
+            momento TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS cursores_eventos (
+            consumidor TEXT PRIMARY KEY,
+            secuencia INTEGER NOT NULL
+        );
+        """,
+    ],
+    [
+        # `version` guarda la secuencia del último evento de la reservación;
+        # las reservaciones anteriores al registro de cambios quedan en 0.
+        """
+        ALTER TABLE reservaciones ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+        """,
+        """
+        ALTER TABLE reservaciones ADD COLUMN creado TEXT;
+        """,
+        """
+        ALTER TABLE reservaciones ADD COLUMN actualizado TEXT;
+        """,
+        """
+        CREATE INDEX idx_reservaciones_version ON reservaciones (version);
+        """,
+    ],
+    [
+        # Índices que cubren todas las columnas de las consultas por cliente y
+        # por sala, para que el historial completo no requiera leer la tabla.
+        # Ambos se paginan por (fecha, folio), así que el folio va justo después
+        # de la fecha. `asistio` es 1 si el cliente se presentó, 0 si no y NULL
+        # mientras no se registre; el índice por cliente la incluye para que el
+        # conteo de inasistencias de los clientes frecuentes lo cubra.
+        """
+        ALTER TABLE reservaciones ADD COLUMN asistio INTEGER CHECK (asistio IN (0, 1));
+        """,
+        """
+        CREATE INDEX idx_reservaciones_cliente
+        ON reservaciones (id_cliente, fecha, folio, id_turno, id_sala, cancelado, nombre_evento, asistio, inicio, fin);
+        """,
+        """
+        CREATE INDEX idx_reservaciones_sala
+        ON reservaciones (id_sala, fecha, folio, id_turno, id_cliente, cancelado, nombre_evento, inicio, fin);
+        """,
+    ],
+    [
+        # Versión que cambia con cualquier escritura en salas o calendario, para
+        # que la caché por fecha de otros procesos sepa que debe vaciarse; los
+        # cambios de reservaciones se leen del registro de eventos.
+        """
+        CREATE TABLE version_referencias (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        """,
+        """
+        INSERT INTO version_referencias (id, version) VALUES (1, 0);
+        """,
+        """
+        CREATE TRIGGER trg_salas_insertada AFTER INSERT ON salas
+        BEGIN UPDATE version_referencias SET version = version + 1; END;
+        """,
+        """
+        CREATE TRIGGER trg_salas_actualizada AFTER UPDATE ON salas
+        BEGIN UPDATE version_referencias SET version = version + 1; END;
+        """,
+        """
+        CREATE TRIGGER trg_calendario_insertado AFTER INSERT ON calendario
+        BEGIN UPDATE version_referencias SET version = version + 1; END;
+        """,
+        """
+        CREATE TRIGGER trg_calendario_actualizado AFTER UPDATE ON calendario
+        BEGIN UPDATE version_referencias SET version = version + 1; END;
+        """,
+    ],
+    [
+        # Las reservaciones anteriores ocupaban la sala completa, así que sus
+        # asistentes son el cupo de la sala. `ocupacion_turnos` lleva la suma de
+        # asistentes vigentes por turno para no recalcularla en cada consulta.
+        """
+        ALTER TABLE reservaciones ADD COLUMN asistentes INTEGER NOT NULL DEFAULT 1 CHECK (asistentes > 0);
+        """,
+        """
+        UPDATE reservaciones
+        SET asistentes = COALESCE((SELECT MAX(s.cupo, 1) FROM salas s WHERE s.id_sala = reservaciones.id_sala), 1);
+        """,
+        """
+        CREATE TABLE ocupacion_turnos (
+            fecha INTEGER NOT NULL,
+            id_sala INTEGER NOT NULL,
+            id_turno INTEGER NOT NULL,
+            ocupados INTEGER NOT NULL,
+            PRIMARY KEY (fecha, id_sala, id_turno)
+        ) WITHOUT ROWID;
+        """,
+        """
+        INSERT INTO ocupacion_turnos (fecha, id_sala, id_turno, ocupados)
+        SELECT fecha, id_sala, id_turno, SUM(asistentes)
+        FROM reservaciones
+        WHERE cancelado IS NULL
+        GROUP BY fecha, id_sala, id_turno;
+        """,
+    ],
+    [
+        # Reservaciones de la sala completa por horario. Los turnos reciben su
+        # ventana (la de HORARIO_TURNOS) y `ocupacion_turnos.intervalos` cuenta
+        # las reservaciones por horario que la cubren, para que turnos y horarios
+        # se bloqueen entre sí.
+        """
+        ALTER TABLE turnos ADD COLUMN inicio INTEGER;
+        """,
+        """
+        ALTER TABLE turnos ADD COLUMN fin INTEGER;
+        """,
+        """
+        UPDATE turnos
+        SET inicio = CASE id_turno WHEN 1 THEN 480 WHEN 2 THEN 720 ELSE 1020 END,
+            fin = CASE id_turno WHEN 1 THEN 720 WHEN 2 THEN 1020 ELSE 1320 END;
+        """,
+        """
+        ALTER TABLE ocupacion_turnos ADD COLUMN intervalos INTEGER NOT NULL DEFAULT 0;
+        """,
+        # Las reservaciones por horario vigentes de una sala y día no se traslapan,
+        # así que este índice las tiene ordenadas tanto por inicio como por fin.
+        """
+        CREATE INDEX idx_reservaciones_horario
+        ON reservaciones (id_sala, fecha, inicio, fin) WHERE cancelado IS NULL AND inicio IS NOT NULL;
+        """,
+    ],
+    [
+        # Las entradas de un índice terminan en el folio, así que este recorre
+        # las reservaciones vigentes en orden de (fecha, folio) y permite leer
+        # un rango por lotes continuando después de la última fila leída.
+        """
+        CREATE INDEX idx_reservaciones_rango ON reservaciones (fecha) WHERE cancelado IS NULL;
+        """,
+    ],
+    [
+        # Los clientes llevan su propio contador para que la caché de referencias
+        # de otros procesos los recargue sin vaciar la caché por fecha, a la que
+        # un cliente nuevo no afecta.
+        """
+        ALTER TABLE version_referencias ADD COLUMN clientes INTEGER NOT NULL DEFAULT 0;
+        """,
+        """
+        CREATE TRIGGER trg_clientes_insertado AFTER INSERT ON clientes
+        BEGIN UPDATE version_referencias SET clientes = clientes + 1; END;
+        """,
+        """
+        CREATE TRIGGER trg_clientes_actualizado AFTER UPDATE ON clientes
+        BEGIN UPDATE version_referencias SET clientes = clientes + 1; END;
+        """,
+    ],
+)
+
+# Horario de las reservaciones por intervalo, en minutos desde la medianoche.
+# Cada turno ocupa su ventana de HORARIO_TURNOS dentro del mismo horario.
+HORA_APERTURA = 8 * 60
+HORA_CIERRE = 22 * 60
+MINUTOS_INTERVALO = 30
+HORARIO_TURNOS = {1: (8 * 60, 12 * 60), 2: (12 * 60, 17 * 60), 3: (17 * 60, 22 * 60)}
+
+ENCABEZADOS_EXPORTACION = {
+    "folio": "Folio",
+    "nombre_sala": "Nombre Sala",
+    "nombre_cliente": "Nombre Cliente",
+    "nombre_evento": "Nombre Evento",
+    "turno": "Turno",
+    "fecha": "Fecha",
+    "cancelado": "Cancelado",
+    "actualizado": "Actualizado",
+}
+
+class BaseDatosOcupada(sqlite3.OperationalError):
+    """La base de datos siguió bloqueada por otra terminal después de todos los reintentos."""
+
+
+class CupoInsuficiente(ValueError):
+    """La reservación tiene más asistentes que los lugares libres del turno."""
+
+
+class HorarioOcupado(ValueError):
+    """El horario o turno solicitado se traslapa con otra reservación de la sala."""
+
+
+class FechaNoReservable(ValueError):
+    """La fecha no es reservable en el calendario o no respeta la anticipación mínima."""
+
+
+class _RespaldoReiniciado(Exception):
+    """Un respaldo por pasos se reinició demasiadas veces por escrituras concurrentes."""
+
+
+class ControlConcurrencia:
+    """Manejo de la contención entre varias terminales que comparten la base de datos.
+
+    Reúne el tiempo de espera de SQLite (busy timeout), los reintentos con
+    espera exponencial aleatoria ante errores de bloqueo y los contadores de
+    contención. Es seguro compartir una instancia entre hilos.
+    """
+
+    UMBRAL_ESPERA = 0.001
+
+    def __init__(self, tiempo_espera: float = 5.0, max_reintentos: int = 5, espera_base: float = 0.05, espera_maxima: float = 2.0):
+        """
+        Args:
+            tiempo_espera (float): Segundos que SQLite espera a que se libere un bloqueo.
+            max_reintentos (int): Reintentos de una transacción tras un error de bloqueo.
+            espera_base (float): Espera inicial entre reintentos, en segundos.
+            espera_maxima (float): Tope de la espera entre reintentos, en segundos.
+        """
+
+        self.tiempo_espera = tiempo_espera
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+
+        self.__candado = threading.Lock()
+        self.__contadores = {
+            "esperas_bloqueo": 0,
+            "segundos_bloqueo": 0.0,
+            "errores_bloqueo": 0,
+            "reintentos": 0,
+            "segundos_reintento": 0.0,
+            "abandonos": 0,
+        }
+
+    def conectar(self, ruta_bd: str, **opciones) -> sqlite3.Connection:
+        """Abre una conexión con el tiempo de espera configurado.
+
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            **opciones: Argumentos adicionales de sqlite3.connect.
+
+        Returns:
+            sqlite3.Connection: Conexión abierta.
+        """
+
+        return sqlite3.connect(ruta_bd, timeout=self.tiempo_espera, **opciones)
+
+    def iniciar_escritura(self, cursor: sqlite3.Cursor) -> None:
+        """Abre una transacción de escritura tomando el bloqueo desde el inicio.
+
+        Con BEGIN IMMEDIATE la espera por otra terminal ocurre aquí, dentro del
+        busy timeout, y no al intentar confirmar. El tiempo de espera se
+        registra en los contadores.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor de una conexión en modo autocommit.
+        """
+
+        inicio = time.perf_counter()
+        cursor.execute("BEGIN IMMEDIATE;")
+        espera = time.perf_counter() - inicio
+
+        if espera >= self.UMBRAL_ESPERA:
+            self.__sumar("esperas_bloqueo", 1)
+            self.__sumar("segundos_bloqueo", espera)
+
+    def ejecutar(self, transaccion: Callable[[], Any]) -> Any:
+        """Ejecuta una transacción y la reintenta si la base de datos está bloqueada.
+
+        Args:
+            transaccion (Callable): Función que abre, ejecuta y confirma la transacción completa.
+
+        Returns:
+            Any: Valor devuelto por la transacción.
+
+        Raises:
+            BaseDatosOcupada: Si el bloqueo persiste después de todos los reintentos.
+        """
+
+        intento = 0
+        while True:
+            try:
+                return transaccion()
+            except sqlite3.OperationalError as e:
+                if not es_error_bloqueo(e):
+                    raise
+
+                self.__sumar("errores_bloqueo", 1)
+
+                if intento >= self.max_reintentos:
+                    self.__sumar("abandonos", 1)
+                    raise BaseDatosOcupada(f"La base de datos está ocupada por otra terminal; la operación no se guardó ({e}).") from e
+
+                espera = random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+                self.__sumar("reintentos", 1)
+                self.__sumar("segundos_reintento", espera)
+                time.sleep(espera)
+                intento += 1
+
+    def __sumar(self, contador: str, valor: float) -> None:
+        """Incrementa un contador de manera segura entre hilos."""
+
+        with self.__candado:
+            self.__contadores[contador] += valor
+
+    def estadisticas(self) -> dict:
+        """Obtiene una copia de los contadores de contención.
+
+        Returns:
+            dict: Contadores de esperas, errores de bloqueo, reintentos y abandonos.
+        """
+
+        with self.__candado:
+            return dict(self.__contadores)
+
+
+def es_error_bloqueo(error: Exception) -> bool:
+    """Indica si un error de SQLite se debe a que otra conexión tiene bloqueada la base de datos.
+
+    Args:
+        error (Exception): Error a revisar.
+
+    Returns:
+        bool: True si es SQLITE_BUSY o SQLITE_LOCKED.
+    """
+
+    codigo = getattr(error, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+
+class _OperacionPendiente:
+    """Escritura encolada en el agrupador, junto con su resultado individual."""
+
+    def __init__(self, operacion: Callable[[sqlite3.Cursor], Any]):
+        self.operacion = operacion
+        self.resultado = None
+        self.error = None
+        self.lista = threading.Event()
+
+
+class AgrupadorEscrituras:
+    """Agrupa las escrituras de varios llamadores en una sola transacción (group commit).
+
+    Las operaciones se encolan y un hilo escritor las confirma juntas cada
+    `intervalo_ms` milisegundos o cada `max_operaciones` operaciones, lo que
+    ocurra primero. Cada operación corre dentro de su propio SAVEPOINT, así
+    que un conflicto solo revierte a esa operación y cada llamador recibe su
+    propio resultado o excepción.
+    """
+
+    DURABILIDADES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    def __init__(self, ruta_bd: str = RUTA_BD, max_operaciones: int = 64, intervalo_ms: float = 5, durabilidad: str = "FULL",
+                 concurrencia: ControlConcurrencia = None):
+        """
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            max_operaciones (int): Máximo de operaciones por transacción.
+            intervalo_ms (float): Tiempo máximo de espera para completar un lote.
+            durabilidad (str): Valor de PRAGMA synchronous (OFF, NORMAL, FULL o EXTRA).
+            concurrencia (ControlConcurrencia): Tiempo de espera y reintentos. (opcional)
+        """
+
+        durabilidad = durabilidad.upper()
+        if durabilidad not in self.DURABILIDADES:
+            raise ValueError(f"Durabilidad no válida: {durabilidad}. Opciones: {', '.join(self.DURABILIDADES)}.")
+        if max_operaciones < 1:
+            raise ValueError("El lote debe admitir por lo menos una operación.")
+
+        self.ruta_bd = ruta_bd
+        self.max_operaciones = max_operaciones
+        self.intervalo = intervalo_ms / 1000
+        self.durabilidad = durabilidad
+        self.concurrencia = concurrencia if concurrencia is not None else ControlConcurrencia()
+        self.lotes_confirmados = 0
+        self.operaciones_confirmadas = 0
+
+        self.__cola = queue.Queue()
+        self.__cerrado = False
+        self.__hilo = threading.Thread(target=self.__procesar, name="agrupador-escrituras", daemon=True)
+        self.__hilo.start()
+
+    def ejecutar(self, operacion: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """Encola una escritura y espera a que su lote sea confirmado.
+
+        Args:
+            operacion (Callable): Función que recibe un cursor y realiza la escritura.
+
+        Returns:
+            Any: Valor devuelto por la operación.
+
+        Raises:
+            Error: Si la operación o la confirmación del lote fallan.
+        """
+
+        if self.__cerrado:
+            raise RuntimeError("El agrupador de escrituras ya fue cerrado.")
+
+        pendiente = _OperacionPendiente(operacion)
+        self.__cola.put(pendiente)
+        pendiente.lista.wait()
+
+        if pendiente.error is not None:
+            raise pendiente.error
+
+        return pendiente.resultado
+
+    def cerrar(self) -> None:
+        """Confirma las escrituras pendientes y detiene el hilo escritor."""
+
+        if self.__cerrado:
+            return
+
+        self.__cerrado = True
+        self.__cola.put(None)
+        self.__hilo.join()
+
+    def __procesar(self) -> None:
+        """Ciclo del hilo escritor: junta lotes y los confirma."""
+
+        conn = self.concurrencia.conectar(self.ruta_bd, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA synchronous = {self.durabilidad};")
+
+        terminar = False
+        while not terminar:
+            primera = self.__cola.get()
+            if primera is None:
+                break
+
+            lote = [primera]
+            limite = time.monotonic() + self.intervalo
+
+            while len(lote) < self.max_operaciones:
+                restante = limite - time.monotonic()
+                try:
+                    siguiente = self.__cola.get(timeout=restante) if restante > 0 else self.__cola.get_nowait()
+                except queue.Empty:
+                    break
+
+                if siguiente is None:
+                    terminar = True
+                    break
+
+                lote.append(siguiente)
+
+            self.__confirmar_lote(conn, lote)
+
+        conn.close()
+
+    def __confirmar_lote(self, conn: sqlite3.Connection, lote: list) -> None:
+        """Ejecuta un lote en una sola transacción y entrega el resultado a cada llamador.
+
+        Args:
+            conn (sqlite3.Connection): Conexión del hilo escritor.
+            lote (list): Lista de operaciones pendientes.
+        """
+
+        cursor = conn.cursor()
+
+        def confirmar() -> None:
+            try:
+                self.concurrencia.iniciar_escritura(cursor)
+
+                for pendiente in lote:
+                    pendiente.resultado, pendiente.error = None, None
+                    cursor.execute("SAVEPOINT operacion;")
+                    try:
+                        pendiente.resultado = pendiente.operacion(cursor)
+                    except Exception as e:
+                        pendiente.error = e
+                        cursor.execute("ROLLBACK TO operacion;")
+                    cursor.execute("RELEASE operacion;")
+
+                cursor.execute("COMMIT;")
+            except Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+        try:
+            self.concurrencia.ejecutar(confirmar)
+            self.lotes_confirmados += 1
+            self.operaciones_confirmadas += sum(1 for pendiente in lote if pendiente.error is None)
+        except Error as e:
+            for pendiente in lote:
+                if pendiente.error is None:
+                    pendiente.error = e
+        finally:
+            for pendiente in lote:
+                pendiente.lista.set()
+
+
+class CacheReferencias:
+    """Caché en proceso de clientes, salas y turnos.
+
+    Los datos se guardan en diccionarios indexados por ID, por lo que validar
+    un ID o resolver un nombre es de tiempo constante. Como CacheFechas, cada
+    consulta lee PRAGMA data_version en una conexión propia y, si otro proceso
+    escribió, compara los contadores de version_referencias para recargar solo
+    los clientes o solo las salas y turnos. Un ID desconocido se busca con una
+    consulta de una fila y, si existe, se agrega a la caché.
+    """
+
+    def __init__(self, ruta_bd: str = RUTA_BD, concurrencia: ControlConcurrencia = None):
+        """
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            concurrencia (ControlConcurrencia): Tiempo de espera y reintentos. (opcional)
+        """
+
+        self.ruta_bd = ruta_bd
+        self.concurrencia = concurrencia if concurrencia is not None else ControlConcurrencia()
+        self.__candado = threading.Lock()
+        self.__conexion = None
+        self.__version_datos = None
+        self.__versiones = (None, None)
+        self.__pendientes = {"clientes", "salas"}
+        self.__clientes = {}
+        self.__salas = {}
+        self.__turnos = {}
+
+    def invalidar(self) -> None:
+        """Marca la caché como obsoleta para que se recargue en la siguiente consulta."""
+
+        with self.__candado:
+            self.__pendientes.update(("clientes", "salas"))
+
+    def __sincronizar(self, cursor: sqlite3.Cursor) -> None:
+        """Marca para recargar las tablas que otros procesos hayan modificado.
+
+        Se llama con el candado tomado. Sin escrituras nuevas cuesta una sola lectura.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor de la conexión propia de la caché.
+        """
+
+        version_datos = cursor.execute("PRAGMA data_version;").fetchone()[0]
+        if version_datos == self.__version_datos:
+            return
+
+        versiones = cursor.execute("SELECT version, clientes FROM version_referencias;").fetchone()
+        if versiones[0] != self.__versiones[0]:
+            self.__pendientes.add("salas")
+        if versiones[1] != self.__versiones[1]:
+            self.__pendientes.add("clientes")
+
+        self.__version_datos, self.__versiones = version_datos, versiones
+
+    def __cargar(self) -> None:
+        """Recarga las tablas de referencia que estén obsoletas."""
+
+        with self.__candado:
+            if self.__conexion is None:
+                self.__conexion = self.concurrencia.conectar(self.ruta_bd, isolation_level=None, check_same_thread=False)
+
+            cursor = self.__conexion.cursor()
+            self.__sincronizar(cursor)
+
+            if "clientes" in self.__pendientes:
+                cursor.execute("SELECT id_cliente, nombre, apellidos FROM clientes;")
+                self.__clientes = {fila[0]: fila for fila in cursor.fetchall()}
+
+            if "salas" in self.__pendientes:
+                cursor.execute("SELECT id_sala, nombre, cupo FROM salas;")
+                self.__salas = {fila[0]: fila for fila in cursor.fetchall()}
+
+                cursor.execute("SELECT id_turno, turno FROM turnos;")
+                self.__turnos = dict(cursor.fetchall())
+
+            self.__pendientes.clear()
+
+    def __contiene(self, tabla: str, id_buscado: int) -> bool:
+        """Busca un ID en la tabla indicada y, si no aparece, lo consulta en la base de datos.
+
+        Args:
+            tabla (str): "clientes" o "salas".
+            id_buscado (int): ID a buscar.
+
+        Returns:
+            bool: True si el ID existe.
+        """
+
+        self.__cargar()
+        if id_buscado in (self.__clientes if tabla == "clientes" else self.__salas):
+            return True
+
+        with self.__candado:
+            if tabla == "clientes":
+                fila = self.__conexion.execute("""
+                    SELECT id_cliente, nombre, apellidos
+                    FROM clientes
+                    WHERE id_cliente = ?;
+                """, (id_buscado,)).fetchone()
+                if fila is not None:
+                    self.__clientes[id_buscado] = fila
+            else:
+                fila = self.__conexion.execute("""
+                    SELECT id_sala, nombre, cupo
+                    FROM salas
+                    WHERE id_sala = ?;
+                """, (id_buscado,)).fetchone()
+                if fila is not None:
+                    self.__salas[id_buscado] = fila
+
+        return fila is not None
+
+    def existe_cliente(self, id_cliente: int) -> bool:
+        """Indica si el cliente está registrado.
+
+        Args:
+            id_cliente (int): ID del cliente.
+
+        Returns:
+            bool: True si existe, False si no existe.
+        """
+
+        return self.__contiene("clientes", id_cliente)
+
+    def existe_sala(self, id_sala: int) -> bool:
+        """Indica si la sala está registrada.
+
+        Args:
+            id_sala (int): ID de la sala.
+
+        Returns:
+            bool: True si existe, False si no existe.
+        """
+
+        return self.__contiene("salas", id_sala)
+
+    def obtener_clientes(self) -> list:
+        """Obtiene los clientes registrados ordenados por apellidos.
+
+        Returns:
+            list: Lista de tuplas (id_cliente, nombre, apellidos).
+        """
+
+        self.__cargar()
+        return sorted(self.__clientes.values(), key=lambda cliente: (cliente[2], cliente[0]))
+
+    def nombre_turno(self, id_turno: int) -> str:
+        """Obtiene el nombre de un turno a partir de su número.
+
+        Args:
+            id_turno (int): Número del turno (1, 2 o 3).
+
+        Returns:
+            str: Nombre del turno.
+        """
+
+        self.__cargar()
+        return self.__turnos.get(id_turno, "")
+
+    def cerrar(self) -> None:
+        """Cierra la conexión usada para detectar cambios de otros procesos."""
+
+        with self.__candado:
+            if self.__conexion is not None:
+                self.__conexion.close()
+                self.__conexion = None
+
+
+class CacheFechas:
+    """Caché LRU acotada de las consultas de un solo día.
+
+    Guarda las reservaciones vigentes y las salas disponibles de las fechas
+    consultadas más recientemente. Las escrituras de este proceso invalidan
+    solo la fecha que modifican. Para las de otros procesos, cada consulta
+    lee PRAGMA data_version en una conexión propia: si cambió, se invalidan
+    las fechas de los eventos nuevos del registro de cambios, o la caché
+    completa si cambiaron las salas, el calendario o las reservaciones por
+    horario.
+    """
+
+    CONSULTAS = ("reservaciones", "salas_disponibles")
+
+    def __init__(self, ruta_bd: str = RUTA_BD, tamano: int = 256, concurrencia: ControlConcurrencia = None):
+        """
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            tamano (int): Máximo de entradas (consulta, fecha) guardadas.
+            concurrencia (ControlConcurrencia): Tiempo de espera y reintentos. (opcional)
+        """
+
+        self.ruta_bd = ruta_bd
+        self.tamano = tamano
+        self.concurrencia = concurrencia if concurrencia is not None else ControlConcurrencia()
+        self.__candado = threading.Lock()
+        self.__entradas = collections.OrderedDict()
+        self.__generacion = 0
+        self.__aciertos = 0
+        self.__fallos = 0
+        self.__invalidaciones = 0
+        self.__conexion = None
+        self.__version_datos = None
+        self.__version_referencias = None
+        self.__secuencia = 0
+
+    def __vaciar(self) -> None:
+        """Descarta todas las entradas. Se llama con el candado tomado."""
+
+        self.__entradas.clear()
+        self.__generacion += 1
+        self.__invalidaciones += 1
+
+    def __descartar(self, dia: int) -> None:
+        """Descarta las entradas de un día. Se llama con el candado tomado."""
+
+        for consulta in self.CONSULTAS:
+            self.__entradas.pop((consulta, dia), None)
+        self.__generacion += 1
+        self.__invalidaciones += 1
+
+    def __sincronizar(self) -> None:
+        """Invalida lo que otros procesos hayan modificado desde la última consulta.
+
+        Se llama con el candado tomado. PRAGMA data_version solo cambia cuando otra
+        conexión confirma una escritura, así que sin cambios cuesta una sola lectura.
+        """
+
+        if self.__conexion is None:
+            self.__conexion = self.concurrencia.conectar(self.ruta_bd, isolation_level=None, check_same_thread=False)
+
+        cursor = self.__conexion.cursor()
+        version_datos = cursor.execute("PRAGMA data_version;").fetchone()[0]
+        if version_datos == self.__version_datos:
+            return
+
+        version_referencias = cursor.execute("SELECT version FROM version_referencias;").fetchone()[0]
+        if self.__version_datos is None:
+            self.__secuencia = cursor.execute("SELECT COALESCE(MAX(secuencia), 0) FROM eventos_reservacion;").fetchone()[0]
+        elif version_referencias != self.__version_referencias:
+            self.__secuencia = cursor.execute("SELECT COALESCE(MAX(secuencia), 0) FROM eventos_reservacion;").fetchone()[0]
+            self.__vaciar()
+        else:
+            cursor.execute("""
+                SELECT secuencia, datos
+                FROM eventos_reservacion
+                WHERE secuencia > ?
+                ORDER BY secuencia;
+            """, (self.__secuencia,))
+            for secuencia, datos in cursor:
+                self.__descartar(dt.date.fromisoformat(json.loads(datos)["fecha"]).toordinal())
+                self.__secuencia = secuencia
+
+        self.__version_datos = version_datos
+        self.__version_referencias = version_referencias
+
+    def obtener(self, consulta: str, fecha: dt.date, cargar: Callable[[], list]) -> list:
+        """Devuelve el resultado guardado de una consulta o lo carga y lo guarda.
+
+        Si la fecha se invalida mientras se carga, el resultado se devuelve
+        pero no se guarda, porque pudo leerse antes de la escritura.
+
+        Args:
+            consulta (str): Una de CONSULTAS.
+            fecha (dt.date): Fecha consultada.
+            cargar (Callable): Función que ejecuta la consulta en la base de datos.
+
+        Returns:
+            list: Filas de la consulta.
+        """
+
+        clave = (consulta, fecha.toordinal())
+
+        with self.__candado:
+            self.__sincronizar()
+            if clave in self.__entradas:
+                self.__entradas.move_to_end(clave)
+                self.__aciertos += 1
+                return list(self.__entradas[clave])
+
+            self.__fallos += 1
+            generacion = self.__generacion
+
+        filas = cargar()
+
+        with self.__candado:
+            if generacion == self.__generacion:
+                self.__entradas[clave] = tuple(filas)
+                while len(self.__entradas) > self.tamano:
+                    self.__entradas.popitem(last=False)
+
+        return filas
+
+    def invalidar(self, fecha: dt.date = None) -> None:
+        """Descarta las consultas de una fecha, o de todas si no se indica.
+
+        Args:
+            fecha (dt.date): Fecha modificada. (opcional)
+        """
+
+        with self.__candado:
+            if fecha is None:
+                self.__vaciar()
+            else:
+                self.__descartar(fecha.toordinal())
+
+    def estadisticas(self) -> dict:
+        """Obtiene los contadores de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, invalidaciones y entradas guardadas.
+        """
+
+        with self.__candado:
+            return {
+                "aciertos": self.__aciertos,
+                "fallos": self.__fallos,
+                "invalidaciones": self.__invalidaciones,
+                "entradas": len(self.__entradas),
+            }
+
+    def cerrar(self) -> None:
+        """Cierra la conexión usada para detectar cambios de otros procesos."""
+
+        with self.__candado:
+            if self.__conexion is not None:
+                self.__conexion.close()
+                self.__conexion = None
+
+
+class Metricas:
+    """Contadores, errores por tipo e histogramas de latencia de las operaciones del coworking.
+
+    Las operaciones se registran con `medir`; los errores que una operación
+    atrapa y muestra al usuario se cuentan con `registrar_error`, que los
+    atribuye a la operación en curso del hilo. El resultado se expone en el
+    formato de texto de Prometheus, ya sea reescribiendo un archivo cada
+    cierto tiempo (para el textfile collector de node_exporter) o sirviéndolo
+    en un puerto local.
+    """
+
+    LIMITES = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.__candado = threading.Lock()
+        self.__local = threading.local()
+        self.__histogramas = {}
+        self.__errores = {}
+        self.__contadores = []
+        self.__detener = threading.Event()
+        self.__hilos = []
+        self.__servidor = None
+        self.__ruta_archivo = None
+
+    def __pila(self) -> list:
+        """Operaciones en curso del hilo actual, de la más externa a la más interna."""
+
+        pila = getattr(self.__local, "pila", None)
+        if pila is None:
+            pila = self.__local.pila = []
+        return pila
+
+    def observar(self, operacion: str, segundos: float) -> None:
+        """Agrega una llamada y su duración al histograma de una operación.
+
+        Args:
+            operacion (str): Nombre de la operación.
+            segundos (float): Duración de la llamada.
+        """
+
+        indice = bisect.bisect_left(self.LIMITES, segundos)
+
+        with self.__candado:
+            histograma = self.__histogramas.get(operacion)
+            if histograma is None:
+                histograma = self.__histogramas[operacion] = [[0] * (len(self.LIMITES) + 1), 0.0]
+            histograma[0][indice] += 1
+            histograma[1] += segundos
+
+    def registrar_error(self, tipo: str, operacion: str = None) -> None:
+        """Cuenta un error de una operación.
+
+        Args:
+            tipo (str): Nombre de la clase de la excepción.
+            operacion (str): Operación que falló; por omisión, la operación en curso del hilo. (opcional)
+        """
+
+        if operacion is None:
+            pila = self.__pila()
+            operacion = pila[-1] if pila else "desconocida"
+
+        with self.__candado:
+            self.__errores[(operacion, tipo)] = self.__errores.get((operacion, tipo), 0) + 1
+
+    @contextlib.contextmanager
+    def medir(self, operacion: str):
+        """Mide la duración de un bloque y cuenta las excepciones que lo atraviesan.
+
+        Args:
+            operacion (str): Nombre de la operación.
+        """
+
+        pila = self.__pila()
+        pila.append(operacion)
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.registrar_error(type(e).__name__, operacion)
+            raise
+        finally:
+            self.observar(operacion, time.perf_counter() - inicio)
+            pila.pop()
+
+    def agregar_contadores(self, nombre: str, ayuda: str, obtener: Callable[[], dict]) -> None:
+        """Publica contadores que lleva otro componente; se leen al generar el texto.
+
+        Args:
+            nombre (str): Nombre de la métrica sin el prefijo coworking_.
+            ayuda (str): Descripción de la métrica.
+            obtener (Callable): Función que devuelve un diccionario {contador: valor}.
+        """
+
+        with self.__candado:
+            self.__contadores.append((nombre, ayuda, obtener))
+
+    def errores(self) -> dict:
+        """Obtiene los errores contados hasta ahora.
+
+        Returns:
+            dict: Total de errores por (operación, tipo).
+        """
+
+        with self.__candado:
+            return dict(self.__errores)
+
+    def texto_prometheus(self) -> str:
+        """Genera el estado actual de las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            str: Texto listo para servir o escribir a un archivo .prom.
+        """
+
+        with self.__candado:
+            histogramas = {operacion: (list(conteos), suma) for operacion, (conteos, suma) in self.__histogramas.items()}
+            errores = dict(self.__errores)
+            contadores = list(self.__contadores)
+
+        lineas = [
+            "# HELP coworking_operaciones_total Llamadas a las operaciones del coworking.",
+            "# TYPE coworking_operaciones_total counter",
+        ]
+        for operacion, (conteos, _) in sorted(histogramas.items()):
+            lineas.append(f'coworking_operaciones_total{{operacion="{operacion}"}} {sum(conteos)}')
+
+        lineas += [
+            "# HELP coworking_errores_total Errores de las operaciones por tipo de excepción.",
+            "# TYPE coworking_errores_total counter",
+        ]
+        for (operacion, tipo), total in sorted(errores.items()):
+            lineas.append(f'coworking_errores_total{{operacion="{operacion}",tipo="{tipo}"}} {total}')
+
+        lineas += [
+            "# HELP coworking_duracion_segundos Duración de las operaciones del coworking.",
+            "# TYPE coworking_duracion_segundos histogram",
+        ]
+        for operacion, (conteos, suma) in sorted(histogramas.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.LIMITES + ("+Inf",), conteos):
+                acumulado += conteo
+                lineas.append(f'coworking_duracion_segundos_bucket{{operacion="{operacion}",le="{limite}"}} {acumulado}')
+            lineas.append(f'coworking_duracion_segundos_sum{{operacion="{operacion}"}} {suma:.6f}')
+            lineas.append(f'coworking_duracion_segundos_count{{operacion="{operacion}"}} {acumulado}')
+
+        for nombre, ayuda, obtener in contadores:
+            lineas += [f"# HELP coworking_{nombre} {ayuda}", f"# TYPE coworking_{nombre} counter"]
+            for contador, valor in sorted(obtener().items()):
+                lineas.append(f'coworking_{nombre}{{contador="{contador}"}} {valor}')
+
+        return "\n".join(lineas) + "\n"
+
+    def escribir_archivo(self, ruta: str) -> None:
+        """Escribe las métricas a un archivo, reemplazándolo de forma atómica.
+
+        Args:
+            ruta (str): Ruta del archivo .prom.
+        """
+
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
+    def iniciar_archivo(self, ruta: str, intervalo: float = 15.0) -> None:
+        """Reescribe el archivo de métricas cada `intervalo` segundos en un hilo de fondo.
+
+        Args:
+            ruta (str): Ruta del archivo .prom.
+            intervalo (float): Segundos entre escrituras. (opcional)
+        """
+
+        self.__ruta_archivo = ruta
+
+        def escribir() -> None:
+            while not self.__detener.wait(intervalo):
+                with contextlib.suppress(OSError):
+                    self.escribir_archivo(ruta)
+
+        hilo = threading.Thread(target=escribir, name="metricas-archivo", daemon=True)
+        hilo.start()
+        self.__hilos.append(hilo)
+
+    def iniciar_servidor(self, puerto: int, host: str = "127.0.0.1") -> None:
+        """Sirve las métricas en http://host:puerto/metrics desde un hilo de fondo.
+
+        Args:
+            puerto (int): Puerto local.
+            host (str): Interfaz en la que escuchar; por omisión solo la local. (opcional)
+        """
+
+        metricas = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                cuerpo = metricas.texto_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato: str, *argumentos) -> None:
+                pass
+
+        self.__servidor = http.server.ThreadingHTTPServer((host, puerto), Manejador)
+        hilo = threading.Thread(target=self.__servidor.serve_forever, name="metricas-servidor", daemon=True)
+        hilo.start()
+        self.__hilos.append(hilo)
+
+    def detener(self) -> None:
+        """Detiene los hilos de fondo y escribe el archivo de métricas por última vez."""
+
+        self.__detener.set()
+        if self.__servidor is not None:
+            self.__servidor.shutdown()
+            self.__servidor.server_close()
+            self.__servidor = None
+        for hilo in self.__hilos:
+            hilo.join()
+        self.__hilos.clear()
+
+        if self.__ruta_archivo is not None:
+            with contextlib.suppress(OSError):
+                self.escribir_archivo(self.__ruta_archivo)
+
+
+class PerfilMemoria:
+    """Perfil de memoria con tracemalloc de las exportaciones y los listados.
+
+    Cada llamada de primer nivel a un manejador (o bloque `medir`) es una
+    operación; las llamadas anidadas y las etapas que marcan los exportadores
+    con `etapa` se guardan como sus etapas. De cada una se registra el pico,
+    es decir, la memoria máxima que llegó a ocupar por encima de la que había
+    al empezar, y la memoria que siguió ocupando al terminar. Está pensado
+    para un solo hilo: tracemalloc mide todo el proceso.
+    """
+
+    activo = None
+
+    def __init__(self):
+        self.__pila = []
+        self.__registros = []
+
+    def iniciar(self) -> None:
+        """Empieza a rastrear las asignaciones y convierte este perfil en el activo."""
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        PerfilMemoria.activo = self
+
+    def detener(self) -> None:
+        """Deja de rastrear las asignaciones."""
+
+        if PerfilMemoria.activo is self:
+            PerfilMemoria.activo = None
+        tracemalloc.stop()
+
+    @classmethod
+    def etapa(cls, nombre: str):
+        """Marca una etapa en el perfil activo; sin perfil activo no hace nada.
+
+        Args:
+            nombre (str): Nombre de la etapa.
+        """
+
+        perfil = cls.activo
+        return perfil.medir(nombre) if perfil is not None else contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def medir(self, nombre: str):
+        """Mide el pico y la memoria retenida de un bloque.
+
+        Args:
+            nombre (str): Nombre de la operación o etapa.
+        """
+
+        actual, pico = tracemalloc.get_traced_memory()
+        if self.__pila:
+            self.__pila[-1]["maximo"] = max(self.__pila[-1]["maximo"], pico)
+        tracemalloc.reset_peak()
+
+        marco = {"inicio": actual, "maximo": actual, "etapas": []}
+        self.__pila.append(marco)
+        try:
+            yield
+        finally:
+            actual, pico = tracemalloc.get_traced_memory()
+            # Un generador que no se consume hasta el final cierra su marco fuera de orden.
+            self.__pila.remove(marco)
+            maximo = max(marco["maximo"], pico)
+            registro = {"nombre": nombre, "pico": maximo - marco["inicio"], "neto": actual - marco["inicio"],
+                        "etapas": marco["etapas"]}
+
+            if self.__pila:
+                self.__pila[-1]["maximo"] = max(self.__pila[-1]["maximo"], maximo)
+                self.__pila[-1]["etapas"].append(registro)
+            else:
+                self.__registros.append(registro)
+
+    def registros(self) -> list:
+        """Obtiene las operaciones medidas hasta ahora.
+
+        Returns:
+            list: Diccionarios con nombre, pico, neto (en bytes) y etapas, anidadas con el mismo formato.
+        """
+
+        return list(self.__registros)
+
+    def mostrar(self) -> None:
+        """Muestra en formato tabular las operaciones medidas y sus etapas."""
+
+        filas = []
+
+        def agregar(registro: dict, nivel: int) -> None:
+            filas.append(["· " * nivel + registro["nombre"], f"{registro['pico'] / 1024:.1f}", f"{registro['neto'] / 1024:.1f}"])
+            for etapa in registro["etapas"]:
+                agregar(etapa, nivel + 1)
+
+        for registro in self.__registros:
+            agregar(registro, 0)
+
+        if not filas:
+            print("No se midió ninguna operación.")
+            return
+
+        print(tabulate(filas, ["Operación / etapa", "Pico (KiB)", "Retenida (KiB)"], tablefmt='grid', disable_numparse=True))
+
+
+def _medido(metodo: Callable) -> Callable:
+    """Envuelve un método para registrar sus llamadas en `self.metricas` y en el perfil de memoria activo.
+
+    Sin métricas ni perfil el costo es una consulta de atributo. Los generadores
+    se miden desde la primera hasta la última fila.
+
+    Args:
+        metodo (Callable): Método a envolver.
+
+    Returns:
+        Callable: Método envuelto.
+    """
+
+    operacion = ".".join(metodo.__qualname__.split(".")[-2:]).replace(".__", ".")
+
+    if inspect.isgeneratorfunction(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            if self.metricas is None and PerfilMemoria.activo is None:
+                return (yield from metodo(self, *args, **kwargs))
+
+            with PerfilMemoria.etapa(operacion):
+                if self.metricas is None:
+                    return (yield from metodo(self, *args, **kwargs))
+
+                inicio = time.perf_counter()
+                try:
+                    return (yield from metodo(self, *args, **kwargs))
+                except Exception as e:
+                    self.metricas.registrar_error(type(e).__name__, operacion)
+                    raise
+                finally:
+                    self.metricas.observar(operacion, time.perf_counter() - inicio)
+    else:
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            if self.metricas is None and PerfilMemoria.activo is None:
+                return metodo(self, *args, **kwargs)
+
+            with PerfilMemoria.etapa(operacion), (self.metricas.medir(operacion) if self.metricas is not None
+                                                  else contextlib.nullcontext()):
+                return metodo(self, *args, **kwargs)
+
+    return envoltura
+
+
+def _hora(minutos: int) -> dt.time:
+    """Convierte minutos desde la medianoche en hora del día."""
+
+    return dt.time(minutos // 60, minutos % 60)
+
+
+def _etiqueta_horario(inicio: int, fin: int) -> str:
+    """Texto "HH:MM-HH:MM" que ocupa la columna del turno en las reservaciones por horario."""
+
+    return f"{_hora(inicio):%H:%M}-{_hora(fin):%H:%M}"
+
+
+def _minutos_intervalo(inicio: dt.time, fin: dt.time) -> tuple:
+    """Valida el horario de una reservación y lo convierte en minutos desde la medianoche.
+
+    Args:
+        inicio (dt.time): Hora de inicio.
+        fin (dt.time): Hora de fin.
+
+    Returns:
+        tuple: (inicio, fin) en minutos.
+
+    Raises:
+        ValueError: Si el horario no es de bloques de MINUTOS_INTERVALO, termina antes de
+        empezar o sale de HORA_APERTURA a HORA_CIERRE.
+    """
+
+    minutos = tuple(hora.hour * 60 + hora.minute for hora in (inicio, fin))
+
+    if any(hora.second or hora.microsecond for hora in (inicio, fin)) or any(m % MINUTOS_INTERVALO for m in minutos):
+        raise ValueError(f"El horario debe ser en bloques de {MINUTOS_INTERVALO} minutos.")
+    if minutos[0] >= minutos[1]:
+        raise ValueError("La hora de fin debe ser posterior a la de inicio.")
+    if minutos[0] < HORA_APERTURA or minutos[1] > HORA_CIERRE:
+        raise ValueError(f"El horario debe estar entre las {_hora(HORA_APERTURA):%H:%M} y las {_hora(HORA_CIERRE):%H:%M}.")
+
+    return minutos
+
+
+def _validar_anticipacion(fecha: dt.date) -> None:
+    """Comprueba que una reservación se haga con DIAS_ANTICIPACION días de anticipación.
+
+    Raises:
+        FechaNoReservable: Si la fecha es anterior a hoy más DIAS_ANTICIPACION.
+    """
+
+    if fecha < dt.date.today() + dt.timedelta(days=DIAS_ANTICIPACION):
+        raise FechaNoReservable(f"Las reservaciones se hacen con al menos {DIAS_ANTICIPACION} días de anticipación.")
+
+
+def _calcular_huecos(ocupados, duracion_minima: int) -> list:
+    """Recorre los horarios ocupados de una sala y devuelve los huecos entre ellos.
+
+    Args:
+        ocupados (Iterable): Pares (inicio, fin) en minutos, ordenados por inicio.
+        duracion_minima (int): Minutos que debe durar un hueco para incluirlo.
+
+    Returns:
+        list: Tuplas (inicio, fin) como dt.time, de HORA_APERTURA a HORA_CIERRE.
+    """
+
+    huecos = []
+    libre_desde = HORA_APERTURA
+
+    for inicio, fin in itertools.chain(ocupados, [(HORA_CIERRE, HORA_CIERRE)]):
+        if inicio > libre_desde and inicio - libre_desde >= duracion_minima:
+            huecos.append((_hora(libre_desde), _hora(inicio)))
+        libre_desde = max(libre_desde, fin)
+
+    return huecos
+
+
+class Almacenamiento(ABC):
+    """Interfaz de almacenamiento de clientes, salas, reservaciones, calendario y eventos.
+
+    Los manejadores de Coworking solo hablan con esta interfaz, así que la misma
+    lógica funciona sobre SQLite o en memoria. Las fechas se reciben y devuelven
+    como dt.date; los turnos se reciben por número y se devuelven por nombre;
+    las horas de las reservaciones por horario se reciben y devuelven como dt.time.
+    Las reservaciones por horario comparten folios y eventos con las de turno, y
+    en los listados su turno es el horario "HH:MM-HH:MM" (ver _etiqueta_horario).
+    Una referencia inexistente (cliente, sala o turno) se reporta con
+    sqlite3.IntegrityError en todas las implementaciones.
+    """
+
+    @abstractmethod
+    def insertar_cliente(self, nombre: str, apellidos: str) -> int:
+        """Registra un cliente.
+
+        Args:
+            nombre (str): Nombre del cliente.
+            apellidos (str): Apellidos del cliente.
+
+        Returns:
+            int: ID asignado al cliente.
+        """
+
+    @abstractmethod
+    def obtener_clientes(self) -> list:
+        """Obtiene los clientes registrados ordenados por apellidos.
+
+        Returns:
+            list: Lista de tuplas (id_cliente, nombre, apellidos).
+        """
+
+    @abstractmethod
+    def existe_cliente(self, id_cliente: int) -> bool:
+        """Indica si el cliente está registrado.
+
+        Args:
+            id_cliente (int): ID del cliente.
+
+        Returns:
+            bool: True si existe, False si no existe.
+        """
+
+    @abstractmethod
+    def insertar_sala(self, nombre: str, cupo: int) -> int:
+        """Registra una sala.
+
+        Args:
+            nombre (str): Nombre de la sala.
+            cupo (int): Cupo de la sala.
+
+        Returns:
+            int: ID asignado a la sala.
+        """
+
+    @abstractmethod
+    def existe_sala(self, id_sala: int) -> bool:
+        """Indica si la sala está registrada.
+
+        Args:
+            id_sala (int): ID de la sala.
+
+        Returns:
+            bool: True si existe, False si no existe.
+        """
+
+    @abstractmethod
+    def nombre_turno(self, id_turno: int) -> str:
+        """Obtiene el nombre de un turno a partir de su número.
+
+        Args:
+            id_turno (int): Número del turno (1, 2 o 3).
+
+        Returns:
+            str: Nombre del turno, o "" si no existe.
+        """
+
+    @abstractmethod
+    def obtener_salas_disponibles(self, fecha: dt.date) -> list:
+        """Obtiene las salas con lugares libres en al menos un turno de una fecha reservable.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+
+        Returns:
+            list: Lista de tuplas (id_sala, nombre, cupo, turnos con lugares libres) en orden de ID,
+            donde los turnos tienen la forma "Matutino (10), Nocturno (4)"; vacía si la fecha no es reservable.
+        """
+
+    @abstractmethod
+    def obtener_siguiente_turno_libre(self, id_sala: int, fecha_desde: dt.date) -> tuple:
+        """Obtiene el primer turno con lugares libres de una sala en una fecha reservable.
+
+        Args:
+            id_sala (int): ID de la sala.
+            fecha_desde (dt.date): Fecha a partir de la cual buscar.
+
+        Returns:
+            tuple: (fecha, turno) o None si no hay turnos libres dentro del calendario.
+        """
+
+    @abstractmethod
+    def insertar_reservacion(self, id_cliente: int, fecha: dt.date, id_turno: int, id_sala: int, nombre_evento: str,
+                             asistentes: int = None) -> int:
+        """Registra una reservación junto con su evento "creada".
+
+        Los lugares del turno se descuentan en la misma operación, de modo que dos
+        terminales no pueden reservar los mismos lugares.
+
+        Args:
+            id_cliente (int): ID del cliente.
+            fecha (dt.date): Fecha de la reservación.
+            id_turno (int): Número del turno.
+            id_sala (int): ID de la sala.
+            nombre_evento (str): Nombre del evento.
+            asistentes (int): Lugares que ocupa; por omisión, la sala completa. (opcional)
+
+        Returns:
+            int: Folio asignado.
+
+        Raises:
+            FechaNoReservable: Si la fecha no es reservable o no respeta la anticipación mínima.
+            HorarioOcupado: Si una reservación por horario cubre el turno.
+            CupoInsuficiente: Si el turno no tiene lugares para todos los asistentes.
+        """
+
+    @abstractmethod
+    def renombrar_reservacion(self, folio: int, nombre_evento: str) -> None:
+        """Cambia el nombre del evento de una reservación y registra el evento "renombrada".
+
+        Args:
+            folio (int): Folio de la reservación.
+            nombre_evento (str): Nuevo nombre del evento.
+        """
+
+    @abstractmethod
+    def cancelar_reservacion(self, folio: int) -> bool:
+        """Marca una reservación, por turno o por horario, como cancelada y registra el evento "cancelada".
+
+        Args:
+            folio (int): Folio de la reservación.
+
+        Returns:
+            bool: False si la reservación no existe o ya estaba cancelada.
+        """
+
+    @abstractmethod
+    def registrar_asistencia(self, folio: int, asistio: bool) -> None:
+        """Registra si el cliente se presentó a una reservación vigente.
+
+        Args:
+            folio (int): Folio de la reservación.
+            asistio (bool): True si se presentó, False si no.
+
+        Raises:
+            ValueError: Si la reservación no existe o está cancelada.
+        """
+
+    @abstractmethod
+    def iterar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date):
+        """Recorre las reservaciones vigentes de un rango en orden de fecha y folio.
+
+        Args:
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+
+        Yields:
+            tuple: (fecha, folio, id_sala, nombre_sala, nombre_cliente, nombre_evento, turno).
+        """
+
+    @abstractmethod
+    def existe_reservacion(self, fecha: dt.date, id_sala: int, id_turno: int) -> bool:
+        """Indica si un turno de una sala tiene una reservación vigente.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+            id_sala (int): ID de la sala.
+            id_turno (int): Número del turno.
+
+        Returns:
+            bool: True si está ocupado, False si está libre.
+        """
+
+    @abstractmethod
+    def obtener_lugares_libres(self, fecha: dt.date, id_sala: int, id_turno: int) -> int:
+        """Obtiene los lugares que quedan en un turno de una sala, sin volver a sumar las reservaciones.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+            id_sala (int): ID de la sala.
+            id_turno (int): Número del turno.
+
+        Returns:
+            int: Cupo de la sala menos los asistentes vigentes; 0 si la sala no existe o si una
+            reservación por horario cubre el turno.
+        """
+
+    @abstractmethod
+    def obtener_fechas_libres(self, id_sala: int, id_turno: int, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        """Obtiene las fechas reservables de un rango en las que el turno de una sala tiene lugares libres.
+
+        Args:
+            id_sala (int): ID de la sala.
+            id_turno (int): Número del turno.
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+
+        Returns:
+            list: Lista de fechas (dt.date) libres en orden.
+        """
+
+    @abstractmethod
+    def insertar_reservacion_intervalo(self, id_cliente: int, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time,
+                                       nombre_evento: str) -> int:
+        """Registra una reservación de la sala completa en un horario libre junto con su evento "creada".
+
+        El horario no puede traslaparse con otra reservación por horario ni con un
+        turno que tenga asistentes; mientras siga vigente, los turnos que cubre
+        quedan sin lugares libres.
+
+        Args:
+            id_cliente (int): ID del cliente.
+            fecha (dt.date): Fecha de la reservación.
+            id_sala (int): ID de la sala.
+            inicio (dt.time): Hora de inicio.
+            fin (dt.time): Hora de fin.
+            nombre_evento (str): Nombre del evento.
+
+        Returns:
+            int: Folio asignado, de la misma serie que las reservaciones por turno.
+
+        Raises:
+            FechaNoReservable: Si la fecha no es reservable o no respeta la anticipación mínima.
+            HorarioOcupado: Si el horario se traslapa con otra reservación.
+            ValueError: Si el horario no es válido.
+        """
+
+    @abstractmethod
+    def cancelar_reservacion_intervalo(self, folio: int) -> bool:
+        """Cancela una reservación por horario, libera los turnos que cubría y registra el evento "cancelada".
+
+        Un folio de una reservación por turno se ignora, igual que uno inexistente.
+
+        Args:
+            folio (int): Folio de la reservación por horario.
+
+        Returns:
+            bool: False si no hay una reservación por horario vigente con ese folio.
+        """
+
+    @abstractmethod
+    def existe_traslape(self, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time) -> bool:
+        """Indica si un horario de una sala se traslapa con una reservación por horario o con un turno ocupado.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+            id_sala (int): ID de la sala.
+            inicio (dt.time): Hora de inicio.
+            fin (dt.time): Hora de fin.
+
+        Returns:
+            bool: True si el horario está ocupado.
+        """
+
+    @abstractmethod
+    def obtener_reservaciones_intervalo(self, fecha: dt.date, id_sala: int) -> list:
+        """Obtiene las reservaciones por horario vigentes de una sala en una fecha.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+            id_sala (int): ID de la sala.
+
+        Returns:
+            list: Tuplas (folio, inicio, fin, id_cliente, nombre_cliente, nombre_evento) ordenadas por hora de inicio.
+        """
+
+    @abstractmethod
+    def obtener_huecos(self, fecha: dt.date, id_sala: int, duracion_minima: int = MINUTOS_INTERVALO) -> list:
+        """Obtiene los horarios libres de una sala en una fecha reservable.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+            id_sala (int): ID de la sala.
+            duracion_minima (int): Minutos que debe durar un hueco para incluirlo. (opcional)
+
+        Returns:
+            list: Tuplas (inicio, fin) sin reservaciones por horario ni turnos con asistentes;
+            vacía si la fecha no es reservable o la sala no existe.
+        """
+
+    @abstractmethod
+    def obtener_reservaciones_modificadas(self, desde_version: int) -> list:
+        """Obtiene las reservaciones, incluidas las canceladas, cambiadas después de una versión.
+
+        Args:
+            desde_version (int): Última versión ya procesada; -1 para obtener todas.
+
+        Returns:
+            list: Lista de tuplas (folio, nombre_sala, nombre_cliente, nombre_evento, turno,
+            fecha, cancelado, actualizado, version) en orden de versión.
+        """
+
+    @abstractmethod
+    def obtener_reservaciones_por_cliente(self, id_cliente: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                                          limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        """Obtiene una página del historial de un cliente y sus totales en el rango.
+
+        Las páginas continúan después de la última reservación de la anterior, así
+        que pedir una página lejana cuesta lo mismo que pedir la primera.
+
+        Args:
+            id_cliente (int): ID del cliente.
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+            limite (int): Máximo de reservaciones de la página.
+            despues (tuple): (fecha, folio) de la última reservación de la página anterior; None para la primera.
+            incluir_canceladas (bool): Si es True, la página incluye las canceladas.
+
+        Returns:
+            tuple: (filas, vigentes, canceladas). Cada fila es (folio, fecha, turno, id_sala,
+            nombre_sala, nombre_evento, cancelado), en orden de fecha y folio.
+        """
+
+    @abstractmethod
+    def obtener_agenda_sala(self, id_sala: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                            limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        """Obtiene una página de la agenda de una sala y sus totales en el rango.
+
+        Args:
+            id_sala (int): ID de la sala.
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+            limite (int): Máximo de reservaciones de la página.
+            despues (tuple): (fecha, folio) de la última reservación de la página anterior; None para la primera.
+            incluir_canceladas (bool): Si es True, la página incluye las canceladas.
+
+        Returns:
+            tuple: (filas, vigentes, canceladas). Cada fila es (folio, fecha, turno, id_cliente,
+            nombre_cliente, nombre_evento, cancelado), en orden de fecha y folio.
+        """
+
+    @abstractmethod
+    def obtener_clientes_frecuentes(self, fecha_inicio: dt.date, fecha_fin: dt.date, limite: int) -> list:
+        """Obtiene los clientes con más reservaciones vigentes en un rango.
+
+        Args:
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+            limite (int): Máximo de clientes a devolver.
+
+        Returns:
+            list: Lista de tuplas (id_cliente, nombre_cliente, reservaciones, vigentes, canceladas,
+            inasistencias) de mayor a menor número de vigentes; en empate, por ID. Las inasistencias
+            son las reservaciones vigentes registradas como no presentadas.
+        """
+
+    @abstractmethod
+    def agregar_fechas(self, fechas: list) -> None:
+        """Agrega al calendario las fechas que falten, sin tocar las existentes.
+
+        Args:
+            fechas (list): Fechas (dt.date) a agregar.
+        """
+
+    @abstractmethod
+    def marcar_fecha(self, fecha: dt.date, columna: str, activo: bool, descripcion: str) -> None:
+        """Marca o desmarca una fecha como festivo o día de cierre, agregándola si falta.
+
+        Args:
+            fecha (dt.date): Fecha a marcar.
+            columna (str): "festivo" o "cerrado".
+            activo (bool): Valor de la marca.
+            descripcion (str): Motivo de la marca.
+        """
+
+    @abstractmethod
+    def obtener_dia(self, fecha: dt.date) -> tuple:
+        """Obtiene la información de una fecha del calendario.
+
+        Args:
+            fecha (dt.date): Fecha a consultar.
+
+        Returns:
+            tuple: (dia_semana, festivo, cerrado, descripcion, reservable) o None si
+            la fecha está fuera del calendario.
+        """
+
+    @abstractmethod
+    def obtener_fechas_reservables(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        """Obtiene las fechas reservables dentro de un rango.
+
+        Args:
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+
+        Returns:
+            list: Lista de fechas (dt.date) reservables en orden.
+        """
+
+    @abstractmethod
+    def siguiente_fecha_reservable(self, fecha: dt.date) -> dt.date:
+        """Obtiene la primera fecha reservable a partir de la indicada.
+
+        Args:
+            fecha (dt.date): Fecha desde la cual buscar.
+
+        Returns:
+            dt.date: Fecha reservable o None si no hay ninguna dentro del calendario.
+        """
+
+    @abstractmethod
+    def obtener_cambios(self, desde: int, limite: int) -> list:
+        """Obtiene los eventos posteriores a una secuencia.
+
+        Args:
+            desde (int): Última secuencia ya procesada.
+            limite (int): Máximo de eventos a devolver.
+
+        Returns:
+            list: Lista de tuplas (secuencia, folio, tipo, datos, momento) en orden de secuencia.
+        """
+
+    @abstractmethod
+    def obtener_cursor(self, consumidor: str) -> int:
+        """Obtiene la última secuencia registrada por un consumidor.
+
+        Args:
+            consumidor (str): Nombre del consumidor.
+
+        Returns:
+            int: Secuencia guardada, o None si el consumidor es nuevo.
+        """
+
+    @abstractmethod
+    def guardar_cursor(self, consumidor: str, secuencia: int) -> None:
+        """Registra la última secuencia procesada por un consumidor.
+
+        Args:
+            consumidor (str): Nombre del consumidor.
+            secuencia (int): Última secuencia procesada.
+        """
+
+    def cerrar(self) -> None:
+        """Libera los recursos del almacenamiento y confirma lo pendiente."""
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    """Almacenamiento en un archivo SQLite que pueden compartir varias terminales."""
+
+    def __init__(self, ruta_bd: str = RUTA_BD, agrupar_escrituras: bool = False, max_operaciones_lote: int = 64,
+                 intervalo_lote_ms: float = 5, durabilidad: str = "FULL", tiempo_espera_bd: float = 5.0,
+                 max_reintentos: int = 5, modo_wal: bool = False, tamano_cache: int = 256):
+        """
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            agrupar_escrituras (bool): Si es True, las escrituras se confirman en lotes.
+            max_operaciones_lote (int): Máximo de escrituras por lote.
+            intervalo_lote_ms (float): Espera máxima para completar un lote.
+            durabilidad (str): Valor de PRAGMA synchronous del escritor agrupado.
+            tiempo_espera_bd (float): Segundos que se espera a que otra terminal libere la base de datos.
+            max_reintentos (int): Reintentos de una escritura tras un error de bloqueo.
+            modo_wal (bool): Si es True, activa el journal WAL para que las lecturas no bloqueen
+            a las escrituras. No usar si la base de datos está en una carpeta de red.
+            tamano_cache (int): Fechas consultadas que se guardan en caché; 0 la desactiva.
+        """
+
+        self.ruta_bd = ruta_bd
+        self.concurrencia = ControlConcurrencia(tiempo_espera_bd, max_reintentos)
+
+        if not os.path.exists(ruta_bd):
+            print("Aviso: No se encontró la base de datos, por lo que se iniciará con un estado vacío.")
+            self.__inicializar_base_datos()
+
+        self.__migrar_base_datos()
+
+        if modo_wal:
+            self.__activar_wal()
+
+        self.agrupador = None
+        if agrupar_escrituras:
+            self.agrupador = AgrupadorEscrituras(ruta_bd, max_operaciones_lote, intervalo_lote_ms, durabilidad, self.concurrencia)
+
+        self.referencias = CacheReferencias(ruta_bd, self.concurrencia)
+        self.cache = CacheFechas(ruta_bd, tamano_cache, self.concurrencia) if tamano_cache > 0 else None
+
+    def cerrar(self) -> None:
+        """Confirma las escrituras pendientes antes de terminar."""
+
+        if self.agrupador is not None:
+            self.agrupador.cerrar()
+        self.referencias.cerrar()
+        if self.cache is not None:
+            self.cache.cerrar()
+
+    def __invalidar_cache(self, fecha: dt.date = None) -> None:
+        """Descarta de la caché las consultas de una fecha, o todas si no se indica.
+
+        Args:
+            fecha (dt.date): Fecha modificada. (opcional)
+        """
+
+        if self.cache is not None:
+            self.cache.invalidar(fecha)
+
+    def _conectar(self, **opciones) -> sqlite3.Connection:
+        """Abre una conexión con el tiempo de espera configurado.
+
+        Args:
+            **opciones: Argumentos adicionales de sqlite3.connect.
+
+        Returns:
+            sqlite3.Connection: Conexión abierta.
+        """
+
+        return self.concurrencia.conectar(self.ruta_bd, **opciones)
+
+    def _escribir(self, operacion: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """Ejecuta una escritura, agrupada si hay agrupador o en su propia transacción corta si no.
+
+        La transacción se reintenta completa si otra terminal tiene bloqueada la base de datos.
+
+        Args:
+            operacion (Callable): Función que recibe un cursor y realiza la escritura.
+
+        Returns:
+            Any: Valor devuelto por la operación.
+        """
+
+        if self.agrupador is not None:
+            return self.agrupador.ejecutar(operacion)
+
+        def transaccion() -> Any:
+            conn = self._conectar(isolation_level=None)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("PRAGMA foreign_keys = ON;")
+                self.concurrencia.iniciar_escritura(cursor)
+
+                try:
+                    resultado = operacion(cursor)
+                    cursor.execute("COMMIT;")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+
+                return resultado
+            finally:
+                conn.close()
+
+        return self.concurrencia.ejecutar(transaccion)
+
+    def __inicializar_base_datos(self) -> None:
+        """Crea coworking.db y las tablas básicas si no existen."""
+
+        try:
+            with self.concurrencia.conectar(self.ruta_bd) as conn:
+                cursor = conn.cursor()
+
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS clientes (
+                        id_cliente INTEGER PRIMARY KEY,
+                        nombre TEXT NOT NULL,
+                        apellidos TEXT NOT NULL
+                    );
+                """)
+
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS salas (
+                        id_sala INTEGER PRIMARY KEY,
+                        nombre TEXT NOT NULL,
+                        cupo INTEGER NOT NULL
+                    );
+                """)
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS turnos (
+                        id_turno INTEGER PRIMARY KEY,
+                        turno TEXT NOT NULL
+                    );
+                """)
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS reservaciones (
+                        folio INTEGER PRIMARY KEY,
+                        id_cliente INTEGER NOT NULL,
+                        fecha TEXT NOT NULL,
+                        id_turno INTEGER NOT NULL,
+                        id_sala INTEGER NOT NULL,
+                        nombre_evento TEXT NOT NULL,
+                        cancelado INTEGER,
+                        FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente),
+                        FOREIGN KEY (id_sala) REFERENCES salas(id_sala),
+                        FOREIGN KEY (id_turno) REFERENCES turnos(id_turno)
+                    );
+                """)
+
+                cursor.execute("""
+                    INSERT INTO turnos (turno) VALUES ('Matutino');
+                """)
+
+                cursor.execute("""
+                    INSERT INTO turnos (turno) VALUES ('Vespertino');
+                """)
+
+                cursor.execute("""
+                    INSERT INTO turnos (turno) VALUES ('Nocturno');
+                """)
+
+        except Error as e:
+            print(e)
+        except Exception:
+            print(f"Ocurrió un error: {sys.exc_info()[0]}")
+
+    def __migrar_base_datos(self) -> None:
+        """Aplica las migraciones pendientes según PRAGMA user_version."""
+
+        try:
+            conn = self.concurrencia.conectar(self.ruta_bd, isolation_level=None)
+            cursor = conn.cursor()
+
+            for numero, sentencias in enumerate(MIGRACIONES, start=1):
+                self.concurrencia.iniciar_escritura(cursor)
+                version = cursor.execute("PRAGMA user_version;").fetchone()[0]
+
+                if version >= numero:
+                    cursor.execute("COMMIT;")
+                    continue
+
+                try:
+                    for sentencia in sentencias:
+                        cursor.execute(sentencia)
+                    cursor.execute(f"PRAGMA user_version = {numero};")
+                    cursor.execute("COMMIT;")
+                except Error:
+                    cursor.execute("ROLLBACK;")
+                    raise
+
+            conn.close()
+        except Error as e:
+            print(e)
+        except Exception:
+            print(f"Ocurrió un error: {sys.exc_info()[0]}")
+
+    def __activar_wal(self) -> None:
+        """Cambia el journal de la base de datos a WAL; el cambio persiste en el archivo."""
+
+        try:
+            conn = self.concurrencia.conectar(self.ruta_bd)
+            modo = conn.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+            conn.close()
+
+            if modo.lower() != "wal":
+                print(f"Aviso: No se pudo activar el modo WAL; la base de datos sigue en modo {modo}.")
+        except Error as e:
+            print(e)
+        except Exception:
+            print(f"Ocurrió un error: {sys.exc_info()[0]}")
+
+    def respaldar(self, directorio: str = "respaldos", paginas_por_paso: int = 256, pausa: float = 0.05,
+                  conservar: int = 7, verificar_integridad: bool = True, max_reinicios: int = 3) -> dict:
+        """Copia la base de datos en uso con la API de respaldo en línea de SQLite.
+
+        La copia avanza `paginas_por_paso` páginas a la vez y espera `pausa`
+        segundos entre pasos; entre un paso y otro la base de datos queda libre,
+        así que las terminales solo esperan lo que tarda un paso. Si otra
+        terminal escribe durante la copia, SQLite la reinicia para que el
+        respaldo sea consistente; después de `max_reinicios` reinicios el resto
+        se copia en un solo paso, que sí bloquea las escrituras mientras dura,
+        para que un flujo constante de escrituras no impida terminar.
+        El archivo se escribe con un nombre temporal
+        y solo toma su nombre final después de pasar la verificación de
+        integridad, así que nunca queda un respaldo a medias con nombre válido.
+
+        Args:
+            directorio (str): Carpeta de los respaldos. (opcional)
+            paginas_por_paso (int): Páginas copiadas en cada paso. (opcional)
+            pausa (float): Segundos de espera entre pasos. (opcional)
+            conservar (int): Respaldos más recientes a conservar; los demás se borran. (opcional)
+            verificar_integridad (bool): Si es True, ejecuta PRAGMA integrity_check sobre la copia. (opcional)
+            max_reinicios (int): Reinicios tolerados antes de copiar todo en un solo paso. (opcional)
+
+        Returns:
+            dict: Ruta del respaldo, páginas y bytes copiados, pasos, reinicios, si el
+            resto se copió de forma forzada y bloqueante, duración en segundos y respaldos eliminados por la retención.
+
+        Raises:
+            sqlite3.DatabaseError: Si la copia no pasa la verificación de integridad.
+        """
+
+        os.makedirs(directorio, exist_ok=True)
+        base = os.path.splitext(os.path.basename(self.ruta_bd))[0]
+        ruta = os.path.join(directorio, f"{base}_{dt.datetime.now():%Y%m%d-%H%M%S-%f}.db")
+        ruta_parcial = ruta + ".parcial"
+
+        avance = {"pasos": 0, "reinicios": 0, "restantes": None, "copia_forzada": False}
+
+        def progreso(estado: int, restantes: int, total: int) -> None:
+            if avance["restantes"] is not None and restantes > avance["restantes"]:
+                avance["reinicios"] += 1
+                if avance["reinicios"] > max_reinicios:
+                    raise _RespaldoReiniciado
+            avance["pasos"] += 1
+            avance["restantes"] = restantes
+
+            # sqlite3 solo usa `sleep` cuando un paso encuentra la base bloqueada;
+            # la pausa entre pasos normales se hace aquí.
+            if restantes:
+                time.sleep(pausa)
+
+        inicio = time.perf_counter()
+        origen = self._conectar()
+        destino = sqlite3.connect(ruta_parcial)
+        try:
+            try:
+                origen.backup(destino, pages=paginas_por_paso, progress=progreso, sleep=pausa)
+            except _RespaldoReiniciado:
+                avance["copia_forzada"] = True
+                origen.backup(destino, pages=-1, sleep=pausa)
+
+            # La copia conserva el modo del journal del origen; un respaldo debe ser un solo archivo.
+            destino.execute("PRAGMA journal_mode = DELETE;")
+            paginas = destino.execute("PRAGMA page_count;").fetchone()[0]
+
+            if verificar_integridad:
+                resultado = destino.execute("PRAGMA integrity_check;").fetchall()
+                if resultado != [("ok",)]:
+                    raise sqlite3.DatabaseError(f"El respaldo no pasó la verificación de integridad: {resultado[:5]}")
+        except BaseException:
+            destino.close()
+            with contextlib.suppress(OSError):
+                os.remove(ruta_parcial)
+            raise
+        finally:
+            origen.close()
+
+        destino.close()
+        os.replace(ruta_parcial, ruta)
+        duracion = time.perf_counter() - inicio
+
+        respaldos = sorted(
+            nombre for nombre in os.listdir(directorio)
+            if nombre.startswith(f"{base}_") and nombre.endswith(".db")
+        )
+        eliminados = respaldos[:-conservar] if conservar > 0 else []
+        for nombre in eliminados:
+            os.remove(os.path.join(directorio, nombre))
+
+        return {
+            "ruta": ruta,
+            "paginas": paginas,
+            "bytes": os.path.getsize(ruta),
+            "pasos": avance["pasos"],
+            "reinicios": avance["reinicios"],
+            "copia_forzada": avance["copia_forzada"],
+            "duracion": duracion,
+            "eliminados": eliminados,
+        }
+
+    def __turno(self, id_turno: int, inicio: int, fin: int) -> str:
+        """Nombre del turno de una reservación, o su horario si es por horario."""
+
+        return self.referencias.nombre_turno(id_turno) if id_turno is not None else _etiqueta_horario(inicio, fin)
+
+    def __registrar_evento(self, cursor: sqlite3.Cursor, folio: int, tipo: str) -> dt.date:
+        """Agrega al registro de cambios el estado actual de una reservación.
+
+        Se llama dentro de la misma transacción que la escritura, así que el
+        evento existe si y solo si el cambio fue confirmado. La secuencia del
+        evento queda como `version` de la reservación.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor de la transacción en curso.
+            folio (int): Folio de la reservación modificada.
+            tipo (str): Tipo de cambio (creada, renombrada o cancelada).
+
+        Returns:
+            dt.date: Fecha de la reservación, o None si el folio no existe.
+        """
+
+        cursor.execute("""
+            SELECT id_cliente, fecha, id_turno, id_sala, nombre_evento, asistentes, inicio, fin
+            FROM reservaciones
+            WHERE folio = ?;
+        """, (folio,))
+
+        fila = cursor.fetchone()
+        if fila is None:
+            return None
+
+        datos = {
+            "id_cliente": fila[0],
+            "fecha": dt.date.fromordinal(fila[1]).isoformat(),
+            "turno": self.__turno(fila[2], fila[6], fila[7]),
+            "id_sala": fila[3],
+            "nombre_evento": fila[4],
+            "asistentes": fila[5],
+        }
+        if fila[6] is not None:
+            datos["inicio"], datos["fin"] = f"{_hora(fila[6]):%H:%M}", f"{_hora(fila[7]):%H:%M}"
+
+        cursor.execute("""
+            INSERT INTO eventos_reservacion (folio, tipo, datos)
+            VALUES (?, ?, ?);
+        """, (folio, tipo, json.dumps(datos, ensure_ascii=False)))
+
+        cursor.execute("""
+            UPDATE reservaciones
+            SET version = ?1,
+                actualizado = (SELECT momento FROM eventos_reservacion WHERE secuencia = ?1)
+            WHERE folio = ?2;
+        """, (cursor.lastrowid, folio))
+
+        return dt.date.fromordinal(fila[1])
+
+    def insertar_cliente(self, nombre: str, apellidos: str) -> int:
+        def insertar(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("""
+                INSERT INTO clientes (nombre, apellidos)
+                VALUES (?, ?);
+            """, (nombre, apellidos))
+            return cursor.lastrowid
+
+        id_cliente = self._escribir(insertar)
+        self.referencias.invalidar()
+        return id_cliente
+
+    def obtener_clientes(self) -> list:
+        return self.referencias.obtener_clientes()
+
+    def existe_cliente(self, id_cliente: int) -> bool:
+        return self.referencias.existe_cliente(id_cliente)
+
+    def insertar_sala(self, nombre: str, cupo: int) -> int:
+        def insertar(cursor: sqlite3.Cursor) -> int:
+            cursor.execute("""
+                INSERT INTO salas (nombre, cupo)
+                VALUES (?, ?);
+            """, (nombre, cupo))
+            return cursor.lastrowid
+
+        id_sala = self._escribir(insertar)
+        self.referencias.invalidar()
+        self.__invalidar_cache()
+        return id_sala
+
+    def existe_sala(self, id_sala: int) -> bool:
+        return self.referencias.existe_sala(id_sala)
+
+    def nombre_turno(self, id_turno: int) -> str:
+        return self.referencias.nombre_turno(id_turno)
+
+    def obtener_salas_disponibles(self, fecha: dt.date) -> list:
+        if self.cache is not None:
+            return self.cache.obtener("salas_disponibles", fecha, lambda: self.__consultar_salas_disponibles(fecha))
+        return self.__consultar_salas_disponibles(fecha)
+
+    def __consultar_salas_disponibles(self, fecha: dt.date) -> list:
+        dia = fecha.toordinal()
+        valores = (dia, dia)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                    SELECT
+                        id_sala,
+                        nombre,
+                        cupo,
+                        group_concat(turno || ' (' || libres || ')', ', ')
+                    FROM (
+                        SELECT
+                            s.id_sala,
+                            s.nombre,
+                            s.cupo,
+                            t.turno,
+                            s.cupo - COALESCE(o.ocupados, 0) AS libres
+                        FROM salas s
+                        CROSS JOIN turnos t
+                        LEFT JOIN ocupacion_turnos o
+                            ON o.fecha = ?1
+                            AND o.id_sala = s.id_sala
+                            AND o.id_turno = t.id_turno
+                        JOIN calendario cal ON cal.fecha = ?2 AND cal.reservable = 1
+                        WHERE s.cupo > COALESCE(o.ocupados, 0)
+                        AND COALESCE(o.intervalos, 0) = 0
+                        ORDER BY s.id_sala, t.id_turno
+                    )
+                    GROUP BY id_sala
+                    ORDER BY id_sala
+                """, valores)
+
+            return cursor.fetchall()
+
+    def obtener_siguiente_turno_libre(self, id_sala: int, fecha_desde: dt.date) -> tuple:
+        valores = (fecha_desde.toordinal(), id_sala)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    cal.fecha,
+                    t.id_turno
+                FROM calendario cal
+                CROSS JOIN turnos t
+                JOIN salas s ON s.id_sala = ?2
+                LEFT JOIN ocupacion_turnos o
+                    ON o.fecha = cal.fecha
+                    AND o.id_sala = ?2
+                    AND o.id_turno = t.id_turno
+                WHERE cal.reservable = 1
+                AND cal.fecha >= ?1
+                AND COALESCE(o.ocupados, 0) < s.cupo
+                AND COALESCE(o.intervalos, 0) = 0
+                ORDER BY cal.fecha, t.id_turno
+                LIMIT 1;
+            """, valores)
+
+            fila = cursor.fetchone()
+            if fila is None:
+                return None
+
+            return dt.date.fromordinal(fila[0]), self.referencias.nombre_turno(fila[1])
+
+    @staticmethod
+    def __verificar_reservable(cursor: sqlite3.Cursor, dia: int) -> None:
+        """Rechaza las fechas que el calendario no marca como reservables.
+
+        Se consulta dentro de la transacción de la escritura, así que un festivo
+        o cierre marcado por otra terminal no puede colarse entre la consulta y
+        la reservación.
+        """
+
+        fila = cursor.execute("SELECT reservable FROM calendario WHERE fecha = ?;", (dia,)).fetchone()
+        if fila is None or not fila[0]:
+            raise FechaNoReservable("La fecha no admite reservaciones: es domingo, festivo, día de cierre o está fuera del calendario.")
+
+    def insertar_reservacion(self, id_cliente: int, fecha: dt.date, id_turno: int, id_sala: int, nombre_evento: str,
+                             asistentes: int = None) -> int:
+        if asistentes is not None and asistentes < 1:
+            raise ValueError("El número de asistentes debe ser mayor a cero.")
+        _validar_anticipacion(fecha)
+
+        dia = fecha.toordinal()
+
+        def insertar(cursor: sqlite3.Cursor) -> int:
+            self.__verificar_reservable(cursor, dia)
+            fila = cursor.execute("SELECT cupo FROM salas WHERE id_sala = ?;", (id_sala,)).fetchone()
+            cupo = fila[0] if fila is not None else 0
+            lugares = cupo if asistentes is None else asistentes
+
+            cursor.execute("""
+                INSERT INTO reservaciones (id_cliente, fecha, id_turno, id_sala, nombre_evento, asistentes, creado)
+                VALUES (?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'));
+            """, (id_cliente, dia, id_turno, id_sala, nombre_evento, lugares))
+            folio = cursor.lastrowid
+
+            # La transacción ya tiene el bloqueo de escritura, así que sumar y
+            # comprobar el cupo aquí es atómico; si no alcanza, se revierte todo.
+            cursor.execute("""
+                INSERT INTO ocupacion_turnos (fecha, id_sala, id_turno, ocupados)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (fecha, id_sala, id_turno) DO UPDATE
+                SET ocupados = ocupados + excluded.ocupados
+                RETURNING ocupados, intervalos;
+            """, (dia, id_sala, id_turno, lugares))
+            ocupados, intervalos = cursor.fetchone()
+            if intervalos:
+                raise HorarioOcupado("El turno se traslapa con una reservación por horario de la sala.")
+            if ocupados > cupo:
+                raise CupoInsuficiente(f"Solo quedan {max(cupo - ocupados + lugares, 0)} lugares en ese turno.")
+
+            self.__registrar_evento(cursor, folio, "creada")
+            return folio
+
+        folio = self._escribir(insertar)
+        self.__invalidar_cache(fecha)
+        return folio
+
+    def renombrar_reservacion(self, folio: int, nombre_evento: str) -> None:
+        def actualizar(cursor: sqlite3.Cursor) -> dt.date:
+            cursor.execute("""
+                UPDATE reservaciones
+                SET nombre_evento = ?
+                WHERE folio = ?;
+            """, (nombre_evento, folio))
+            return self.__registrar_evento(cursor, folio, "renombrada")
+
+        fecha = self._escribir(actualizar)
+        if fecha is not None:
+            self.__invalidar_cache(fecha)
+
+    def cancelar_reservacion(self, folio: int) -> bool:
+        return self.__cancelar(folio, solo_horario=False)
+
+    def __cancelar(self, folio: int, solo_horario: bool) -> bool:
+        """Cancela una reservación y descuenta su ocupación, sea de un turno o de los turnos que cubre su horario."""
+
+        def cancelar(cursor: sqlite3.Cursor) -> dt.date:
+            cursor.execute("""
+                UPDATE reservaciones
+                SET cancelado = 1
+                WHERE folio = ?
+                AND cancelado IS NULL
+                AND (NOT ? OR inicio IS NOT NULL)
+                RETURNING fecha, id_sala, id_turno, asistentes, inicio, fin;
+            """, (folio, solo_horario))
+
+            # Una reservación inexistente o ya cancelada no genera otro evento,
+            # para no volver a exportarla.
+            fila = cursor.fetchone()
+            if fila is None:
+                return None
+
+            fecha, id_sala, id_turno, asistentes, inicio, fin = fila
+            if id_turno is not None:
+                cursor.execute("""
+                    UPDATE ocupacion_turnos
+                    SET ocupados = ocupados - ?4
+                    WHERE fecha = ?1
+                    AND id_sala = ?2
+                    AND id_turno = ?3;
+                """, (fecha, id_sala, id_turno, asistentes))
+            else:
+                cursor.execute("""
+                    UPDATE ocupacion_turnos
+                    SET intervalos = intervalos - 1
+                    WHERE fecha = ?1
+                    AND id_sala = ?2
+                    AND id_turno IN (SELECT id_turno FROM turnos WHERE inicio < ?4 AND fin > ?3);
+                """, (fecha, id_sala, inicio, fin))
+
+            return self.__registrar_evento(cursor, folio, "cancelada")
+
+        fecha = self._escribir(cancelar)
+        if fecha is None:
+            return False
+
+        self.__invalidar_cache(fecha)
+        return True
+
+    def registrar_asistencia(self, folio: int, asistio: bool) -> None:
+        def registrar(cursor: sqlite3.Cursor) -> None:
+            cursor.execute("""
+                UPDATE reservaciones
+                SET asistio = ?
+                WHERE folio = ?
+                AND cancelado IS NULL;
+            """, (int(asistio), folio))
+
+            if cursor.rowcount == 0:
+                raise ValueError("La reservación no existe o está cancelada.")
+
+        self._escribir(registrar)
+
+    def iterar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date):
+        # Las consultas de un solo día son pocas filas y se repiten mucho; los
+        # rangos se siguen leyendo por partes para no cargarlos en memoria.
+        if self.cache is not None and fecha_inicio == fecha_fin:
+            yield from self.cache.obtener("reservaciones", fecha_inicio,
+                                          lambda: list(self.__consultar_rango(fecha_inicio, fecha_fin)))
+        else:
+            yield from self.__consultar_rango(fecha_inicio, fecha_fin)
+
+    def __consultar_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date):
+        # Se lee por lotes que continúan después de la última (fecha, folio)
+        # leída. Cada lote se lee completo, así que la lectura termina y suelta
+        # el candado compartido antes de entregar las filas al llamador.
+        fecha, folio, fin = fecha_inicio.toordinal(), 0, fecha_fin.toordinal()
+
+        with contextlib.closing(self._conectar()) as conn:
+            while True:
+                cursor = conn.execute("""
+                    SELECT
+                        r.fecha,
+                        r.folio,
+                        r.id_sala,
+                        s.nombre,
+                        c.nombre || ' ' || c.apellidos AS nombre_cliente,
+                        r.nombre_evento,
+                        r.id_turno,
+                        r.inicio,
+                        r.fin
+                    FROM reservaciones r
+                    JOIN salas s ON s.id_sala = r.id_sala
+                    JOIN clientes c ON c.id_cliente = r.id_cliente
+                    WHERE (r.fecha, r.folio) > (?1, ?2)
+                    AND r.fecha <= ?3
+                    AND r.cancelado IS NULL
+                    ORDER BY r.fecha, r.folio
+                    LIMIT ?4;
+                """, (fecha, folio, fin, FILAS_POR_LOTE))
+                filas = [
+                    (dt.date.fromordinal(fila[0]),) + fila[1:6] + (self.__turno(*fila[6:]),)
+                    for fila in cursor
+                ]
+
+                yield from filas
+
+                if len(filas) < FILAS_POR_LOTE:
+                    return
+
+                fecha, folio = filas[-1][0].toordinal(), filas[-1][1]
+
+    def existe_reservacion(self, fecha: dt.date, id_sala: int, id_turno: int) -> bool:
+        valores = (fecha.toordinal(), id_sala, id_turno)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT 1
+                FROM ocupacion_turnos
+                WHERE fecha = ?
+                AND id_sala = ?
+                AND id_turno = ?
+                AND (ocupados > 0 OR intervalos > 0);
+            """, valores)
+
+            return cursor.fetchone() is not None
+
+    def obtener_lugares_libres(self, fecha: dt.date, id_sala: int, id_turno: int) -> int:
+        valores = (fecha.toordinal(), id_sala, id_turno)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT CASE WHEN COALESCE(o.intervalos, 0) > 0 THEN 0 ELSE s.cupo - COALESCE(o.ocupados, 0) END
+                FROM salas s
+                LEFT JOIN ocupacion_turnos o
+                    ON o.fecha = ?1
+                    AND o.id_sala = s.id_sala
+                    AND o.id_turno = ?3
+                WHERE s.id_sala = ?2;
+            """, valores)
+
+            fila = cursor.fetchone()
+            return max(fila[0], 0) if fila is not None else 0
+
+    def obtener_fechas_libres(self, id_sala: int, id_turno: int, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        valores = (fecha_inicio.toordinal(), fecha_fin.toordinal(), id_sala, id_turno)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT cal.fecha
+                FROM calendario cal
+                JOIN salas s ON s.id_sala = ?3
+                LEFT JOIN ocupacion_turnos o
+                    ON o.fecha = cal.fecha
+                    AND o.id_sala = ?3
+                    AND o.id_turno = ?4
+                WHERE cal.reservable = 1
+                AND cal.fecha BETWEEN ?1 AND ?2
+                AND COALESCE(o.ocupados, 0) < s.cupo
+                AND COALESCE(o.intervalos, 0) = 0
+                ORDER BY cal.fecha;
+            """, valores)
+
+            return [dt.date.fromordinal(fila[0]) for fila in cursor.fetchall()]
+
+    @staticmethod
+    def __buscar_traslape(cursor: sqlite3.Cursor, dia: int, id_sala: int, inicio: int, fin: int) -> bool:
+        """Busca una reservación por horario o un turno con asistentes que se traslape con [inicio, fin).
+
+        Las reservaciones vigentes de una sala y día no se traslapan entre sí, así
+        que basta la última que empieza antes de `fin`: hay traslape si termina
+        después de `inicio`. Es una sola búsqueda en idx_reservaciones_horario, sin
+        importar cuántas reservaciones tenga la sala.
+        """
+
+        cursor.execute("""
+            SELECT fin
+            FROM reservaciones
+            WHERE id_sala = ?
+            AND fecha = ?
+            AND inicio < ?
+            AND cancelado IS NULL
+            ORDER BY inicio DESC
+            LIMIT 1;
+        """, (id_sala, dia, fin))
+
+        fila = cursor.fetchone()
+        if fila is not None and fila[0] > inicio:
+            return True
+
+        cursor.execute("""
+            SELECT 1
+            FROM ocupacion_turnos o
+            JOIN turnos t ON t.id_turno = o.id_turno
+            WHERE o.fecha = ?
+            AND o.id_sala = ?
+            AND o.ocupados > 0
+            AND t.inicio < ?
+            AND t.fin > ?
+            LIMIT 1;
+        """, (dia, id_sala, fin, inicio))
+
+        return cursor.fetchone() is not None
+
+    def insertar_reservacion_intervalo(self, id_cliente: int, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time,
+                                       nombre_evento: str) -> int:
+        minuto_inicio, minuto_fin = _minutos_intervalo(inicio, fin)
+        _validar_anticipacion(fecha)
+        dia = fecha.toordinal()
+
+        def insertar(cursor: sqlite3.Cursor) -> int:
+            self.__verificar_reservable(cursor, dia)
+
+            # Igual que con el cupo, buscar y registrar dentro de la misma
+            # transacción impide que dos terminales tomen el mismo horario.
+            if self.__buscar_traslape(cursor, dia, id_sala, minuto_inicio, minuto_fin):
+                raise HorarioOcupado("El horario se traslapa con otra reservación de la sala.")
+
+            # Ocupa la sala completa, así que sus asistentes son el cupo.
+            cursor.execute("""
+                INSERT INTO reservaciones (id_cliente, fecha, id_sala, nombre_evento, asistentes, inicio, fin, creado)
+                VALUES (?1, ?2, ?3, ?4, COALESCE((SELECT MAX(cupo, 1) FROM salas WHERE id_sala = ?3), 1), ?5, ?6,
+                        strftime('%Y-%m-%dT%H:%M:%fZ', 'now'));
+            """, (id_cliente, dia, id_sala, nombre_evento, minuto_inicio, minuto_fin))
+            folio = cursor.lastrowid
+
+            cursor.execute("""
+                INSERT INTO ocupacion_turnos (fecha, id_sala, id_turno, ocupados, intervalos)
+                SELECT ?1, ?2, id_turno, 0, 1
+                FROM turnos
+                WHERE inicio < ?4
+                AND fin > ?3
+                ON CONFLICT (fecha, id_sala, id_turno) DO UPDATE
+                SET intervalos = intervalos + 1;
+            """, (dia, id_sala, minuto_inicio, minuto_fin))
+
+            self.__registrar_evento(cursor, folio, "creada")
+            return folio
+
+        folio = self._escribir(insertar)
+        self.__invalidar_cache(fecha)
+        return folio
+
+    def cancelar_reservacion_intervalo(self, folio: int) -> bool:
+        return self.__cancelar(folio, solo_horario=True)
+
+    def existe_traslape(self, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time) -> bool:
+        minuto_inicio, minuto_fin = _minutos_intervalo(inicio, fin)
+
+        with self._conectar() as conn:
+            return self.__buscar_traslape(conn.cursor(), fecha.toordinal(), id_sala, minuto_inicio, minuto_fin)
+
+    def obtener_reservaciones_intervalo(self, fecha: dt.date, id_sala: int) -> list:
+        valores = (id_sala, fecha.toordinal())
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    r.folio,
+                    r.inicio,
+                    r.fin,
+                    r.id_cliente,
+                    c.nombre || ' ' || c.apellidos AS nombre_cliente,
+                    r.nombre_evento
+                FROM reservaciones r
+                JOIN clientes c ON c.id_cliente = r.id_cliente
+                WHERE r.id_sala = ?
+                AND r.fecha = ?
+                AND r.inicio IS NOT NULL
+                AND r.cancelado IS NULL
+                ORDER BY r.inicio;
+            """, valores)
+
+            return [(fila[0], _hora(fila[1]), _hora(fila[2])) + fila[3:] for fila in cursor.fetchall()]
+
+    def obtener_huecos(self, fecha: dt.date, id_sala: int, duracion_minima: int = MINUTOS_INTERVALO) -> list:
+        valores = (fecha.toordinal(), id_sala)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT 1
+                FROM calendario cal
+                JOIN salas s ON s.id_sala = ?2
+                WHERE cal.fecha = ?1
+                AND cal.reservable = 1;
+            """, valores)
+
+            if cursor.fetchone() is None:
+                return []
+
+            cursor.execute("""
+                SELECT inicio, fin
+                FROM reservaciones
+                WHERE id_sala = ?2
+                AND fecha = ?1
+                AND inicio IS NOT NULL
+                AND cancelado IS NULL
+                UNION ALL
+                SELECT t.inicio, t.fin
+                FROM ocupacion_turnos o
+                JOIN turnos t ON t.id_turno = o.id_turno
+                WHERE o.fecha = ?1
+                AND o.id_sala = ?2
+                AND o.ocupados > 0
+                ORDER BY 1;
+            """, valores)
+
+            return _calcular_huecos(cursor, duracion_minima)
+
+    def obtener_reservaciones_modificadas(self, desde_version: int) -> list:
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    r.folio,
+                    s.nombre,
+                    c.nombre || ' ' || c.apellidos AS nombre_cliente,
+                    r.nombre_evento,
+                    r.id_turno,
+                    r.fecha,
+                    r.cancelado IS NOT NULL,
+                    r.actualizado,
+                    r.version,
+                    r.inicio,
+                    r.fin
+                FROM reservaciones r
+                JOIN salas s ON s.id_sala = r.id_sala
+                JOIN clientes c ON c.id_cliente = r.id_cliente
+                WHERE r.version > ?
+                ORDER BY r.version;
+            """, (desde_version,))
+
+            return [
+                fila[:4] + (self.__turno(fila[4], *fila[9:]), dt.date.fromordinal(fila[5]), bool(fila[6])) + fila[7:9]
+                for fila in cursor.fetchall()
+            ]
+
+    def obtener_reservaciones_por_cliente(self, id_cliente: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                                          limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        dia, folio = (despues[0].toordinal(), despues[1]) if despues else (fecha_inicio.toordinal(), 0)
+        valores = (id_cliente, fecha_inicio.toordinal(), fecha_fin.toordinal(), incluir_canceladas, limite, dia, folio)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    r.folio,
+                    r.fecha,
+                    r.id_turno,
+                    r.id_sala,
+                    s.nombre,
+                    r.nombre_evento,
+                    r.cancelado IS NOT NULL,
+                    r.inicio,
+                    r.fin
+                FROM reservaciones r
+                JOIN salas s ON s.id_sala = r.id_sala
+                WHERE r.id_cliente = ?1
+                AND r.fecha BETWEEN ?2 AND ?3
+                AND (r.fecha, r.folio) > (?6, ?7)
+                AND (?4 OR r.cancelado IS NULL)
+                ORDER BY r.fecha, r.folio
+                LIMIT ?5;
+            """, valores)
+
+            filas = [
+                (fila[0], dt.date.fromordinal(fila[1]), self.__turno(fila[2], *fila[7:])) + fila[3:6] + (bool(fila[6]),)
+                for fila in cursor.fetchall()
+            ]
+
+            cursor.execute("""
+                SELECT
+                    COUNT(r.cancelado IS NULL OR NULL),
+                    COUNT(r.cancelado)
+                FROM reservaciones r
+                WHERE r.id_cliente = ?
+                AND r.fecha BETWEEN ? AND ?;
+            """, valores[:3])
+
+            return (filas,) + cursor.fetchone()
+
+    def obtener_agenda_sala(self, id_sala: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                            limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        dia, folio = (despues[0].toordinal(), despues[1]) if despues else (fecha_inicio.toordinal(), 0)
+        valores = (id_sala, fecha_inicio.toordinal(), fecha_fin.toordinal(), incluir_canceladas, limite, dia, folio)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    r.folio,
+                    r.fecha,
+                    r.id_turno,
+                    r.id_cliente,
+                    c.nombre || ' ' || c.apellidos AS nombre_cliente,
+                    r.nombre_evento,
+                    r.cancelado IS NOT NULL,
+                    r.inicio,
+                    r.fin
+                FROM reservaciones r
+                JOIN clientes c ON c.id_cliente = r.id_cliente
+                WHERE r.id_sala = ?1
+                AND r.fecha BETWEEN ?2 AND ?3
+                AND (r.fecha, r.folio) > (?6, ?7)
+                AND (?4 OR r.cancelado IS NULL)
+                ORDER BY r.fecha, r.folio
+                LIMIT ?5;
+            """, valores)
+
+            filas = [
+                (fila[0], dt.date.fromordinal(fila[1]), self.__turno(fila[2], *fila[7:])) + fila[3:6] + (bool(fila[6]),)
+                for fila in cursor.fetchall()
+            ]
+
+            cursor.execute("""
+                SELECT
+                    COUNT(r.cancelado IS NULL OR NULL),
+                    COUNT(r.cancelado)
+                FROM reservaciones r
+                WHERE r.id_sala = ?
+                AND r.fecha BETWEEN ? AND ?;
+            """, valores[:3])
+
+            return (filas,) + cursor.fetchone()
+
+    def obtener_clientes_frecuentes(self, fecha_inicio: dt.date, fecha_fin: dt.date, limite: int) -> list:
+        valores = (fecha_inicio.toordinal(), fecha_fin.toordinal(), limite)
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT
+                    r.id_cliente,
+                    c.nombre || ' ' || c.apellidos AS nombre_cliente,
+                    COUNT(*),
+                    COUNT(r.cancelado IS NULL OR NULL) AS vigentes,
+                    COUNT(r.cancelado),
+                    COUNT(r.cancelado IS NULL AND r.asistio = 0 OR NULL)
+                FROM reservaciones r
+                JOIN clientes c ON c.id_cliente = r.id_cliente
+                WHERE r.fecha BETWEEN ? AND ?
+                GROUP BY r.id_cliente
+                ORDER BY vigentes DESC, r.id_cliente
+                LIMIT ?;
+            """, valores)
+
+            return cursor.fetchall()
+
+    def agregar_fechas(self, fechas: list) -> None:
+        valores = [(fecha.toordinal(), fecha.weekday()) for fecha in fechas]
+
+        def insertar(cursor: sqlite3.Cursor) -> None:
+            cursor.executemany("""
+                INSERT OR IGNORE INTO calendario (fecha, dia_semana)
+                VALUES (?, ?);
+            """, valores)
+
+        self._escribir(insertar)
+        self.__invalidar_cache()
+
+    def marcar_fecha(self, fecha: dt.date, columna: str, activo: bool, descripcion: str) -> None:
+        valores = (fecha.toordinal(), fecha.weekday(), int(activo), descripcion)
+
+        def marcar(cursor: sqlite3.Cursor) -> None:
+            cursor.execute(f"""
+                INSERT INTO calendario (fecha, dia_semana, {columna}, descripcion)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (fecha) DO UPDATE
+                SET {columna} = excluded.{columna},
+                    descripcion = excluded.descripcion;
+            """, valores)
+
+        self._escribir(marcar)
+        self.__invalidar_cache(fecha)
+
+    def obtener_dia(self, fecha: dt.date) -> tuple:
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT dia_semana, festivo, cerrado, descripcion, reservable
+                FROM calendario
+                WHERE fecha = ?;
+            """, (fecha.toordinal(),))
+
+            return cursor.fetchone()
+
+    def obtener_fechas_reservables(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        valores = (fecha_inicio.toordinal(), fecha_fin.toordinal())
+
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT fecha
+                FROM calendario
+                WHERE reservable = 1
+                AND fecha BETWEEN ? AND ?
+                ORDER BY fecha;
+            """, valores)
+
+            return [dt.date.fromordinal(fila[0]) for fila in cursor.fetchall()]
+
+    def siguiente_fecha_reservable(self, fecha: dt.date) -> dt.date:
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT fecha
+                FROM calendario
+                WHERE reservable = 1
+                AND fecha >= ?
+                ORDER BY fecha
+                LIMIT 1;
+            """, (fecha.toordinal(),))
+
+            fila = cursor.fetchone()
+            return dt.date.fromordinal(fila[0]) if fila else None
+
+    def obtener_cambios(self, desde: int, limite: int) -> list:
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT secuencia, folio, tipo, datos, momento
+                FROM eventos_reservacion
+                WHERE secuencia > ?
+                ORDER BY secuencia
+                LIMIT ?;
+            """, (desde, limite))
+
+            return [(fila[0], fila[1], fila[2], json.loads(fila[3]), fila[4]) for fila in cursor.fetchall()]
+
+    def obtener_cursor(self, consumidor: str) -> int:
+        with self._conectar() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT secuencia
+                FROM cursores_eventos
+                WHERE consumidor = ?;
+            """, (consumidor,))
+
+            fila = cursor.fetchone()
+            return fila[0] if fila else None
+
+    def guardar_cursor(self, consumidor: str, secuencia: int) -> None:
+        def guardar(cursor: sqlite3.Cursor) -> None:
+            cursor.execute("""
+                INSERT INTO cursores_eventos (consumidor, secuencia)
+                VALUES (?, ?)
+                ON CONFLICT (consumidor) DO UPDATE
+                SET secuencia = excluded.secuencia;
+            """, (consumidor, secuencia))
+
+        self._escribir(guardar)
+
+
+class AlmacenamientoMemoria(Almacenamiento):
+    """Almacenamiento en diccionarios, para pruebas y demostraciones que no deben tocar disco.
+
+    Los datos viven solo en el proceso actual. Los índices cumplen el papel de
+    los de SQLite: las reservaciones vigentes por día (con los días en una
+    lista ordenada para resolver rangos con bisect), la suma de asistentes
+    vigentes por (día, sala, turno), el historial de cada cliente
+    y de cada sala ordenado por fecha y los días del calendario también
+    ordenados. Las reservaciones por horario de cada (día, sala) se guardan
+    ordenadas por inicio, como idx_reservaciones_horario, y un contador por
+    (día, sala, turno) hace el papel de `ocupacion_turnos.intervalos`.
+    Un candado reentrante serializa todas las operaciones.
+    """
+
+    TURNOS = {1: "Matutino", 2: "Vespertino", 3: "Nocturno"}
+
+    def __init__(self):
+        self.__candado = threading.RLock()
+        self.__clientes = {}
+        self.__salas = {}
+        self.__reservaciones = {}
+        self.__vigentes_por_dia = {}
+        self.__dias_con_reservaciones = []
+        self.__ocupados = {}
+        self.__horario_por_sala = {}
+        self.__turnos_cubiertos = {}
+        self.__por_cliente = {}
+        self.__por_sala = {}
+        self.__calendario = {}
+        self.__dias_calendario = []
+        self.__eventos = []
+        self.__cursores = {}
+
+    @staticmethod
+    def __momento() -> str:
+        """Hora UTC actual en el mismo formato que strftime('%Y-%m-%dT%H:%M:%fZ') de SQLite."""
+
+        return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    def __es_reservable(self, dia: int) -> bool:
+        """Aplica las reglas de la columna calculada `reservable` del calendario."""
+
+        marcas = self.__calendario.get(dia)
+        return marcas is not None and marcas[0] != 6 and not marcas[1] and not marcas[2]
+
+    def __verificar_reservable(self, dia: int) -> None:
+        """Rechaza las fechas no reservables, como la consulta al calendario en SQLite."""
+
+        if not self.__es_reservable(dia):
+            raise FechaNoReservable("La fecha no admite reservaciones: es domingo, festivo, día de cierre o está fuera del calendario.")
+
+    def __libres(self, dia: int, id_sala: int, id_turno: int) -> int:
+        """Lugares que quedan en un turno, como `cupo - ocupacion_turnos.ocupados` en SQL."""
+
+        if self.__turnos_cubiertos.get((dia, id_sala, id_turno)):
+            return 0
+        return self.__salas[id_sala][1] - self.__ocupados.get((dia, id_sala, id_turno), 0)
+
+    @staticmethod
+    def __turnos_del_horario(inicio: int, fin: int) -> list:
+        """Turnos cuya ventana de HORARIO_TURNOS se traslapa con [inicio, fin)."""
+
+        return [id_turno for id_turno, (desde, hasta) in HORARIO_TURNOS.items() if desde < fin and hasta > inicio]
+
+    def __buscar_traslape(self, dia: int, id_sala: int, inicio: int, fin: int) -> bool:
+        """Busca con bisect, como idx_reservaciones_horario en SQL, la última reservación que empieza antes de `fin`."""
+
+        horario = self.__horario_por_sala.get((dia, id_sala), [])
+        anterior = bisect.bisect_left(horario, (fin,))
+        if anterior and horario[anterior - 1][1] > inicio:
+            return True
+
+        return any(self.__ocupados.get((dia, id_sala, id_turno)) for id_turno in self.__turnos_del_horario(inicio, fin))
+
+    def __nombre_cliente(self, id_cliente: int) -> str:
+        """Nombre completo de un cliente, como `c.nombre || ' ' || c.apellidos` en SQL."""
+
+        nombre, apellidos = self.__clientes[id_cliente]
+        return f"{nombre} {apellidos}"
+
+    def __turno(self, reservacion: dict) -> str:
+        """Nombre del turno de una reservación, o su horario si es por horario."""
+
+        if reservacion["id_turno"] is not None:
+            return self.TURNOS[reservacion["id_turno"]]
+        return _etiqueta_horario(reservacion["inicio"], reservacion["fin"])
+
+    def __registrar_evento(self, folio: int, tipo: str) -> None:
+        """Agrega el estado actual de una reservación al registro de cambios y actualiza su versión."""
+
+        reservacion = self.__reservaciones[folio]
+        datos = {
+            "id_cliente": reservacion["id_cliente"],
+            "fecha": dt.date.fromordinal(reservacion["fecha"]).isoformat(),
+            "turno": self.__turno(reservacion),
+            "id_sala": reservacion["id_sala"],
+            "nombre_evento": reservacion["nombre_evento"],
+            "asistentes": reservacion["asistentes"],
+        }
+        if reservacion["inicio"] is not None:
+            datos["inicio"], datos["fin"] = f"{_hora(reservacion['inicio']):%H:%M}", f"{_hora(reservacion['fin']):%H:%M}"
+
+        secuencia = len(self.__eventos) + 1
+        momento = self.__momento()
+        self.__eventos.append((secuencia, folio, tipo, json.dumps(datos, ensure_ascii=False), momento))
+        reservacion["version"] = secuencia
+        reservacion["actualizado"] = momento
+
+    def insertar_cliente(self, nombre: str, apellidos: str) -> int:
+        with self.__candado:
+            id_cliente = len(self.__clientes) + 1
+            self.__clientes[id_cliente] = (nombre, apellidos)
+            return id_cliente
+
+    def obtener_clientes(self) -> list:
+        with self.__candado:
+            clientes = [(id_cliente,) + datos for id_cliente, datos in self.__clientes.items()]
+        return sorted(clientes, key=lambda cliente: (cliente[2], cliente[0]))
+
+    def existe_cliente(self, id_cliente: int) -> bool:
+        return id_cliente in self.__clientes
+
+    def insertar_sala(self, nombre: str, cupo: int) -> int:
+        with self.__candado:
+            id_sala = len(self.__salas) + 1
+            self.__salas[id_sala] = (nombre, cupo)
+            return id_sala
+
+    def existe_sala(self, id_sala: int) -> bool:
+        return id_sala in self.__salas
+
+    def nombre_turno(self, id_turno: int) -> str:
+        return self.TURNOS.get(id_turno, "")
+
+    def obtener_salas_disponibles(self, fecha: dt.date) -> list:
+        dia = fecha.toordinal()
+
+        with self.__candado:
+            if not self.__es_reservable(dia):
+                return []
+
+            resultados = []
+            for id_sala, (nombre, cupo) in self.__salas.items():
+                libres = [(turno, self.__libres(dia, id_sala, id_turno)) for id_turno, turno in self.TURNOS.items()]
+                libres = [f"{turno} ({lugares})" for turno, lugares in libres if lugares > 0]
+                if libres:
+                    resultados.append((id_sala, nombre, cupo, ", ".join(libres)))
+
+            return resultados
+
+    def obtener_siguiente_turno_libre(self, id_sala: int, fecha_desde: dt.date) -> tuple:
+        with self.__candado:
+            if id_sala not in self.__salas:
+                return None
+
+            inicio = bisect.bisect_left(self.__dias_calendario, fecha_desde.toordinal())
+
+            for dia in itertools.islice(self.__dias_calendario, inicio, None):
+                if not self.__es_reservable(dia):
+                    continue
+                for id_turno, turno in self.TURNOS.items():
+                    if self.__libres(dia, id_sala, id_turno) > 0:
+                        return dt.date.fromordinal(dia), turno
+
+            return None
+
+    def insertar_reservacion(self, id_cliente: int, fecha: dt.date, id_turno: int, id_sala: int, nombre_evento: str,
+                             asistentes: int = None) -> int:
+        if asistentes is not None and asistentes < 1:
+            raise ValueError("El número de asistentes debe ser mayor a cero.")
+
+        _validar_anticipacion(fecha)
+
+        with self.__candado:
+            dia = fecha.toordinal()
+            self.__verificar_reservable(dia)
+            if id_cliente not in self.__clientes or id_sala not in self.__salas or id_turno not in self.TURNOS:
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+
+            if self.__turnos_cubiertos.get((dia, id_sala, id_turno)):
+                raise HorarioOcupado("El turno se traslapa con una reservación por horario de la sala.")
+
+            lugares = self.__salas[id_sala][1] if asistentes is None else asistentes
+            libres = self.__libres(dia, id_sala, id_turno)
+            if lugares > libres:
+                raise CupoInsuficiente(f"Solo quedan {max(libres, 0)} lugares en ese turno.")
+
+            folio = self.__agregar_reservacion(id_cliente, dia, id_turno, id_sala, nombre_evento, lugares, None, None)
+            turno = (dia, id_sala, id_turno)
+            self.__ocupados[turno] = self.__ocupados.get(turno, 0) + lugares
+
+            self.__registrar_evento(folio, "creada")
+            return folio
+
+    def __agregar_reservacion(self, id_cliente: int, dia: int, id_turno: int, id_sala: int, nombre_evento: str,
+                              asistentes: int, inicio: int, fin: int) -> int:
+        """Guarda una reservación vigente en los índices por día, cliente y sala y devuelve su folio."""
+
+        folio = len(self.__reservaciones) + 1
+        self.__reservaciones[folio] = {
+            "id_cliente": id_cliente,
+            "fecha": dia,
+            "id_turno": id_turno,
+            "id_sala": id_sala,
+            "nombre_evento": nombre_evento,
+            "asistentes": asistentes,
+            "inicio": inicio,
+            "fin": fin,
+            "cancelado": False,
+            "asistio": None,
+            "creado": self.__momento(),
+        }
+
+        if dia not in self.__vigentes_por_dia:
+            self.__vigentes_por_dia[dia] = {}
+            bisect.insort(self.__dias_con_reservaciones, dia)
+        self.__vigentes_por_dia[dia][folio] = None
+
+        bisect.insort(self.__por_cliente.setdefault(id_cliente, []), (dia, folio))
+        bisect.insort(self.__por_sala.setdefault(id_sala, []), (dia, folio))
+        return folio
+
+    def renombrar_reservacion(self, folio: int, nombre_evento: str) -> None:
+        with self.__candado:
+            if folio not in self.__reservaciones:
+                return
+
+            self.__reservaciones[folio]["nombre_evento"] = nombre_evento
+            self.__registrar_evento(folio, "renombrada")
+
+    def cancelar_reservacion(self, folio: int) -> bool:
+        return self.__cancelar(folio, solo_horario=False)
+
+    def __cancelar(self, folio: int, solo_horario: bool) -> bool:
+        """Cancela una reservación y descuenta su ocupación, sea de un turno o de los turnos que cubre su horario."""
+
+        with self.__candado:
+            reservacion = self.__reservaciones.get(folio)
+            if reservacion is None or reservacion["cancelado"] or (solo_horario and reservacion["inicio"] is None):
+                return False
+
+            reservacion["cancelado"] = True
+            dia, id_sala = reservacion["fecha"], reservacion["id_sala"]
+            del self.__vigentes_por_dia[dia][folio]
+
+            if reservacion["id_turno"] is not None:
+                self.__ocupados[(dia, id_sala, reservacion["id_turno"])] -= reservacion["asistentes"]
+            else:
+                self.__horario_por_sala[(dia, id_sala)].remove((reservacion["inicio"], reservacion["fin"], folio))
+                for id_turno in self.__turnos_del_horario(reservacion["inicio"], reservacion["fin"]):
+                    self.__turnos_cubiertos[(dia, id_sala, id_turno)] -= 1
+
+            self.__registrar_evento(folio, "cancelada")
+            return True
+
+    def registrar_asistencia(self, folio: int, asistio: bool) -> None:
+        with self.__candado:
+            reservacion = self.__reservaciones.get(folio)
+            if reservacion is None or reservacion["cancelado"]:
+                raise ValueError("La reservación no existe o está cancelada.")
+
+            reservacion["asistio"] = bool(asistio)
+
+    def iterar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date):
+        # Igual que en SQLite, se copia un día a la vez y el candado se suelta
+        # antes de entregar sus filas.
+        dia, fin = fecha_inicio.toordinal(), fecha_fin.toordinal()
+
+        while True:
+            with self.__candado:
+                posicion = bisect.bisect_left(self.__dias_con_reservaciones, dia)
+                if posicion == len(self.__dias_con_reservaciones) or self.__dias_con_reservaciones[posicion] > fin:
+                    return
+
+                dia = self.__dias_con_reservaciones[posicion]
+                fecha = dt.date.fromordinal(dia)
+                filas = []
+                for folio in self.__vigentes_por_dia[dia]:
+                    reservacion = self.__reservaciones[folio]
+                    filas.append((fecha, folio, reservacion["id_sala"], self.__salas[reservacion["id_sala"]][0],
+                                  self.__nombre_cliente(reservacion["id_cliente"]), reservacion["nombre_evento"],
+                                  self.__turno(reservacion)))
+
+            yield from filas
+            dia += 1
+
+    def existe_reservacion(self, fecha: dt.date, id_sala: int, id_turno: int) -> bool:
+        turno = (fecha.toordinal(), id_sala, id_turno)
+        return bool(self.__ocupados.get(turno) or self.__turnos_cubiertos.get(turno))
+
+    def obtener_lugares_libres(self, fecha: dt.date, id_sala: int, id_turno: int) -> int:
+        with self.__candado:
+            if id_sala not in self.__salas:
+                return 0
+            return max(self.__libres(fecha.toordinal(), id_sala, id_turno), 0)
+
+    def obtener_fechas_libres(self, id_sala: int, id_turno: int, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        with self.__candado:
+            inicio = bisect.bisect_left(self.__dias_calendario, fecha_inicio.toordinal())
+            fin = bisect.bisect_right(self.__dias_calendario, fecha_fin.toordinal())
+
+            if id_sala not in self.__salas:
+                return []
+
+            return [
+                dt.date.fromordinal(dia)
+                for dia in self.__dias_calendario[inicio:fin]
+                if self.__es_reservable(dia) and self.__libres(dia, id_sala, id_turno) > 0
+            ]
+
+    def insertar_reservacion_intervalo(self, id_cliente: int, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time,
+                                       nombre_evento: str) -> int:
+        minuto_inicio, minuto_fin = _minutos_intervalo(inicio, fin)
+        _validar_anticipacion(fecha)
+        dia = fecha.toordinal()
+
+        with self.__candado:
+            self.__verificar_reservable(dia)
+            if self.__buscar_traslape(dia, id_sala, minuto_inicio, minuto_fin):
+                raise HorarioOcupado("El horario se traslapa con otra reservación de la sala.")
+            if id_cliente not in self.__clientes or id_sala not in self.__salas:
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+
+            folio = self.__agregar_reservacion(id_cliente, dia, None, id_sala, nombre_evento, max(self.__salas[id_sala][1], 1),
+                                               minuto_inicio, minuto_fin)
+            bisect.insort(self.__horario_por_sala.setdefault((dia, id_sala), []), (minuto_inicio, minuto_fin, folio))
+            for id_turno in self.__turnos_del_horario(minuto_inicio, minuto_fin):
+                turno = (dia, id_sala, id_turno)
+                self.__turnos_cubiertos[turno] = self.__turnos_cubiertos.get(turno, 0) + 1
+
+            self.__registrar_evento(folio, "creada")
+            return folio
+
+    def cancelar_reservacion_intervalo(self, folio: int) -> bool:
+        return self.__cancelar(folio, solo_horario=True)
+
+    def existe_traslape(self, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time) -> bool:
+        minuto_inicio, minuto_fin = _minutos_intervalo(inicio, fin)
+
+        with self.__candado:
+            return self.__buscar_traslape(fecha.toordinal(), id_sala, minuto_inicio, minuto_fin)
+
+    def obtener_reservaciones_intervalo(self, fecha: dt.date, id_sala: int) -> list:
+        with self.__candado:
+            filas = []
+            for inicio, fin, folio in self.__horario_por_sala.get((fecha.toordinal(), id_sala), []):
+                reservacion = self.__reservaciones[folio]
+                filas.append((folio, _hora(inicio), _hora(fin), reservacion["id_cliente"],
+                              self.__nombre_cliente(reservacion["id_cliente"]), reservacion["nombre_evento"]))
+            return filas
+
+    def obtener_huecos(self, fecha: dt.date, id_sala: int, duracion_minima: int = MINUTOS_INTERVALO) -> list:
+        dia = fecha.toordinal()
+
+        with self.__candado:
+            if not self.__es_reservable(dia) or id_sala not in self.__salas:
+                return []
+
+            ocupados = [(inicio, fin) for inicio, fin, _ in self.__horario_por_sala.get((dia, id_sala), [])]
+            ocupados += [HORARIO_TURNOS[id_turno] for id_turno in self.TURNOS if self.__ocupados.get((dia, id_sala, id_turno))]
+            return _calcular_huecos(sorted(ocupados), duracion_minima)
+
+    def obtener_reservaciones_modificadas(self, desde_version: int) -> list:
+        with self.__candado:
+            resultados = []
+
+            # La versión de una reservación es la secuencia de su último evento,
+            # así que basta recorrer los eventos posteriores y quedarse con los
+            # que siguen siendo el último de su reservación.
+            for secuencia, folio, _, _, _ in self.__eventos[max(desde_version, 0):]:
+                reservacion = self.__reservaciones[folio]
+                if reservacion["version"] != secuencia:
+                    continue
+
+                resultados.append((folio, self.__salas[reservacion["id_sala"]][0], self.__nombre_cliente(reservacion["id_cliente"]),
+                                   reservacion["nombre_evento"], self.__turno(reservacion),
+                                   dt.date.fromordinal(reservacion["fecha"]), reservacion["cancelado"],
+                                   reservacion["actualizado"], secuencia))
+
+            return resultados
+
+    def __paginar_historial(self, historial: list, fecha_inicio: dt.date, fecha_fin: dt.date,
+                            limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        """Cuenta y pagina un historial ordenado de tuplas (dia, folio) dentro de un rango.
+
+        Returns:
+            tuple: (reservaciones de la página, vigentes, canceladas).
+        """
+
+        inicio = bisect.bisect_left(historial, (fecha_inicio.toordinal(),))
+        fin = bisect.bisect_left(historial, (fecha_fin.toordinal() + 1,))
+        # Como la consulta de SQLite, la página empieza después de (fecha, folio).
+        desde = max(inicio, bisect.bisect_right(historial, (despues[0].toordinal(), despues[1]))) if despues else inicio
+
+        pagina, vigentes, canceladas = [], 0, 0
+        for posicion in range(inicio, fin):
+            folio = historial[posicion][1]
+            reservacion = self.__reservaciones[folio]
+            if reservacion["cancelado"]:
+                canceladas += 1
+                if not incluir_canceladas:
+                    continue
+            else:
+                vigentes += 1
+
+            if posicion >= desde and len(pagina) < limite:
+                pagina.append((folio, reservacion))
+
+        return pagina, vigentes, canceladas
+
+    def obtener_reservaciones_por_cliente(self, id_cliente: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                                          limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        with self.__candado:
+            pagina, vigentes, canceladas = self.__paginar_historial(self.__por_cliente.get(id_cliente, []), fecha_inicio,
+                                                                    fecha_fin, limite, despues, incluir_canceladas)
+            filas = [
+                (folio, dt.date.fromordinal(reservacion["fecha"]), self.__turno(reservacion), reservacion["id_sala"],
+                 self.__salas[reservacion["id_sala"]][0], reservacion["nombre_evento"], reservacion["cancelado"])
+                for folio, reservacion in pagina
+            ]
+
+            return filas, vigentes, canceladas
+
+    def obtener_agenda_sala(self, id_sala: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                            limite: int, despues: tuple, incluir_canceladas: bool) -> tuple:
+        with self.__candado:
+            pagina, vigentes, canceladas = self.__paginar_historial(self.__por_sala.get(id_sala, []), fecha_inicio,
+                                                                    fecha_fin, limite, despues, incluir_canceladas)
+            filas = [
+                (folio, dt.date.fromordinal(reservacion["fecha"]), self.__turno(reservacion), reservacion["id_cliente"],
+                 self.__nombre_cliente(reservacion["id_cliente"]), reservacion["nombre_evento"], reservacion["cancelado"])
+                for folio, reservacion in pagina
+            ]
+
+            return filas, vigentes, canceladas
+
+    def obtener_clientes_frecuentes(self, fecha_inicio: dt.date, fecha_fin: dt.date, limite: int) -> list:
+        with self.__candado:
+            resultados = []
+            for id_cliente, historial in self.__por_cliente.items():
+                pagina, vigentes, canceladas = self.__paginar_historial(historial, fecha_inicio, fecha_fin, len(historial), None, True)
+                if vigentes or canceladas:
+                    inasistencias = sum(1 for _, reservacion in pagina
+                                        if not reservacion["cancelado"] and reservacion["asistio"] is False)
+                    resultados.append((id_cliente, self.__nombre_cliente(id_cliente), vigentes + canceladas, vigentes, canceladas,
+                                       inasistencias))
+
+        resultados.sort(key=lambda fila: (-fila[3], fila[0]))
+        return resultados[:limite]
+
+    def __agregar_dia(self, dia: int, dia_semana: int) -> list:
+        """Agrega un día al calendario si falta y devuelve sus marcas [dia_semana, festivo, cerrado, descripcion]."""
+
+        marcas = self.__calendario.get(dia)
+        if marcas is None:
+            marcas = self.__calendario[dia] = [dia_semana, 0, 0, None]
+            bisect.insort(self.__dias_calendario, dia)
+        return marcas
+
+    def agregar_fechas(self, fechas: list) -> None:
+        with self.__candado:
+            for fecha in fechas:
+                self.__agregar_dia(fecha.toordinal(), fecha.weekday())
+
+    def marcar_fecha(self, fecha: dt.date, columna: str, activo: bool, descripcion: str) -> None:
+        with self.__candado:
+            marcas = self.__agregar_dia(fecha.toordinal(), fecha.weekday())
+            marcas[1 if columna == "festivo" else 2] = int(activo)
+            marcas[3] = descripcion
+
+    def obtener_dia(self, fecha: dt.date) -> tuple:
+        dia = fecha.toordinal()
+
+        with self.__candado:
+            marcas = self.__calendario.get(dia)
+            if marcas is None:
+                return None
+            return tuple(marcas) + (int(self.__es_reservable(dia)),)
+
+    def obtener_fechas_reservables(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+        with self.__candado:
+            inicio = bisect.bisect_left(self.__dias_calendario, fecha_inicio.toordinal())
+            fin = bisect.bisect_right(self.__dias_calendario, fecha_fin.toordinal())
+
+            return [dt.date.fromordinal(dia) for dia in self.__dias_calendario[inicio:fin] if self.__es_reservable(dia)]
+
+    def siguiente_fecha_reservable(self, fecha: dt.date) -> dt.date:
+        with self.__candado:
+            inicio = bisect.bisect_left(self.__dias_calendario, fecha.toordinal())
+
+            for dia in itertools.islice(self.__dias_calendario, inicio, None):
+                if self.__es_reservable(dia):
+                    return dt.date.fromordinal(dia)
+
+            return None
+
+    def obtener_cambios(self, desde: int, limite: int) -> list:
+        inicio = max(desde, 0)
+
+        with self.__candado:
+            eventos = self.__eventos[inicio:inicio + limite]
+
+        return [(secuencia, folio, tipo, json.loads(datos), momento) for secuencia, folio, tipo, datos, momento in eventos]
+
+    def obtener_cursor(self, consumidor: str) -> int:
+        return self.__cursores.get(consumidor)
+
+    def guardar_cursor(self, consumidor: str, secuencia: int) -> None:
+        with self.__candado:
+            self.__cursores[consumidor] = secuencia
+
+
+class ManejadorBaseDatos:
+    """Base común de los manejadores: el almacenamiento en el que leen y escriben.
+
+    Los métodos públicos de las subclases se miden automáticamente cuando el
+    manejador recibe un objeto Metricas.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for nombre, atributo in list(vars(cls).items()):
+            if callable(atributo) and not nombre.startswith("_"):
+                setattr(cls, nombre, _medido(atributo))
+
+    def __init__(self, almacenamiento: Almacenamiento, metricas: Metricas = None):
+        """
+        Args:
+            almacenamiento (Almacenamiento): Almacenamiento compartido por los manejadores.
+            metricas (Metricas): Métricas de las operaciones. (opcional)
+        """
+
+        self.almacenamiento = almacenamiento
+        self.metricas = metricas
+
+    def _reportar_error(self, error: Exception) -> None:
+        """Muestra al usuario el error de una operación y lo cuenta en las métricas.
+
+        Args:
+            error (Exception): Error atrapado por la operación.
+        """
+
+        if self.metricas is not None:
+            self.metricas.registrar_error(type(error).__name__)
+
+        if isinstance(error, (Error, ValueError)):
+            print(error)
+        else:
+            print(f"Ocurrió un error: {type(error)}")
+
+
+def _campos_exportacion(reservaciones: dict) -> list:
+    """Obtiene los campos a exportar, en el orden de ENCABEZADOS_EXPORTACION.
+
+    Args:
+        reservaciones (dict): Diccionario con los valores de las reservaciones.
+
+    Returns:
+        list: Campos presentes en las reservaciones, sin el folio.
+    """
+
+    primera = next(iter(reservaciones.values()), {})
+    return [campo for campo in ENCABEZADOS_EXPORTACION if campo in primera]
+
+
+def _exportar_json(reservaciones: dict, fecha: str, directorio: str = "") -> str:
+    """Exporta las reservaciones a formato JSON.
+
+    Args:
+        reservaciones (dict): Diccionario con los valores de las reservaciones.
+        fecha (str): Fecha de consulta.
+        directorio (str): Carpeta donde se guarda el archivo. (opcional)
+
+    Returns:
+        str: Ruta del archivo generado.
+    """
+
+    ruta = os.path.join(directorio, f"reservaciones_{fecha}.json")
+
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(reservaciones, archivo, indent=2, ensure_ascii=False)
+    print(f"Reservaciones exportadas correctamente a '{ruta}'")
+    return ruta
+
+
+def _exportar_csv(reservaciones: dict, fecha: str, directorio: str = "") -> str:
+    """Exporta las reservaciones a formato CSV.
+
+    Args:
+        reservaciones (dict): Diccionario con los valores de las reservaciones.
+        fecha (str): Fecha de consulta.
+        directorio (str): Carpeta donde se guarda el archivo. (opcional)
+
+    Returns:
+        str: Ruta del archivo generado.
+    """
+
+    ruta = os.path.join(directorio, f"reservaciones_{fecha}.csv")
+    campos = _campos_exportacion(reservaciones)
+
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        manejar_csv = csv.writer(archivo)
+        manejar_csv.writerow(["Folio"] + [ENCABEZADOS_EXPORTACION[campo] for campo in campos])
+
+        for folio, datos in reservaciones.items():
+            manejar_csv.writerow([folio] + [datos[campo] for campo in campos])
+
+    print(f"Reservaciones exportadas correctamente a '{ruta}'")
+    return ruta
+
+
+def _exportar_excel(reservaciones: dict, fecha: str, directorio: str = "") -> str:
+    """Exporta las reservaciones a formato XLSX (Excel)
+
+    Args:
+        reservaciones (dict): Diccionario con los valores de las reservaciones.
+        fecha (str): Fecha de consulta.
+        directorio (str): Carpeta donde se guarda el archivo. (opcional)
+
+    Returns:
+        str: Ruta del archivo generado.
+    """
+
+    ruta = os.path.join(directorio, f"reservaciones_{fecha}.xlsx")
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.title = f"Reservaciones_{fecha}"
+
+    negrita = Font(bold=True)
+    centrado = Alignment(horizontal="center", vertical="center")
+    borde_grueso = Border(bottom=Side(border_style="thick"))
+
+    campos = _campos_exportacion(reservaciones)
+    encabezados = ["Folio"] + [ENCABEZADOS_EXPORTACION[campo] for campo in campos]
+
+    with PerfilMemoria.etapa("llenar celdas"):
+        for columna, titulo in enumerate(encabezados, start=1):
+            celda = hoja.cell(row=1, column=columna, value=titulo)
+            celda.font = negrita
+            celda.alignment = centrado
+            celda.border = borde_grueso
+
+        for renglon, (folio, datos) in enumerate(reservaciones.items(), start=2):
+            hoja.cell(row=renglon, column=1, value=folio).alignment = centrado
+            for columna, campo in enumerate(campos, start=2):
+                hoja.cell(row=renglon, column=columna, value=datos[campo]).alignment = centrado
+
+    with PerfilMemoria.etapa("ajustar columnas"):
+        for column in hoja.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                if cell.value:
+                    max_length = max(max_length, len(str(cell.value)))
+            hoja.column_dimensions[column_letter].width = max_length + 2  # +2 = pequeño margen
+
+    with PerfilMemoria.etapa("guardar libro"):
+        libro.save(ruta)
+    print(f"Reservaciones exportadas correctamente a '{ruta}'")
+    return ruta
+
+
+EXPORTADORES = {"JSON": _exportar_json, "CSV": _exportar_csv, "EXCEL": _exportar_excel}
+
+
+def _reservaciones_por_folio(lista_reservaciones: list, fecha_str: str) -> dict:
+    """Convierte las reservaciones de un día al diccionario que reciben los exportadores.
+
+    Args:
+        lista_reservaciones (list): Tuplas (folio, nombre_sala, nombre_cliente, nombre_evento, turno).
+        fecha_str (str): Fecha con formato mm-dd-yyyy.
+
+    Returns:
+        dict: Diccionario indexado por folio.
+    """
+
+    return {
+        folio[0]: {
+            "nombre_sala": folio[1],
+            "nombre_cliente": folio[2],
+            "nombre_evento": folio[3],
+            "turno": folio[4],
+            "fecha": fecha_str
+            }
+        for folio in lista_reservaciones
+    }
+
+
+def _exportar_archivo(formato: str, lista_reservaciones: list, fecha: dt.date, directorio: str) -> str:
+    """Genera el archivo de un día en un proceso trabajador de la exportación por lote.
+
+    Args:
+        formato (str): JSON, CSV o EXCEL.
+        lista_reservaciones (list): Reservaciones del día.
+        fecha (dt.date): Fecha de las reservaciones.
+        directorio (str): Carpeta donde se guarda el archivo.
+
+    Returns:
+        str: Ruta del archivo generado.
+    """
+
+    fecha_str = fecha.strftime('%m-%d-%Y')
+
+    with PerfilMemoria.etapa("armar diccionario"):
+        reservaciones = _reservaciones_por_folio(lista_reservaciones, fecha_str)
+
+    with contextlib.redirect_stdout(io.StringIO()), PerfilMemoria.etapa(f"escribir {formato}"):
+        return EXPORTADORES[formato](reservaciones, fecha_str, directorio)
+
+
+class TablaContinua:
+    """Imprime filas en formato de cuadrícula (como tabulate 'grid') a medida que llegan.
+
+    Los anchos de columna salen de los anchos indicados o de una muestra
+    acotada de las primeras filas, así que la primera fila se imprime sin
+    esperar al resto y la memoria no crece con el número de filas. Los
+    valores que no caben en su columna se recortan.
+    """
+
+    RELLENO_ENCABEZADO = 2
+
+    def __init__(self, encabezados: list, anchos: list = None, muestra: int = 50, ancho_maximo: int = 40, salida=None):
+        """
+        Args:
+            encabezados (list): Títulos de las columnas.
+            anchos (list): Ancho fijo por columna; None en una posición para calcularlo de la muestra. (opcional)
+            muestra (int): Filas que se leen por adelantado para calcular anchos y alineación.
+            ancho_maximo (int): Ancho máximo de una columna calculada a partir de la muestra.
+            salida: Archivo donde se imprime; por omisión sys.stdout. (opcional)
+        """
+
+        self.encabezados = [str(encabezado) for encabezado in encabezados]
+        self.anchos = list(anchos) if anchos is not None else [None] * len(encabezados)
+        self.muestra = muestra
+        self.ancho_maximo = ancho_maximo
+        self.salida = salida
+
+    @staticmethod
+    def __es_numero(valor) -> bool:
+        """Indica si un valor se alinea a la derecha como número."""
+
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return True
+
+        try:
+            float(valor)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def __texto(valor) -> str:
+        """Convierte un valor a una sola línea de texto."""
+
+        return "" if valor is None else str(valor).replace("\n", " ")
+
+    def imprimir(self, filas) -> int:
+        """Imprime la tabla completa consumiendo las filas una por una.
+
+        Args:
+            filas (Iterable): Filas (secuencias) a imprimir; puede ser un cursor.
+
+        Returns:
+            int: Número de filas impresas. Si es 0 no se imprime nada.
+        """
+
+        filas = iter(filas)
+        primeras = list(itertools.islice(filas, self.muestra))
+        if not primeras:
+            return 0
+
+        salida = self.salida if self.salida is not None else sys.stdout
+        numericas = [all(self.__es_numero(fila[i]) for fila in primeras if fila[i] not in (None, "")) for i in range(len(self.encabezados))]
+
+        anchos = []
+        for i, encabezado in enumerate(self.encabezados):
+            if self.anchos[i] is not None:
+                anchos.append(max(self.anchos[i], len(encabezado)))
+            else:
+                ancho_muestra = max(len(self.__texto(fila[i])) for fila in primeras)
+                anchos.append(max(len(encabezado) + self.RELLENO_ENCABEZADO, min(ancho_muestra, self.ancho_maximo)))
+
+        def renglon(valores: list) -> str:
+            celdas = []
+            for valor, ancho, numerica in zip(valores, anchos, numericas):
+                texto = self.__texto(valor)
+                if len(texto) > ancho:
+                    texto = texto[:ancho - 1] + "…"
+                celdas.append(" " + (texto.rjust(ancho) if numerica else texto.ljust(ancho)) + " ")
+            return "|" + "|".join(celdas) + "|"
+
+        separador = "+" + "+".join("-" * (ancho + 2) for ancho in anchos) + "+"
+        separador_encabezado = "+" + "+".join("=" * (ancho + 2) for ancho in anchos) + "+"
+
+        print(separador, file=salida)
+        print(renglon(self.encabezados), file=salida)
+        print(separador_encabezado, file=salida)
+
+        total = 0
+        for fila in itertools.chain(primeras, filas):
+            print(renglon(fila), file=salida)
+            print(separador, file=salida)
+            total += 1
+
+        return total
+
+
 class Coworking:
     """Clase principal del coworking."""
 
-    def __init__(self):
-        if not os.path.exists("coworking.db"):
-            print("Aviso: No se encontró la base de datos, por lo que se iniciará con un estado vacío.")
-            self.__inicializar_base_datos()
+    def __init__(self, ruta_bd: str = RUTA_BD, agrupar_escrituras: bool = False, max_operaciones_lote: int = 64,
+                 intervalo_lote_ms: float = 5, durabilidad: str = "FULL", horizonte_calendario: int = HORIZONTE_CALENDARIO,
+                 tiempo_espera_bd: float = 5.0, max_reintentos: int = 5, modo_wal: bool = False,
+                 almacenamiento: Almacenamiento = None, metricas: Metricas = None, tamano_cache: int = 256):
+        """
+        Args:
+            ruta_bd (str): Ruta de la base de datos.
+            agrupar_escrituras (bool): Si es True, las escrituras se confirman en lotes.
+            max_operaciones_lote (int): Máximo de escrituras por lote.
+            intervalo_lote_ms (float): Espera máxima para completar un lote.
+            durabilidad (str): Valor de PRAGMA synchronous del escritor agrupado.
+            horizonte_calendario (int): Días a partir de hoy que cubre el calendario de reservaciones.
+            tiempo_espera_bd (float): Segundos que se espera a que otra terminal libere la base de datos.
+            max_reintentos (int): Reintentos de una escritura tras un error de bloqueo.
+            modo_wal (bool): Si es True, activa el journal WAL para que las lecturas no bloqueen
+            a las escrituras. No usar si la base de datos está en una carpeta de red.
+            almacenamiento (Almacenamiento): Almacenamiento a usar en lugar de la base de datos
+            SQLite, p. ej. AlmacenamientoMemoria(); las opciones anteriores se ignoran. (opcional)
+            metricas (Metricas): Si se indica, se miden las operaciones de los manejadores y las exportaciones. (opcional)
+            tamano_cache (int): Fechas consultadas que se guardan en caché; 0 la desactiva.
+        """
+
+        if almacenamiento is None:
+            almacenamiento = AlmacenamientoSQLite(ruta_bd, agrupar_escrituras, max_operaciones_lote, intervalo_lote_ms,
+                                                  durabilidad, tiempo_espera_bd, max_reintentos, modo_wal, tamano_cache)
+
+        if metricas is not None and getattr(almacenamiento, "cache", None) is not None:
+            cache = almacenamiento.cache
+            metricas.agregar_contadores("cache_fechas_total", "Aciertos, fallos e invalidaciones de la caché por fecha.",
+                                        lambda: {contador: valor for contador, valor in cache.estadisticas().items()
+                                                 if contador != "entradas"})
+
+        self.almacenamiento = almacenamiento
+        self.metricas = metricas
+        self.clientes = self.ManejarClientes(almacenamiento, metricas)
+        self.salas = self.ManejarSalas(almacenamiento, metricas)
+        self.reservaciones = self.ManejarReservaciones(almacenamiento, metricas)
+        self.calendario = self.ManejarCalendario(almacenamiento, metricas)
+        self.eventos = self.ManejarEventos(almacenamiento, metricas)
+        self.calendario.extender_calendario(horizonte_calendario)
+
+    def cerrar(self) -> None:
+        """Confirma las escrituras pendientes antes de terminar."""
+
+        self.almacenamiento.cerrar()
+
+    class ManejarReservaciones(ManejadorBaseDatos):
+        """Clase para manejar reservaciones."""
+
+        def __convertir_turno_a_numero(self, turno: str) -> int:
+            """Convierte un string de turno a su número correspondiente.
+
+            Args:
+                turno (str): String que representa al turno (Matutino, Vespertino o Nocturno)
+
+            Returns:
+                int: Número que representa al turno (1, 2 o 3)
+            """
+
+            resultado = 0
+
+            match turno:
+                case "Matutino":
+                    resultado = 1
+                case "Vespertino":
+                    resultado = 2
+                case "Nocturno":
+                    resultado = 3
+
+            return resultado
+
+        def registrar_reservacion(self, id_cliente: int, fecha: dt.date, turno: str, id_sala: int, nombre_evento: str,
+                                  asistentes: int = None) -> None:
+            """Registra una reservación en la base de datos.
+
+            Args:
+                id_cliente (int): ID del cliente.
+                fecha (dt.date): Fecha de la reservación.
+                turno (str): Turno de la reservación.
+                id_sala (int): ID de la sala.
+                nombre_evento (str): Nombre del evento.
+                asistentes (int): Lugares que ocupa; por omisión, la sala completa. (opcional)
+            """
+
+            try:
+                num_turno = self.__convertir_turno_a_numero(turno)
+                self.almacenamiento.insertar_reservacion(id_cliente, fecha, num_turno, id_sala, nombre_evento, asistentes)
+
+                print("Evento registrado de manera exitosa.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def mostrar_reservaciones_por_fecha(self, fecha: dt.date, datos: list = None) -> None:
+            """Muestra las reservaciones por fecha en formato tabular.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+                datos (list): Lista que contiene los datos de la consulta,
+                en caso de haberla hecho previamente. (opcional)
+            """
+
+            try:
+                if datos:
+                    resultados = datos
+                else:
+                    resultados = self.iterar_reservaciones_por_fecha(fecha)
+
+                headers = ['Folio', 'Nombre de la sala', 'Nombre del cliente', 'Nombre del evento', 'Turno']
+                tabla = TablaContinua(headers, [None, None, None, None, len("HH:MM-HH:MM")])
+
+                if not tabla.imprimir(resultados):
+                    print("No hay reservaciones disponibles para esta fecha.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def obtener_reservaciones_por_fecha(self, fecha: dt.date) -> list:
+            """Obtiene las reservaciones por fecha.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+
+            Returns:
+                list: Lista de tuplas con los datos de las reservaciones.
+            """
+
+            try:
+                return list(self.iterar_reservaciones_por_fecha(fecha))
+            except Exception as e:
+                self._reportar_error(e)
+
+
+        def iterar_reservaciones_por_fecha(self, fecha: dt.date):
+            """Recorre las reservaciones de una fecha directamente del almacenamiento, sin cargarlas todas.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+
+            Yields:
+                tuple: (folio, nombre_sala, nombre_cliente, nombre_evento, turno).
+            """
+
+            for fila in self.almacenamiento.iterar_reservaciones_en_rango(fecha, fecha):
+                yield (fila[1],) + fila[3:]
+
+        def obtener_reservaciones_agrupadas_por_fecha(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> dict:
+            """Obtiene en una sola consulta las reservaciones de un rango, agrupadas por fecha.
+
+            Cada lista tiene el mismo formato y orden que `obtener_reservaciones_por_fecha`.
+
+            Args:
+                fecha_inicio (dt.date): Fecha de inicio del rango.
+                fecha_fin (dt.date): Fecha fin del rango.
+
+            Returns:
+                dict: Diccionario {fecha: lista de tuplas} con solo las fechas que tienen reservaciones.
+            """
+
+            try:
+                resultados = {}
+                for fila in self.almacenamiento.iterar_reservaciones_en_rango(fecha_inicio, fecha_fin):
+                    resultados.setdefault(fila[0], []).append((fila[1],) + fila[3:])
+
+                return resultados
+
+            except Exception as e:
+                self._reportar_error(e)
+
+        def mostrar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date, datos: list = None) -> int:
+            """Muestra las reservaciones como formato tabular dentro de un rango de fechas definido.
+
+            Args:
+                fecha_inicio (date): Fecha de inicio a consultar.
+                fecha_fin (date): Fecha fin a consultar.
+                datos (list): Lista con los datos de las reservaciones. (opcional)
+
+
+            Returns:
+                int: Número de reservaciones mostradas.
+            """
+
+            try:
+                if datos:
+                    resultados = datos
+                else:
+                    resultados = self.iterar_reservaciones_en_rango(fecha_inicio, fecha_fin)
+
+                filas = ([str(row[0]), row[1], row[2].strftime('%m-%d-%Y'), row[3], str(row[4]), row[5]] for row in resultados)
+                headers = ['Folio', 'Nombre del cliente', 'Fecha', 'Turno', 'ID sala', 'Nombre del evento']
+                tabla = TablaContinua(headers, [None, None, len("mm-dd-yyyy"), len("HH:MM-HH:MM"), None, None])
+
+                mostradas = tabla.imprimir(filas)
+                if not mostradas:
+                    print("No hay reservaciones disponibles para esta fecha.")
+                return mostradas
+            except Exception as e:
+                self._reportar_error(e)
+
+        def obtener_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+            """Obtiene las reservaciones vigentes dentro de un rango de fechas.
+
+            Args:
+                fecha_inicio (dt.date): Fecha de inicio del rango.
+                fecha_fin (dt.date): Fecha fin del rango.
+
+            Returns:
+                list: Lista de tuplas (folio, nombre_cliente, fecha, turno, id_sala, nombre_evento).
+            """
+
+            try:
+                return list(self.iterar_reservaciones_en_rango(fecha_inicio, fecha_fin))
+            except Exception as e:
+                self._reportar_error(e)
+
+        def obtener_reservaciones_modificadas(self, desde_version: int) -> list:
+            """Obtiene las reservaciones creadas, renombradas o canceladas después de una versión.
+
+            A diferencia de las demás consultas, incluye las reservaciones canceladas.
+
+            Args:
+                desde_version (int): Última versión ya procesada; -1 para obtener todas.
+
+            Returns:
+                list: Lista de tuplas (folio, nombre_sala, nombre_cliente, nombre_evento, turno,
+                fecha, cancelado, actualizado, version) en orden de versión.
+            """
+
+            try:
+                return self.almacenamiento.obtener_reservaciones_modificadas(desde_version)
+            except Exception as e:
+                self._reportar_error(e)
+
+        def iterar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date):
+            """Recorre las reservaciones de un rango directamente del almacenamiento, sin cargarlas todas.
+
+            Args:
+                fecha_inicio (dt.date): Fecha de inicio del rango.
+                fecha_fin (dt.date): Fecha fin del rango.
+
+            Yields:
+                tuple: (folio, nombre_cliente, fecha, turno, id_sala, nombre_evento).
+            """
+
+            for fecha, folio, id_sala, _, nombre_cliente, nombre_evento, turno in \
+                    self.almacenamiento.iterar_reservaciones_en_rango(fecha_inicio, fecha_fin):
+                yield folio, nombre_cliente, fecha, turno, id_sala, nombre_evento
+
+        def editar_nombre_evento(self, folio: int, nuevo_nombre: str) -> None:
+            """Edita el nombre de un evento ya existente.
+
+            Args:
+                folio (str): Folio del evento.
+                nuevo_nombre (str): Nuevo nombre que tendrá el evento.
+            """
+
+            try:
+                self.almacenamiento.renombrar_reservacion(folio, nuevo_nombre)
+                print("Nombre del evento actualizado exitosamente.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def verificar_existencia_reservacion(self, fecha: dt.date, id_sala: int, turno: str) -> bool:
+            """Verifica si existe una reservación.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+                id_sala (int): ID de la sala a consultar.
+                turno (str): Turno a consultar.
+
+            Returns:
+                bool: True si existe, False si no existe.
+            """
+
+            try:
+                return self.almacenamiento.existe_reservacion(fecha, id_sala, self.__convertir_turno_a_numero(turno))
+            except Exception as e:
+                self._reportar_error(e)
+
+            return True
+
+        def obtener_lugares_libres(self, fecha: dt.date, id_sala: int, turno: str) -> int:
+            """Obtiene los lugares que quedan en un turno de una sala.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+                id_sala (int): ID de la sala a consultar.
+                turno (str): Turno a consultar.
+
+            Returns:
+                int: Lugares libres; 0 si hubo un error.
+            """
+
+            try:
+                return self.almacenamiento.obtener_lugares_libres(fecha, id_sala, self.__convertir_turno_a_numero(turno))
+            except Exception as e:
+                self._reportar_error(e)
+
+            return 0
+
+        def obtener_fechas_libres(self, id_sala: int, turno: str, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+            """Obtiene las fechas reservables de un rango en las que el turno de una sala tiene lugares libres.
+
+            Sirve para reservaciones en bloque, p. ej. el mismo turno todos los días de un mes.
+
+            Args:
+                id_sala (int): ID de la sala.
+                turno (str): Turno a consultar.
+                fecha_inicio (dt.date): Fecha de inicio del rango.
+                fecha_fin (dt.date): Fecha fin del rango.
+
+            Returns:
+                list: Lista de fechas (dt.date) libres.
+            """
 
-        self.clientes = self.ManejarClientes()
-        self.salas = self.ManejarSalas()
-        self.reservaciones = self.ManejarReservaciones()
+            fecha_minima = dt.date.today() + dt.timedelta(days=DIAS_ANTICIPACION)
 
-    class ManejarReservaciones:
-        """Clase para manejar reservaciones."""
+            try:
+                return self.almacenamiento.obtener_fechas_libres(id_sala, self.__convertir_turno_a_numero(turno),
+                                                                 max(fecha_inicio, fecha_minima), fecha_fin)
+            except Exception as e:
+                self._reportar_error(e)
 
-        def __init__(self):
-            pass
+        def __paginar(self, consulta: Callable, id_buscado: int, fecha_inicio: dt.date, fecha_fin: dt.date,
+                      despues: tuple, por_pagina: int, incluir_canceladas: bool) -> dict:
+            """Ejecuta una consulta paginada del almacenamiento y arma el resultado con sus totales.
 
-        def __convertir_turno_a_numero(self, turno: str) -> int:
-            """Convierte un string de turno a su número correspondiente.
+            Se pide una reservación de más para saber si hay otra página sin contarlas.
 
             Args:
-                turno (str): String que representa al turno (Matutino, Vespertino o Nocturno)
+                consulta (Callable): obtener_reservaciones_por_cliente u obtener_agenda_sala del almacenamiento.
+                id_buscado (int): ID del cliente o de la sala.
+                fecha_inicio (dt.date): Fecha de inicio del rango; None para no acotarlo.
+                fecha_fin (dt.date): Fecha fin del rango; None para no acotarlo.
+                despues (tuple): (fecha, folio) donde terminó la página anterior; None para la primera.
+                por_pagina (int): Reservaciones por página.
+                incluir_canceladas (bool): Si es True, se listan también las canceladas.
 
             Returns:
-                int: Número que representa al turno (1, 2 o 3)
+                dict: Resultado descrito en obtener_reservaciones_por_cliente.
             """
 
-            resultado = 0
+            try:
+                filas, vigentes, canceladas = consulta(id_buscado, fecha_inicio or dt.date.min, fecha_fin or dt.date.max,
+                                                       por_pagina + 1, despues, incluir_canceladas)
+                hay_mas = len(filas) > por_pagina
+                filas = filas[:por_pagina]
+
+                return {
+                    "reservaciones": filas,
+                    "vigentes": vigentes,
+                    "canceladas": canceladas,
+                    "total": vigentes + canceladas if incluir_canceladas else vigentes,
+                    "siguiente": (filas[-1][1], filas[-1][0]) if hay_mas else None,
+                }
+            except Exception as e:
+                self._reportar_error(e)
 
-            match turno:
-                case "Matutino":
-                    resultado = 1
-                case "Vespertino":
-                    resultado = 2
-                case "Nocturno":
-                    resultado = 3
+        def obtener_reservaciones_por_cliente(self, id_cliente: int, fecha_inicio: dt.date = None, fecha_fin: dt.date = None,
+                                              despues: tuple = None, por_pagina: int = 50, incluir_canceladas: bool = False) -> dict:
+            """Obtiene una página del historial de reservaciones de un cliente, en orden de fecha y folio.
 
-            return resultado
+            Los totales de vigentes y canceladas cubren todo el rango, no solo la página.
 
-        def registrar_reservacion(self, id_cliente: int, fecha: dt.date, turno: str, id_sala: int, nombre_evento: str) -> None:
-            """Registra una reservación en la base de datos.
+            Args:
+                id_cliente (int): ID del cliente.
+                fecha_inicio (dt.date): Fecha de inicio del rango. (opcional)
+                fecha_fin (dt.date): Fecha fin del rango. (opcional)
+                despues (tuple): Valor "siguiente" de la página anterior; None para la primera. (opcional)
+                por_pagina (int): Reservaciones por página. (opcional)
+                incluir_canceladas (bool): Si es True, se listan también las canceladas. (opcional)
+
+            Returns:
+                dict: {"reservaciones": lista de tuplas (folio, fecha, turno, id_sala, nombre_sala,
+                nombre_evento, cancelado), "vigentes", "canceladas", "total" (reservaciones listables),
+                "siguiente" ((fecha, folio) de la última fila si hay otra página, o None)}.
+            """
+
+            return self.__paginar(self.almacenamiento.obtener_reservaciones_por_cliente, id_cliente, fecha_inicio, fecha_fin,
+                                  despues, por_pagina, incluir_canceladas)
+
+        def obtener_agenda_sala(self, id_sala: int, fecha_inicio: dt.date = None, fecha_fin: dt.date = None,
+                                despues: tuple = None, por_pagina: int = 50, incluir_canceladas: bool = False) -> dict:
+            """Obtiene una página de la agenda de una sala, en orden de fecha y folio.
+
+            Args:
+                id_sala (int): ID de la sala.
+                fecha_inicio (dt.date): Fecha de inicio del rango. (opcional)
+                fecha_fin (dt.date): Fecha fin del rango. (opcional)
+                despues (tuple): Valor "siguiente" de la página anterior; None para la primera. (opcional)
+                por_pagina (int): Reservaciones por página. (opcional)
+                incluir_canceladas (bool): Si es True, se listan también las canceladas. (opcional)
+
+            Returns:
+                dict: Igual que obtener_reservaciones_por_cliente, con tuplas (folio, fecha, turno,
+                id_cliente, nombre_cliente, nombre_evento, cancelado).
+            """
+
+            return self.__paginar(self.almacenamiento.obtener_agenda_sala, id_sala, fecha_inicio, fecha_fin,
+                                  despues, por_pagina, incluir_canceladas)
+
+        def mostrar_pagina(self, resultado: dict, encabezados: list) -> None:
+            """Muestra en formato tabular una página de obtener_reservaciones_por_cliente u obtener_agenda_sala.
+
+            Args:
+                resultado (dict): Resultado de la consulta paginada.
+                encabezados (list): Encabezados de las columnas de las tuplas.
+            """
+
+            if not resultado:
+                return
+
+            filas = ([str(row[0]), row[1].strftime('%m-%d-%Y'), row[2], str(row[3]), row[4], row[5], "Sí" if row[6] else "No"]
+                     for row in resultado["reservaciones"])
+            tabla = TablaContinua(encabezados, [None, len("mm-dd-yyyy"), len("HH:MM-HH:MM"), None, None, None, len("Cancelada")])
+
+            if not tabla.imprimir(filas):
+                print("No hay reservaciones en esta página.")
+
+            print(f"Vigentes: {resultado['vigentes']}. Canceladas: {resultado['canceladas']}.")
+            if resultado["siguiente"]:
+                fecha, folio = resultado["siguiente"]
+                print(f"Hay más reservaciones; la siguiente página continúa después de {fecha.strftime('%m-%d-%Y')}:{folio}.")
+
+        def cancelar_reservación(self, folio: int) -> None:
+            """Cancela una reservación, por turno o por horario, marcándola como cancelada.
+
+            Args:
+                folio (int): Folio de la reservación a cancelar.
+            """
+
+            try:
+                if self.almacenamiento.cancelar_reservacion(folio):
+                    print("Reservación cancelada exitosamente.")
+                else:
+                    print("La reservación no existe o ya está cancelada.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def registrar_asistencia(self, folio: int, asistio: bool = True) -> None:
+            """Registra si el cliente se presentó a su reservación.
+
+            Args:
+                folio (int): Folio de la reservación.
+                asistio (bool): False si el cliente no se presentó. (opcional)
+            """
+
+            try:
+                self.almacenamiento.registrar_asistencia(folio, asistio)
+                print("Asistencia registrada exitosamente.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def registrar_reservacion_intervalo(self, id_cliente: int, fecha: dt.date, inicio: dt.time, fin: dt.time,
+                                            id_sala: int, nombre_evento: str) -> None:
+            """Registra una reservación de la sala completa en un horario.
 
             Args:
                 id_cliente (int): ID del cliente.
                 fecha (dt.date): Fecha de la reservación.
-                turno (str): Turno de la reservación.
+                inicio (dt.time): Hora de inicio.
+                fin (dt.time): Hora de fin.
                 id_sala (int): ID de la sala.
                 nombre_evento (str): Nombre del evento.
             """
 
             try:
-                fecha_formateada = fecha.isoformat()
-                num_turno = self.__convertir_turno_a_numero(turno)
-                valores = (id_cliente, fecha_formateada, num_turno, id_sala, nombre_evento)
+                self.almacenamiento.insertar_reservacion_intervalo(id_cliente, fecha, id_sala, inicio, fin, nombre_evento)
 
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                print("Evento registrado de manera exitosa.")
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("PRAGMA foreign_keys = ON;")
+        def verificar_traslape(self, fecha: dt.date, id_sala: int, inicio: dt.time, fin: dt.time) -> bool:
+            """Verifica si un horario de una sala ya está ocupado.
 
-                    cursor.execute("""
-                        INSERT INTO reservaciones (id_cliente, fecha, id_turno, id_sala, nombre_evento)
-                        VALUES (?, ?, ?, ?, ?);
-                    """, valores)
+            Args:
+                fecha (dt.date): Fecha a consultar.
+                id_sala (int): ID de la sala.
+                inicio (dt.time): Hora de inicio.
+                fin (dt.time): Hora de fin.
 
+            Returns:
+                bool: True si está ocupado o si hubo un error, False si está libre.
+            """
 
-                print("Evento registrado de manera exitosa.")
-            except ValueError as e:
-                print(e)
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+            try:
+                return self.almacenamiento.existe_traslape(fecha, id_sala, inicio, fin)
+            except Exception as e:
+                self._reportar_error(e)
 
-        def mostrar_reservaciones_por_fecha(self, fecha: dt.date, datos: list = None) -> None:
-            """Muestra las reservaciones por fecha en formato tabular.
+            return True
+
+        def obtener_huecos(self, fecha: dt.date, id_sala: int, duracion_minima: int = MINUTOS_INTERVALO) -> list:
+            """Obtiene los horarios libres de una sala en una fecha.
 
             Args:
                 fecha (dt.date): Fecha a consultar.
-                datos (list): Lista que contiene los datos de la consulta,
-                en caso de haberla hecho previamente. (opcional)
+                id_sala (int): ID de la sala.
+                duracion_minima (int): Minutos que debe durar un hueco. (opcional)
+
+            Returns:
+                list: Tuplas (inicio, fin) con los horarios libres.
+            """
+
+            try:
+                return self.almacenamiento.obtener_huecos(fecha, id_sala, duracion_minima)
+            except Exception as e:
+                self._reportar_error(e)
+
+            return []
+
+        def mostrar_horario_sala(self, fecha: dt.date, id_sala: int, duracion_minima: int = MINUTOS_INTERVALO) -> None:
+            """Muestra las reservaciones por horario de una sala y sus horarios libres.
+
+            Args:
+                fecha (dt.date): Fecha a consultar.
+                id_sala (int): ID de la sala.
+                duracion_minima (int): Minutos que debe durar un hueco para mostrarlo. (opcional)
+            """
+
+            try:
+                filas = ((folio, f"{inicio:%H:%M}", f"{fin:%H:%M}", nombre_cliente, nombre_evento)
+                         for folio, inicio, fin, _, nombre_cliente, nombre_evento
+                         in self.almacenamiento.obtener_reservaciones_intervalo(fecha, id_sala))
+                headers = ['Folio', 'Inicio', 'Fin', 'Nombre del cliente', 'Nombre del evento']
+                tabla = TablaContinua(headers, [None, len("HH:MM"), len("HH:MM"), None, None])
+
+                if not tabla.imprimir(filas):
+                    print("La sala no tiene reservaciones por horario en esta fecha.")
+
+                huecos = ((f"{inicio:%H:%M}", f"{fin:%H:%M}")
+                          for inicio, fin in self.almacenamiento.obtener_huecos(fecha, id_sala, duracion_minima))
+                tabla = TablaContinua(['Libre desde', 'Libre hasta'], [len("HH:MM"), len("HH:MM")])
+
+                if not tabla.imprimir(huecos):
+                    print("La sala no tiene horarios libres en esta fecha.")
+            except Exception as e:
+                self._reportar_error(e)
+
+    class ManejarSalas(ManejadorBaseDatos):
+        """Clase para el manejo de salas."""
+
+        def registrar_sala(self, nombre: str, cupo: int) -> None:
+            """Registra una sala en la base de datos.
+
+            Args:
+                nombre (str): Nombre de la sala.
+                cupo (int): Cupo de la sala.
+            """
+
+            try:
+                self.almacenamiento.insertar_sala(nombre, cupo)
+
+                print("Sala registrada exitosamente.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def mostrar_salas_disponibles(self, fecha:dt.date, datos:list = None) -> None:
+            """Muestra las salas disponibles en una fecha específica.
+
+            Args:
+                lista_salas (dict): Lista que contiene las salas registradas.
+                fecha (dt.date): Fecha a consultar.
+                datos (list): Lista con los datos de las salas. (opcional)
             """
 
             try:
                 if datos:
                     resultados = datos
                 else:
-                    resultados = self.obtener_reservaciones_por_fecha(fecha)
+                    resultados = self.obtener_salas_disponibles(fecha)
 
-                if resultados:
-                    headers = ['Folio', 'Nombre de la sala', 'Nombre del cliente', 'Nombre del evento', 'Turno']
-                    filas = [[str(row[0]), row[1], row[2], row[3], row[4]] for row in resultados]
-                    print(tabulate(filas, headers, tablefmt='grid'))
-                else:
-                    print("No hay reservaciones disponibles para esta fecha.")
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+                resultados = resultados or []
+                headers = ['ID sala', 'Nombre', 'Cupo', 'Turnos disponibles (lugares)']
+                filas = ([str(row[0]), row[1], str(row[2]), row[3]] for row in resultados)
+                # La lista ya está en memoria: el ancho de los turnos sale de la fila
+                # más larga para no recortar los lugares de las salas con más cupo.
+                ancho_turnos = max((len(row[3]) for row in resultados), default=len(headers[3]))
+                tabla = TablaContinua(headers, [None, None, None, max(ancho_turnos, len(headers[3]))])
 
-        def obtener_reservaciones_por_fecha(self, fecha: dt.date) -> list:
-            """Obtiene las reservaciones por fecha.
+                if not tabla.imprimir(filas):
+                    print("No hay salas disponibles para esta fecha.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def obtener_salas_disponibles(self, fecha:dt.date) -> list:
+            """Obtiene las salas disponibles en una fecha específica.
 
             Args:
                 fecha (dt.date): Fecha a consultar.
 
             Returns:
-                list: Lista de tuplas con los datos de las reservaciones.
+                list: Lista de tuplas con los datos de las salas.
             """
 
-            fecha_formateada = fecha.isoformat()
-            valores = (fecha_formateada,)
-
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                return self.almacenamiento.obtener_salas_disponibles(fecha)
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("""
-                        SELECT
-                            r.folio,
-                            s.nombre,
-                            c.nombre || ' ' || c.apellidos AS nombre_cliente,
-                            r.nombre_evento,
-                            t.turno
-                        FROM reservaciones r
-                        JOIN salas s ON s.id_sala = r.id_sala
-                        JOIN clientes c ON c.id_cliente = r.id_cliente
-                        JOIN turnos t ON r.id_turno = t.id_turno
-                        WHERE r.fecha = ?
-                        AND r.cancelado IS NULL;
-                    """, valores)
-
-                    resultados = cursor.fetchall()
-
-                    return resultados
-
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+        def obtener_siguiente_turno_libre(self, id_sala: int, fecha_desde: dt.date) -> tuple:
+            """Obtiene el primer turno con lugares libres de una sala en una fecha reservable.
+
+            Args:
+                id_sala (int): ID de la sala.
+                fecha_desde (dt.date): Fecha a partir de la cual buscar.
 
+            Returns:
+                tuple: (fecha, turno) o None si no hay turnos libres dentro del calendario.
+            """
 
-        def mostrar_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date, datos: list = None) -> list:
-            """Muestra las reservaciones como formato tabular dentro de un rango de fechas definido.
+            fecha_minima = dt.date.today() + dt.timedelta(days=DIAS_ANTICIPACION)
+
+            try:
+                return self.almacenamiento.obtener_siguiente_turno_libre(id_sala, max(fecha_desde, fecha_minima))
+            except Exception as e:
+                self._reportar_error(e)
+
+    class ManejarClientes(ManejadorBaseDatos):
+        """Clase para el manejo de clientes."""
+
+        def registrar_cliente(self, nombre: str, apellidos: str) -> None:
+            """Registra un cliente en la base de datos.
 
             Args:
-                fecha_inicio (date): Fecha de inicio a consultar.
-                fecha_fin (date): Fecha fin a consultar.
-                datos (list): Lista con los datos de las reservaciones. (opcional)
+                nombre (str): Nombre del cliente.
+                apellidos (str): Apellidos del cliente.
+            """
 
+            try:
+                self.almacenamiento.insertar_cliente(nombre, apellidos)
+                print("Cliente registrado satisfactoriamente.")
+            except Exception as e:
+                self._reportar_error(e)
 
-            Returns:
-                list: Lista de folios válidos en el rango.
+        def mostrar_clientes(self, datos: list = None) -> None:
+            """Muestra los clientes registrados en formato tabular.
+            Args:
+                datos (list): Lista que contiene los datos de los clientes. (opcional)
             """
 
             try:
                 if datos:
                     resultados = datos
                 else:
-                    resultados = self.obtener_reservaciones_en_rango(fecha_inicio, fecha_fin)
-
-                if resultados:
-                    headers = ['Folio', 'Nombre del cliente', 'Fecha', 'Turno', 'ID sala', 'Nombre del evento']
-                    filas = []
-                    for row in resultados:
-                        fecha_obj = dt.date.fromisoformat(row[2])
-                        fecha_str = fecha_obj.strftime('%m-%d-%Y')
-                        filas.append([str(row[0]), row[1], fecha_str, row[3], str(row[4]), row[5]])
-                    print(tabulate(filas, headers, tablefmt='grid'))
-                else:
-                    print("No hay reservaciones disponibles para esta fecha.")
-                return resultados
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+                    resultados = self.obtener_clientes()
 
-        def obtener_reservaciones_en_rango(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
-            valores = (fecha_inicio, fecha_fin)
-            try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                headers = ['ID', 'Nombre', 'Apellidos']
+                filas = ([str(row[0]), row[1], row[2]] for row in resultados or [])
 
-                    cursor.execute("""
-                        SELECT
-                            r.folio,
-                            c.nombre || ' ' || c.apellidos AS nombre_cliente,
-                            r.fecha,
-                            t.turno,
-                            r.id_sala,
-                            r.nombre_evento
-                        FROM reservaciones r
-                        JOIN turnos t ON t.id_turno = r.id_turno
-                        JOIN clientes c ON c.id_cliente = r.id_cliente
-                        WHERE fecha BETWEEN ? AND ?
-                        AND r.cancelado IS NULL;
-                    """, valores)
-
-                    resultados = cursor.fetchall()
-                    return resultados
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+                if not TablaContinua(headers).imprimir(filas):
+                    print("No hay clientes registrados.")
+            except Exception as e:
+                self._reportar_error(e)
 
-        def editar_nombre_evento(self, folio: int, nuevo_nombre: str) -> None:
-            """Edita el nombre de un evento ya existente.
+        def obtener_clientes(self) -> list:
+            """Obtiene los clientes registrados.
 
-            Args:
-                folio (str): Folio del evento.
-                nuevo_nombre (str): Nuevo nombre que tendrá el evento.
+            Returns:
+                list: Lista de tuplas con los datos de los clientes.
             """
 
-            valores = (nuevo_nombre, folio)
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE reservaciones
-                        SET nombre_evento = ?
-                        WHERE folio = ?;
-                    """, valores)
-                    print("Nombre del evento actualizado exitosamente.")
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+                return self.almacenamiento.obtener_clientes()
+            except Exception as e:
+                self._reportar_error(e)
 
-        def verificar_existencia_reservacion(self, fecha: dt.date, id_sala: int, turno: str) -> bool:
-            """Verifica si existe una reservación.
+        def existe_cliente(self, id_cliente: int) -> bool:
+            """Indica si el cliente está registrado.
 
             Args:
-                fecha (dt.date): Fecha a consultar.
-                id_sala (int): ID de la sala a consultar.
-                turno (str): Turno a consultar.
+                id_cliente (int): ID del cliente.
 
             Returns:
                 bool: True si existe, False si no existe.
             """
 
-            fecha_formateada = fecha.isoformat()
-            valores = (fecha_formateada, id_sala, turno)
+            try:
+                return self.almacenamiento.existe_cliente(id_cliente)
+            except Exception as e:
+                self._reportar_error(e)
+
+            return False
+
+        def obtener_clientes_frecuentes(self, fecha_inicio: dt.date = None, fecha_fin: dt.date = None, limite: int = 10) -> list:
+            """Obtiene los clientes con más reservaciones vigentes y cuántas cancelaron.
+
+            Args:
+                fecha_inicio (dt.date): Fecha de inicio del rango. (opcional)
+                fecha_fin (dt.date): Fecha fin del rango. (opcional)
+                limite (int): Máximo de clientes a devolver. (opcional)
+
+            Returns:
+                list: Lista de tuplas (id_cliente, nombre_cliente, reservaciones, vigentes, canceladas, inasistencias).
+            """
 
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                return self.almacenamiento.obtener_clientes_frecuentes(fecha_inicio or dt.date.min, fecha_fin or dt.date.max, limite)
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("""
-                        SELECT
-                            r.id_cliente,
-                            r.fecha,
-                            t.turno,
-                            r.id_sala,
-                            r.nombre_evento
-                        FROM reservaciones r
-                        JOIN turnos t ON t.id_turno = r.id_turno
-                        WHERE fecha = ?
-                        AND id_sala = ?
-                        AND turno = ?
-                        AND r.cancelado IS NULL;
-                    """, valores)
-
-                    resultados = cursor.fetchall()
-
-                    if resultados:
-                        return True
-                    else:
-                        return False
+        def mostrar_clientes_frecuentes(self, fecha_inicio: dt.date = None, fecha_fin: dt.date = None, limite: int = 10) -> None:
+            """Muestra los clientes frecuentes con sus cancelaciones e inasistencias.
 
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+            Args:
+                fecha_inicio (dt.date): Fecha de inicio del rango. (opcional)
+                fecha_fin (dt.date): Fecha fin del rango. (opcional)
+                limite (int): Máximo de clientes a mostrar. (opcional)
+            """
 
-            return True
+            resultados = self.obtener_clientes_frecuentes(fecha_inicio, fecha_fin, limite)
 
-        def cancelar_reservación(self, folio: int) -> None:
-            """Cancela una reservación, marcándola como cancelada.
+            headers = ['ID', 'Cliente', 'Reservaciones', 'Vigentes', 'Canceladas', '% canceladas', 'No se presentó']
+            filas = ([str(row[0]), row[1], str(row[2]), str(row[3]), str(row[4]), f"{100 * row[4] / row[2]:.1f}", str(row[5])]
+                     for row in resultados or [])
+
+            if not TablaContinua(headers).imprimir(filas):
+                print("No hay reservaciones en el rango especificado.")
+
+    class ManejarCalendario(ManejadorBaseDatos):
+        """Clase para el manejo del calendario de fechas reservables.
+
+        Cada fecha guarda su día de la semana y si es festivo o un día de cierre;
+        una fecha es reservable si no es domingo, festivo ni cierre. En SQLite
+        esa regla es la columna calculada `reservable`, a la que se unen las consultas.
+        """
+
+        def fecha_minima(self) -> dt.date:
+            """Obtiene la primera fecha que respeta la anticipación mínima.
+
+            Returns:
+                dt.date: Fecha de hoy más los días de anticipación.
+            """
+
+            return dt.date.today() + dt.timedelta(days=DIAS_ANTICIPACION)
+
+        def generar_calendario(self, fecha_inicio: dt.date, dias: int) -> None:
+            """Agrega al calendario las fechas que falten en el horizonte indicado.
+
+            Las fechas ya existentes conservan sus marcas de festivo y cierre.
 
             Args:
-                folio (int): Folio de la reservación a cancelar.
+                fecha_inicio (dt.date): Primera fecha del horizonte.
+                dias (int): Número de días a cubrir.
             """
 
-            valores = (folio,)
+            fechas = [fecha_inicio + dt.timedelta(days=desplazamiento) for desplazamiento in range(dias)]
 
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                self.almacenamiento.agregar_fechas(fechas)
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("""
-                        UPDATE reservaciones
-                        SET cancelado = 1
-                        WHERE folio = ?;
-                    """, valores)
+        def extender_calendario(self, dias: int) -> None:
+            """Genera el calendario de los próximos días solo si le quedan menos de MARGEN_CALENDARIO.
 
-                    print("Reservación cancelada exitosamente.")
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+            Las fechas se agregan en orden, así que basta consultar una para saber
+            si el calendario llega lo bastante lejos y evitar la escritura de todo
+            el horizonte en cada arranque.
 
-    class ManejarSalas:
-        """Clase para el manejo de salas."""
+            Args:
+                dias (int): Número de días a cubrir a partir de hoy.
+            """
 
-        def __init__(self):
-            pass
+            hoy = dt.date.today()
+            limite = hoy + dt.timedelta(days=dias - 1 - min(MARGEN_CALENDARIO, dias - 1))
+            if self.obtener_dia(limite) is None:
+                self.generar_calendario(hoy, dias)
 
-        def registrar_sala(self, nombre: str, cupo: int) -> None:
-            """Registra una sala en la base de datos.
+        def marcar_festivo(self, fecha: dt.date, descripcion: str = None, activo: bool = True) -> None:
+            """Marca una fecha como día festivo, en el que no se reciben reservaciones.
 
             Args:
-                nombre (str): Nombre de la sala.
-                cupo (int): Cupo de la sala.
+                fecha (dt.date): Fecha del festivo.
+                descripcion (str): Nombre del festivo. (opcional)
+                activo (bool): False para quitar la marca. (opcional)
             """
 
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                self.almacenamiento.marcar_fecha(fecha, "festivo", activo, descripcion)
+                print("Día festivo actualizado exitosamente.")
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("""
-                        INSERT INTO salas (nombre, cupo)
-                        VALUES (?, ?);
-                    """, (nombre, cupo))
+        def marcar_cierre(self, fecha: dt.date, descripcion: str = None, activo: bool = True) -> None:
+            """Marca una fecha en la que el coworking permanece cerrado.
 
-                print("Sala registrada exitosamente.")
-            except ValueError as e:
-                print(e)
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+            Args:
+                fecha (dt.date): Fecha del cierre.
+                descripcion (str): Motivo del cierre. (opcional)
+                activo (bool): False para quitar la marca. (opcional)
+            """
 
-        def mostrar_salas_disponibles(self, fecha:dt.date, datos:list = None) -> None:
-            """Muestra las salas disponibles en una fecha específica.
+            try:
+                self.almacenamiento.marcar_fecha(fecha, "cerrado", activo, descripcion)
+                print("Día de cierre actualizado exitosamente.")
+            except Exception as e:
+                self._reportar_error(e)
+
+        def obtener_dia(self, fecha: dt.date) -> tuple:
+            """Obtiene la información de una fecha del calendario.
 
             Args:
-                lista_salas (dict): Lista que contiene las salas registradas.
                 fecha (dt.date): Fecha a consultar.
-                datos (list): Lista con los datos de las salas. (opcional)
+
+            Returns:
+                tuple: (dia_semana, festivo, cerrado, descripcion, reservable) o None si
+                la fecha está fuera del calendario.
             """
 
             try:
-                if datos:
-                    resultados = datos
-                else:
-                    resultados = self.obtener_salas_disponibles(fecha)
-
-                if resultados:
-                    headers = ['ID sala', 'Nombre', 'Cupo', 'Turnos disponibles']
-                    filas = [[str(row[0]), row[1], str(row[2]), row[3]] for row in resultados]
-                    print(tabulate(filas, headers, tablefmt='grid'))
-                else:
-                    print("No hay salas disponibles para esta fecha.")
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+                return self.almacenamiento.obtener_dia(fecha)
+            except Exception as e:
+                self._reportar_error(e)
 
-        def obtener_salas_disponibles(self, fecha:dt.date) -> list:
-            """Obtiene las salas disponibles en una fecha específica.
+        def es_reservable(self, fecha: dt.date) -> bool:
+            """Indica si una fecha admite reservaciones según el calendario y la anticipación mínima.
 
             Args:
                 fecha (dt.date): Fecha a consultar.
 
             Returns:
-                list: Lista de tuplas con los datos de las salas.
+                bool: True si se puede reservar, False si no.
             """
 
-            fecha_formateada = fecha.isoformat()
-            valores = (fecha_formateada,)
-
-            try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
-
-                    cursor.execute("""
-                            SELECT
-                                s.id_sala,
-                                s.nombre,
-                                s.cupo,
-                                group_concat(t.turno, ', ')
-                            FROM salas s
-                            CROSS JOIN turnos t
-                            LEFT JOIN
-                            (
-                                SELECT
-                                *
-                                FROM reservaciones r
-                                JOIN salas s ON s.id_sala = r.id_sala
-                                WHERE cancelado IS NULL
-                                AND r.fecha = ?
-                            ) AS re ON re.id_turno = t.id_turno AND re.id_sala = s.id_sala
-                            WHERE re.id_turno IS NULL
-                            GROUP BY s.id_sala
-                        """, valores)
-
-                    resultados = cursor.fetchall()
-                    return resultados
-
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
-
-    class ManejarClientes:
-        """Clase para el manejo de clientes."""
+            if fecha < self.fecha_minima():
+                return False
 
-        def __init__(self):
-            pass
+            dia = self.obtener_dia(fecha)
+            return bool(dia and dia[4])
 
-        def registrar_cliente(self, nombre: str, apellidos: str) -> None:
-            """Registra un cliente en la base de datos.
+        def obtener_fechas_reservables(self, fecha_inicio: dt.date, fecha_fin: dt.date) -> list:
+            """Obtiene las fechas reservables dentro de un rango.
 
             Args:
-                nombre (str): Nombre del cliente.
-                apellidos (str): Apellidos del cliente.
+                fecha_inicio (dt.date): Fecha de inicio del rango.
+                fecha_fin (dt.date): Fecha fin del rango.
+
+            Returns:
+                list: Lista de fechas (dt.date) reservables.
             """
 
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
+                return self.almacenamiento.obtener_fechas_reservables(max(fecha_inicio, self.fecha_minima()), fecha_fin)
+            except Exception as e:
+                self._reportar_error(e)
 
-                    cursor.execute("""
-                        INSERT INTO clientes (nombre, apellidos)
-                        VALUES (?, ?);
-                    """, (nombre, apellidos))
-                print("Cliente registrado satisfactoriamente.")
-            except ValueError as e:
-                print(e)
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+        def siguiente_fecha_reservable(self, fecha: dt.date) -> dt.date:
+            """Obtiene la primera fecha reservable a partir de la indicada.
 
-        def mostrar_clientes(self, datos: list = None) -> None:
-            """Muestra los clientes registrados en formato tabular.
             Args:
-                datos (list): Lista que contiene los datos de los clientes. (opcional)
+                fecha (dt.date): Fecha desde la cual buscar.
+
+            Returns:
+                dt.date: Fecha reservable o None si no hay ninguna dentro del calendario.
             """
 
             try:
-                if datos:
-                    resultados = datos
-                else:
-                    resultados = self.obtener_clientes()
+                return self.almacenamiento.siguiente_fecha_reservable(max(fecha, self.fecha_minima()))
+            except Exception as e:
+                self._reportar_error(e)
 
-                if resultados:
-                    headers = ['ID', 'Nombre', 'Apellidos']
-                    filas = [[str(row[0]), row[1], row[2]] for row in resultados]
-                    print(tabulate(filas, headers, tablefmt='grid'))
-                else:
-                    print("No hay clientes registrados.")
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+    class ManejarEventos(ManejadorBaseDatos):
+        """Clase para consumir el registro de cambios de las reservaciones.
 
-        def obtener_clientes(self) -> list:
-            """Obtiene los clientes registrados.
+        Cada creación, cambio de nombre o cancelación agrega un evento con un
+        número de secuencia creciente. Los sistemas externos guardan la última
+        secuencia procesada y piden solo lo que cambió después de ella.
+        """
+
+        def obtener_cambios(self, desde: int = 0, limite: int = 100) -> list:
+            """Obtiene los eventos posteriores a una secuencia.
+
+            Args:
+                desde (int): Última secuencia ya procesada por el consumidor.
+                limite (int): Máximo de eventos a devolver.
 
             Returns:
-                list: Lista de tuplas con los datos de los clientes.
+                list: Lista de tuplas (secuencia, folio, tipo, datos, momento) en orden de secuencia.
             """
 
             try:
-                with sqlite3.connect("coworking.db") as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                    """
-                        SELECT
-                            id_cliente,
-                            nombre,
-                            apellidos
-                        FROM clientes
-                        ORDER BY apellidos;
-                    """
-                    )
-
-                    resultados = cursor.fetchall()
+                return self.almacenamiento.obtener_cambios(desde, limite)
+            except Exception as e:
+                self._reportar_error(e)
 
-                    return resultados
-
-            except Error as e:
-                print(e)
-            except Exception:
-                print(f"Ocurrió un error: {sys.exc_info()[0]}")
+        def seguir_cambios(self, desde: int = 0, limite: int = 100, intervalo: float = 1.0):
+            """Genera los eventos a medida que ocurren, consultando periódicamente.
 
-    def __inicializar_base_datos(self) -> None:
-        """Crea coworking.db y las tablas básicas si no existen."""
+            Args:
+                desde (int): Última secuencia ya procesada por el consumidor.
+                limite (int): Máximo de eventos por consulta.
+                intervalo (float): Segundos de espera cuando no hay eventos nuevos.
 
-        try:
-            with sqlite3.connect("coworking.db") as conn:
-                cursor = conn.cursor()
+            Yields:
+                tuple: (secuencia, folio, tipo, datos, momento).
+            """
 
+            while True:
+                eventos = self.obtener_cambios(desde, limite) or []
 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS clientes (
-                        id_cliente INTEGER PRIMARY KEY,
-                        nombre TEXT NOT NULL,
-                        apellidos TEXT NOT NULL
-                    );
-                """)
+                for evento in eventos:
+                    yield evento
+                    desde = evento[0]
 
+                if len(eventos) < limite:
+                    time.sleep(intervalo)
 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS salas (
-                        id_sala INTEGER PRIMARY KEY,
-                        nombre TEXT NOT NULL,
-                        cupo INTEGER NOT NULL
-                    );
-                """)
+        def obtener_cursor(self, consumidor: str, predeterminado: int = 0) -> int:
+            """Obtiene la última secuencia que un consumidor registró como procesada.
 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS turnos (
-                        id_turno INTEGER PRIMARY KEY,
-                        turno TEXT NOT NULL
-                    );
-                """)
+            Args:
+                consumidor (str): Nombre del consumidor (p. ej. "facturacion").
+                predeterminado (int): Valor a devolver si el consumidor es nuevo. (opcional)
 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS reservaciones (
-                        folio INTEGER PRIMARY KEY,
-                        id_cliente INTEGER NOT NULL,
-                        fecha TEXT NOT NULL,
-                        id_turno INTEGER NOT NULL,
-                        id_sala INTEGER NOT NULL,
-                        nombre_evento TEXT NOT NULL,
-                        cancelado INTEGER,
-                        FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente),
-                        FOREIGN KEY (id_sala) REFERENCES salas(id_sala),
-                        FOREIGN KEY (id_turno) REFERENCES turnos(id_turno)
-                    );
-                """)
+            Returns:
+                int: Secuencia guardada, o `predeterminado` si el consumidor es nuevo.
+            """
 
-                cursor.execute("""
-                    INSERT INTO turnos (turno) VALUES ('Matutino');
-                """)
+            try:
+                secuencia = self.almacenamiento.obtener_cursor(consumidor)
+                return predeterminado if secuencia is None else secuencia
+            except Exception as e:
+                self._reportar_error(e)
 
-                cursor.execute("""
-                    INSERT INTO turnos (turno) VALUES ('Vespertino');
-                """)
+        def guardar_cursor(self, consumidor: str, secuencia: int) -> None:
+            """Registra la última secuencia procesada por un consumidor.
 
-                cursor.execute("""
-                    INSERT INTO turnos (turno) VALUES ('Nocturno');
-                """)
+            Args:
+                consumidor (str): Nombre del consumidor.
+                secuencia (int): Última secuencia procesada.
+            """
 
-        except Error as e:
-            print(e)
-        except Exception:
-            print(f"Ocurrió un error: {sys.exc_info()[0]}")
+            try:
+                self.almacenamiento.guardar_cursor(consumidor, secuencia)
+            except Exception as e:
+                self._reportar_error(e)
 
     def __verificar_salida(self) -> bool:
         """Verifica si el usuario quiere salir de la operación actual.
@@ -593,124 +4713,163 @@ class Coworking:
 
             return entrada
 
-    def __exportar_json(self, reservaciones: dict, fecha: str) -> None:
-        """Exporta las reservaciones a formato JSON.
+    @_medido
+    def __exportar(self, lista_reservaciones: list, fecha: dt.date) -> None:
+        """Menú que permite elegir el formato a exportar la lista de reservaciones.
 
         Args:
-            reservaciones (dict): Diccionario con los valores de las reservaciones.
-            fecha (str): Fecha de consulta.
+            lista_reservaciones (list): Lista de tuplas que contiene las reservaciones.
+            fecha (dt.date): Fecha de consulta.
         """
 
-        with open(f"reservaciones_{fecha}.json", "w", encoding="utf-8") as archivo:
-            json.dump(reservaciones, archivo, indent=2, ensure_ascii=False)
-        print(f"Reservaciones exportadas correctamente a 'reservaciones_{fecha}.json'")
-
-
-    def __exportar_csv(self,reservaciones: dict, fecha: str) -> None:
-        """Exporta las reservaciones a formato CSV.
-
-        Args:
-            reservaciones (dict): Diccionario con los valores de las reservaciones.
-            fecha (str): Fecha de consulta.
-        """
+        formato = input("Seleccione el formato de exportación: JSON, CSV o EXCEL: ").upper()
 
-        with open(f"reservaciones_{fecha}.csv", "w", newline="", encoding="utf-8") as archivo:
-            manejar_csv = csv.writer(archivo)
-            manejar_csv.writerow(("Folio", "Nombre Sala", "Nombre Cliente", "Nombre Evento", "Turno", "Fecha"))
+        fecha_str = fecha.strftime('%m-%d-%Y')
+        with PerfilMemoria.etapa("armar diccionario"):
+            reservaciones_fecha = _reservaciones_por_folio(lista_reservaciones, fecha_str)
 
-            for folio, datos in reservaciones.items():
-                manejar_csv.writerow((folio, datos["nombre_sala"], datos["nombre_cliente"], datos["nombre_evento"], datos["turno"], datos["fecha"]))
+        if formato in EXPORTADORES:
+            with PerfilMemoria.etapa(f"escribir {formato}"):
+                EXPORTADORES[formato](reservaciones_fecha, fecha_str)
+        else:
+            print("Formato no válido. Opciones disponibles: JSON, CSV, EXCEL.")
 
-        print(f"Reservaciones exportadas correctamente a 'reservaciones_{fecha}.csv'")
+    @_medido
+    def exportar_cambios(self, formato: str) -> None:
+        """Exporta solo las reservaciones que cambiaron desde la última exportación exitosa.
 
-    def __exportar_excel(self, reservaciones: dict, fecha: str) -> None:
-        """Exporta las reservaciones a formato XLSX (Excel)
+        Cada formato lleva su propia marca de agua (la última versión exportada),
+        guardada como cursor del registro de cambios. La marca solo avanza si el
+        archivo se escribió correctamente. La primera exportación incluye todo.
 
         Args:
-            reservaciones (dict): Diccionario con los valores de las reservaciones.
-            fecha (str): Fecha de consulta.
+            formato (str): JSON, CSV o EXCEL.
         """
 
-        libro = openpyxl.Workbook()
-        hoja = libro.active
-        hoja.title = f"Reservaciones_{fecha}"
-
-        negrita = Font(bold=True)
-        centrado = Alignment(horizontal="center", vertical="center")
-        borde_grueso = Border(bottom=Side(border_style="thick"))
-
-        encabezados = ["Folio", "Nombre Sala", "Nombre Cliente", "Nombre Evento", "Turno", "Fecha"]
-
-        for columna, titulo in enumerate(encabezados, start=1):
-            celda = hoja.cell(row=1, column=columna, value=titulo)
-            celda.font = negrita
-            celda.alignment = centrado
-            celda.border = borde_grueso
+        formato = formato.upper()
 
-        for renglon, (folio, datos) in enumerate(reservaciones.items(), start=2):
-            hoja.cell(row=renglon, column=1, value=folio).alignment = centrado
-            hoja.cell(row=renglon, column=2, value=datos["nombre_sala"]).alignment = centrado
-            hoja.cell(row=renglon, column=3, value=datos["nombre_cliente"]).alignment = centrado
-            hoja.cell(row=renglon, column=4, value=datos["nombre_evento"]).alignment = centrado
-            hoja.cell(row=renglon, column=5, value=datos["turno"]).alignment = centrado
-            hoja.cell(row=renglon, column=6, value=datos["fecha"]).alignment = centrado
+        if formato not in EXPORTADORES:
+            print("Formato no válido. Opciones disponibles: JSON, CSV, EXCEL.")
+            return
 
-        for column in hoja.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            hoja.column_dimensions[column_letter].width = max_length + 2  # +2 = pequeño margen
+        consumidor = f"exportacion_{formato.lower()}"
+        marca = self.eventos.obtener_cursor(consumidor, -1)
+        if marca is None:
+            return
 
-        libro.save(f"reservaciones_{fecha}.xlsx")
-        print(f"Reservaciones exportadas correctamente a 'reservaciones_{fecha}.xlsx'")
+        modificadas = self.reservaciones.obtener_reservaciones_modificadas(marca)
+        if modificadas is None:
+            return
 
+        if not modificadas:
+            print("No hay cambios desde la última exportación.")
+            return
 
-    def __exportar(self, lista_reservaciones: list, fecha: dt.date) -> None:
-        """Menú que permite elegir el formato a exportar la lista de reservaciones.
+        nueva_marca = modificadas[-1][8]
+        with PerfilMemoria.etapa("armar diccionario"):
+            reservaciones = {
+                fila[0]: {
+                    "nombre_sala": fila[1],
+                    "nombre_cliente": fila[2],
+                    "nombre_evento": fila[3],
+                    "turno": fila[4],
+                    "fecha": fila[5].strftime('%m-%d-%Y'),
+                    "cancelado": fila[6],
+                    "actualizado": fila[7],
+                    }
+                for fila in modificadas
+            }
 
-        Args:
-            lista_reservaciones (list): Lista de tuplas que contiene las reservaciones.
-            fecha (dt.date): Fecha de consulta.
-        """
+        try:
+            with PerfilMemoria.etapa(f"escribir {formato}"):
+                EXPORTADORES[formato](reservaciones, f"cambios_{nueva_marca}")
+        except OSError as e:
+            if self.metricas is not None:
+                self.metricas.registrar_error(type(e).__name__)
+            print(e)
+            return
 
-        formato = input("Seleccione el formato de exportación: JSON, CSV o EXCEL: ").upper()
+        self.eventos.guardar_cursor(consumidor, nueva_marca)
 
-        fecha_str = fecha.strftime('%m-%d-%Y')
-        reservaciones_fecha = {
-            folio[0]: {
-                "nombre_sala": folio[1],
-                "nombre_cliente": folio[2],
-                "nombre_evento": folio[3],
-                "turno": folio[4],
-                "fecha": fecha_str
-                }
-            for folio in lista_reservaciones
-        }
+    @_medido
+    def exportar_lote(self, fecha_inicio: dt.date, fecha_fin: dt.date, formatos: tuple = ("JSON", "CSV", "EXCEL"),
+                      trabajadores: int = None, directorio: str = "") -> list:
+        """Exporta un archivo por día y formato para todas las fechas de un rango.
 
-        if formato == "JSON":
-            self.__exportar_json(reservaciones_fecha, fecha_str)
+        Las reservaciones del rango se leen en una sola consulta y la generación
+        de archivos se reparte entre un grupo de procesos iniciados con spawn.
+        Cada archivo es idéntico al que produce la exportación de un solo día.
 
-        elif formato == "CSV":
-            self.__exportar_csv(reservaciones_fecha, fecha_str)
+        Args:
+            fecha_inicio (dt.date): Fecha de inicio del rango.
+            fecha_fin (dt.date): Fecha fin del rango.
+            formatos (tuple): Formatos a generar (JSON, CSV, EXCEL).
+            trabajadores (int): Número de procesos; por omisión, uno por núcleo. (opcional)
+            directorio (str): Carpeta donde se guardan los archivos. (opcional)
 
-        elif formato == "EXCEL":
-            self.__exportar_excel(reservaciones_fecha, fecha_str)
-        else:
-            print("Formato no válido. Opciones disponibles: JSON, CSV, EXCEL.")
+        Returns:
+            list: Rutas de los archivos generados.
+        """
 
-    def __registrar_reservacion_sala(self) -> None:
-        """Opción #1 del menú. Permite registrar la reservación de una sala.
+        formatos = [formato.upper() for formato in formatos]
+        invalidos = [formato for formato in formatos if formato not in EXPORTADORES]
+        if invalidos:
+            print(f"Formato no válido: {', '.join(invalidos)}. Opciones disponibles: JSON, CSV, EXCEL.")
+            return []
+
+        por_fecha = self.reservaciones.obtener_reservaciones_agrupadas_por_fecha(fecha_inicio, fecha_fin)
+        if not por_fecha:
+            print("No hay reservaciones en el rango especificado.")
+            return []
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        tareas = [(formato, lista, fecha) for fecha, lista in por_fecha.items() for formato in formatos]
+        generados, fallidos = [], []
+        inicio = time.perf_counter()
+
+        # Con fork, los procesos heredarían a medio usar los hilos del agrupador y
+        # de las métricas, las conexiones SQLite de las cachés y el estado de
+        # tracemalloc. Con spawn cada uno arranca un intérprete limpio; los
+        # archivos se generan con los datos recibidos, sin abrir la base de datos.
+        with ProcessPoolExecutor(max_workers=trabajadores, mp_context=multiprocessing.get_context("spawn")) as grupo:
+            futuros = {grupo.submit(_exportar_archivo, formato, lista, fecha, directorio): (formato, fecha) for formato, lista, fecha in tareas}
+
+            for completados, futuro in enumerate(as_completed(futuros), start=1):
+                formato, fecha = futuros[futuro]
+                try:
+                    ruta = futuro.result()
+                    generados.append(ruta)
+                    print(f"[{completados}/{len(tareas)}] {ruta}")
+                except Exception as e:
+                    fallidos.append((formato, fecha))
+                    if self.metricas is not None:
+                        self.metricas.registrar_error(type(e).__name__)
+                    print(f"[{completados}/{len(tareas)}] Error al exportar {fecha.strftime('%m-%d-%Y')} en {formato}: {e}")
+
+        duracion = time.perf_counter() - inicio
+
+        filas = [
+            ["Días con reservaciones", len(por_fecha)],
+            ["Reservaciones", sum(len(lista) for lista in por_fecha.values())],
+            ["Archivos generados", len(generados)],
+            ["Archivos fallidos", len(fallidos)],
+            ["Procesos", trabajadores or os.cpu_count()],
+            ["Duración (s)", f"{duracion:.2f}"],
+        ]
+        print(tabulate(filas, ["Resumen", "Valor"], tablefmt='grid'))
+
+        return sorted(generados)
+
+    def __pedir_cliente(self) -> int:
+        """Muestra los clientes y pide el ID de uno de ellos.
 
         Returns:
-            None: Usado para salir de la función en caso de que el usuario lo decida.
+            int: ID del cliente, o None si el usuario decide salir.
         """
 
-        print("Ha escogido la opción: Registrar reservación de sala")
-
         lista_clientes = self.clientes.obtener_clientes()
-        ids_validos = [cliente[0] for cliente in lista_clientes]
 
         while True:
             self.clientes.mostrar_clientes(lista_clientes)
@@ -718,57 +4877,93 @@ class Coworking:
             try:
                 id_cliente = int(self.__pedir_string("Escriba su ID de cliente: "))
 
-                if id_cliente not in ids_validos:
+                if not self.clientes.existe_cliente(id_cliente):
                     print("ID de cliente no válido.")
                     raise ValueError
             except ValueError:
                 if self.__verificar_salida():
-                    return
+                    return None
                 continue
 
-            break
+            return id_cliente
+
+    def __pedir_fecha_reservable(self) -> dt.date:
+        """Pide una fecha y, si no es reservable, propone la siguiente que sí lo sea.
+
+        Returns:
+            dt.date: Fecha reservable, o None si el usuario decide salir.
+        """
 
         while True:
             try:
                 fecha_str = self.__pedir_string("Escriba la fecha (mm-dd-yyyy): ")
                 fecha = dt.datetime.strptime(fecha_str, "%m-%d-%Y").date()
 
-                fecha_minima = dt.date.today() + dt.timedelta(days=2)
+                fecha_minima = self.calendario.fecha_minima()
 
                 if fecha < fecha_minima:
                     print("La reservación debe ser por lo menos con dos días de anticipación.")
                     continue
 
-                if fecha.weekday() == 6:
-                    print("La fecha solicitada es domingo. No se permiten reservaciones en domingos.")
-                    fecha_propuesta = fecha + dt.timedelta(days=1)
-                    while fecha_propuesta.weekday() == 6:
-                        fecha_propuesta += dt.timedelta(days=1)
+                if not self.calendario.es_reservable(fecha):
+                    dia = self.calendario.obtener_dia(fecha)
+
+                    if dia is None:
+                        print("La fecha solicitada está fuera del calendario de reservaciones.")
+                        continue
+                    elif dia[2]:
+                        print(f"El coworking estará cerrado en la fecha solicitada ({dia[3] or 'cierre'}).")
+                    elif dia[1]:
+                        print(f"La fecha solicitada es día festivo ({dia[3] or 'festivo'}). No se permiten reservaciones en días festivos.")
+                    else:
+                        print("La fecha solicitada es domingo. No se permiten reservaciones en domingos.")
+
+                    fecha_propuesta = self.calendario.siguiente_fecha_reservable(fecha)
+                    if fecha_propuesta is None:
+                        print("No hay fechas reservables posteriores dentro del calendario.")
+                        continue
+
                     aceptar = input(f"Se propone la fecha {fecha_propuesta.strftime('%m-%d-%Y')}. ¿Acepta? (S/N): ").upper()
                     if aceptar == 'S':
                         fecha = fecha_propuesta
                     else:
                         continue
 
-                break
+                return fecha
 
             except ValueError:
                 print("Formato no válido. Por favor, escríbalo de nuevo usando el formato correcto.")
 
                 if self.__verificar_salida():
-                    return
+                    return None
 
                 continue
 
+    def __registrar_reservacion_sala(self) -> None:
+        """Opción #1 del menú. Permite registrar la reservación de una sala.
+
+        Returns:
+            None: Usado para salir de la función en caso de que el usuario lo decida.
+        """
+
+        print("Ha escogido la opción: Registrar reservación de sala")
+
+        id_cliente = self.__pedir_cliente()
+        if id_cliente is None:
+            return
+
+        fecha = self.__pedir_fecha_reservable()
+        if fecha is None:
+            return
 
         lista_salas = self.salas.obtener_salas_disponibles(fecha)
-        ids_sala_validos = [sala[0] for sala in lista_salas]
+        cupos = {sala[0]: sala[2] for sala in lista_salas}
 
         while True:
             self.salas.mostrar_salas_disponibles(fecha, lista_salas)
             try:
                 id_sala = int(self.__pedir_string("Escriba el ID de la sala a escoger: "))
-                if id_sala not in ids_sala_validos:
+                if id_sala not in cupos:
                     print("ID de sala no válido.")
                     raise ValueError
                 break
@@ -779,7 +4974,11 @@ class Coworking:
                 continue
 
         while True:
-            turno = input("Escriba el turno a escoger (Matutino, Vespertino, Nocturno): ").capitalize()
+            turno = input("Escriba el turno a escoger (Matutino, Vespertino, Nocturno) u Horario para reservar por horas: ").capitalize()
+
+            if turno == "Horario":
+                self.__registrar_reservacion_horario(id_cliente, fecha, id_sala)
+                return
 
             if turno not in ("Matutino", "Vespertino", "Nocturno"):
                 print("Turno no válido.")
@@ -789,9 +4988,9 @@ class Coworking:
 
                 continue
 
-            reservado = self.reservaciones.verificar_existencia_reservacion(fecha, id_sala, turno)
+            libres = self.reservaciones.obtener_lugares_libres(fecha, id_sala, turno)
 
-            if reservado:
+            if not libres:
                 print("No hay disponibilidad en ese turno para esta sala.")
                 if self.__verificar_salida():
                     return
@@ -800,7 +4999,29 @@ class Coworking:
 
             break
 
-        print("Hay disponibilidad.")
+        print(f"Hay disponibilidad: {libres} de {cupos[id_sala]} lugares libres.")
+
+        while True:
+            respuesta = input("Escriba el número de asistentes (Enter para reservar la sala completa): ").strip()
+
+            if not respuesta:
+                if libres < cupos[id_sala]:
+                    print("La sala ya tiene asistentes en ese turno; indique cuántos lugares necesita.")
+                    continue
+
+                asistentes = None
+                break
+
+            try:
+                asistentes = int(respuesta)
+                if not 1 <= asistentes <= libres:
+                    print(f"El número de asistentes debe estar entre 1 y {libres}.")
+                    raise ValueError
+                break
+            except ValueError:
+                if self.__verificar_salida():
+                    return
+                continue
 
         while True:
             try:
@@ -811,7 +5032,7 @@ class Coworking:
                     return
                 continue
 
-        self.reservaciones.registrar_reservacion(id_cliente, fecha, turno, id_sala, nombre_evento)
+        self.reservaciones.registrar_reservacion(id_cliente, fecha, turno, id_sala, nombre_evento, asistentes)
 
     def __editar_nombre_reservacion(self) -> None:
         """Opción #2 del menú. Permite editar el nombre de una reservación ya hecha.
@@ -843,7 +5064,7 @@ class Coworking:
                 continue
 
         reservaciones = self.reservaciones.obtener_reservaciones_en_rango(fecha_inicio, fecha_fin)
-        folios_validos = [folio[0] for folio in reservaciones]
+        folios_validos = {folio[0] for folio in reservaciones}
 
         while True:
             try:
@@ -910,7 +5131,7 @@ class Coworking:
 
 
     def __cancelar_reservacion(self) -> None:
-        """Opción #4 del menú. Permite cancelar una reservación.
+        """Opción #4 del menú. Permite cancelar una reservación, por turno o por horario.
 
         Returns:
             None: Usado para salir de la función en caso de que el usuario lo decida.
@@ -941,7 +5162,7 @@ class Coworking:
 
         resultados = self.reservaciones.obtener_reservaciones_en_rango(fecha_inicio, fecha_fin)
         self.reservaciones.mostrar_reservaciones_en_rango(fecha_inicio, fecha_fin, resultados)
-        folios_validos = [folio[0] for folio in resultados]
+        folios_validos = {folio[0] for folio in resultados}
 
         if not resultados:
             print("No hay reservaciones en el rango especificado. Regresando al menú principal.")
@@ -1042,6 +5263,66 @@ class Coworking:
 
         self.salas.registrar_sala(nombre_sala, cupo)
 
+    def __registrar_reservacion_horario(self, id_cliente: int, fecha: dt.date, id_sala: int) -> None:
+        """Parte de la opción #1 del menú. Reserva la sala completa en un horario en lugar de un turno.
+
+        Args:
+            id_cliente (int): ID del cliente.
+            fecha (dt.date): Fecha reservable elegida.
+            id_sala (int): ID de la sala elegida.
+
+        Returns:
+            None: Usado para salir de la función en caso de que el usuario lo decida.
+        """
+
+        self.reservaciones.mostrar_horario_sala(fecha, id_sala)
+
+        while True:
+            try:
+                inicio_str = self.__pedir_string("Escriba la hora de inicio (HH:MM): ")
+                fin_str = self.__pedir_string("Escriba la hora de fin (HH:MM): ")
+                inicio = dt.datetime.strptime(inicio_str, "%H:%M").time()
+                fin = dt.datetime.strptime(fin_str, "%H:%M").time()
+            except ValueError:
+                print("Formato no válido. Por favor, escríbalo de nuevo usando el formato correcto.")
+
+                if self.__verificar_salida():
+                    return
+
+                continue
+
+            try:
+                _minutos_intervalo(inicio, fin)
+            except ValueError as e:
+                print(e)
+
+                if self.__verificar_salida():
+                    return
+
+                continue
+
+            if self.reservaciones.verificar_traslape(fecha, id_sala, inicio, fin):
+                print("El horario se traslapa con otra reservación de la sala.")
+                if self.__verificar_salida():
+                    return
+
+                continue
+
+            break
+
+        print("Hay disponibilidad.")
+
+        while True:
+            try:
+                nombre_evento = self.__pedir_string("Escriba el nombre del evento: ")
+                break
+            except ValueError:
+                if self.__verificar_salida():
+                    return
+                continue
+
+        self.reservaciones.registrar_reservacion_intervalo(id_cliente, fecha, inicio, fin, id_sala, nombre_evento)
+
     def mostrar_menu(self) -> None:
         """Muestra al usuario una interfaz de texto para poder realizar diversas acciones dentro del coworking."""
 
@@ -1061,7 +5342,7 @@ class Coworking:
                     opcion = int(input("Escribe el número de la opción que vas a escoger: "))
 
                     if opcion < 1 or opcion > 7:
-                        print("ERROR: Opción no válida. Escoge entre 1 y 6.")
+                        print("ERROR: Opción no válida. Escoge entre 1 y 7.")
                         continue
 
                 except ValueError:
@@ -1088,9 +5369,227 @@ class Coworking:
                     confirmar = input("¿Desea salir del programa, los datos se guardaran en la base de datos? (S/N): ").upper()
                     if confirmar == "S":
                         print("Saliendo del programa...")
+                        self.cerrar()
                         break
 
+
+def _leer_fecha(texto: str) -> dt.date:
+    """Convierte un argumento mm-dd-yyyy de la línea de comandos en fecha."""
+
+    try:
+        return dt.datetime.strptime(texto, "%m-%d-%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha no válida: {texto}. Use el formato mm-dd-yyyy.")
+
+
+def _leer_posicion(texto: str) -> tuple:
+    """Convierte un argumento mm-dd-yyyy:folio de la línea de comandos en (fecha, folio)."""
+
+    fecha, _, folio = texto.partition(":")
+    if not folio.isdigit():
+        raise argparse.ArgumentTypeError(f"Posición no válida: {texto}. Use el formato mm-dd-yyyy:folio.")
+    return _leer_fecha(fecha), int(folio)
+
+
+def _agregar_opciones_bd(parser: argparse.ArgumentParser) -> None:
+    """Agrega los argumentos de agrupación de escrituras y de concurrencia de la base de datos."""
+
+    parser.add_argument("--agrupar-escrituras", action="store_true", help="Confirma las escrituras en lotes.")
+    parser.add_argument("--max-operaciones-lote", type=int, default=64, help="Máximo de escrituras por lote.")
+    parser.add_argument("--intervalo-lote-ms", type=float, default=5, help="Espera máxima para completar un lote.")
+    parser.add_argument("--durabilidad", default="FULL", choices=AgrupadorEscrituras.DURABILIDADES,
+                        help="PRAGMA synchronous del escritor agrupado.")
+    parser.add_argument("--tiempo-espera-bd", type=float, default=5.0,
+                        help="Segundos que se espera a que otra terminal libere la base de datos.")
+    parser.add_argument("--max-reintentos", type=int, default=5, help="Reintentos de una escritura bloqueada.")
+    parser.add_argument("--wal", action="store_true", help="Activa el journal WAL (no usar en carpetas de red).")
+    parser.add_argument("--tamano-cache", type=int, default=256, help="Fechas consultadas que se guardan en caché (0 la desactiva).")
+
+
+def _leer_opciones_bd(argumentos: argparse.Namespace) -> tuple:
+    """Separa los argumentos de _agregar_opciones_bd en opciones del agrupador y de concurrencia.
+
+    Returns:
+        tuple: (opciones_lote, opciones_concurrencia), listas para pasarse a Coworking.
+    """
+
+    opciones_lote = {
+        "max_operaciones_lote": argumentos.max_operaciones_lote,
+        "intervalo_lote_ms": argumentos.intervalo_lote_ms,
+        "durabilidad": argumentos.durabilidad,
+    }
+    opciones_concurrencia = {
+        "tiempo_espera_bd": argumentos.tiempo_espera_bd,
+        "max_reintentos": argumentos.max_reintentos,
+        "modo_wal": argumentos.wal,
+        "tamano_cache": argumentos.tamano_cache,
+    }
+
+    return opciones_lote, opciones_concurrencia
+
+
+def _crear_argumentos() -> argparse.ArgumentParser:
+    """Define los argumentos de línea de comandos del programa."""
+
+    parser = argparse.ArgumentParser(description="Programa del coworking.")
+    parser.add_argument("--bd", default=RUTA_BD, help="Ruta de la base de datos.")
+    _agregar_opciones_bd(parser)
+    parser.add_argument("--metricas-archivo", help="Archivo .prom que se reescribe con las métricas en formato Prometheus.")
+    parser.add_argument("--metricas-intervalo", type=float, default=15.0, help="Segundos entre escrituras del archivo de métricas.")
+    parser.add_argument("--metricas-puerto", type=int, help="Sirve las métricas en http://127.0.0.1:PUERTO/metrics.")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        help="Mide con tracemalloc la memoria de cada operación y la muestra al salir.")
+
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    cambios = subcomandos.add_parser("cambios", help="Imprime como JSON los cambios de reservaciones posteriores a una secuencia.")
+    cambios.add_argument("--desde", type=int, help="Última secuencia procesada.")
+    cambios.add_argument("--consumidor", help="Lee y guarda la secuencia de este consumidor.")
+    cambios.add_argument("--limite", type=int, default=100)
+    cambios.add_argument("--seguir", action="store_true", help="Sigue imprimiendo los cambios a medida que ocurren.")
+
+    exportacion = subcomandos.add_parser("exportar-cambios", help="Exporta las reservaciones modificadas desde la última exportación.")
+    exportacion.add_argument("--formato", default="JSON", type=str.upper, choices=("JSON", "CSV", "EXCEL"))
+
+    lote = subcomandos.add_parser("exportar-lote", help="Exporta un archivo por día y formato para un rango de fechas.")
+    lote.add_argument("--desde", required=True, type=_leer_fecha, help="Fecha de inicio (mm-dd-yyyy).")
+    lote.add_argument("--hasta", required=True, type=_leer_fecha, help="Fecha fin (mm-dd-yyyy).")
+    lote.add_argument("--formatos", nargs="+", type=str.upper, default=["JSON", "CSV", "EXCEL"], choices=("JSON", "CSV", "EXCEL"))
+    lote.add_argument("--trabajadores", type=int, help="Número de procesos (por omisión, uno por núcleo).")
+    lote.add_argument("--directorio", default="", help="Carpeta de salida.")
+
+    respaldo = subcomandos.add_parser("respaldar", help="Respalda la base de datos sin detener las terminales.")
+    respaldo.add_argument("--directorio", default="respaldos", help="Carpeta de los respaldos.")
+    respaldo.add_argument("--paginas-por-paso", type=int, default=256, help="Páginas copiadas en cada paso.")
+    respaldo.add_argument("--pausa", type=float, default=0.05, help="Segundos de espera entre pasos.")
+    respaldo.add_argument("--conservar", type=int, default=7, help="Respaldos más recientes a conservar (0 para todos).")
+    respaldo.add_argument("--sin-verificar", action="store_true", help="Omite la verificación de integridad.")
+
+    for nombre, ayuda, opcion in (("historial-cliente", "Muestra las reservaciones de un cliente.", "--cliente"),
+                                  ("agenda-sala", "Muestra la agenda de una sala.", "--sala")):
+        historial = subcomandos.add_parser(nombre, help=ayuda)
+        historial.add_argument(opcion, required=True, type=int, dest="id_buscado")
+        historial.add_argument("--desde", type=_leer_fecha, help="Fecha de inicio (mm-dd-yyyy).")
+        historial.add_argument("--hasta", type=_leer_fecha, help="Fecha fin (mm-dd-yyyy).")
+        historial.add_argument("--despues", type=_leer_posicion, help="Dónde terminó la página anterior (mm-dd-yyyy:folio).")
+        historial.add_argument("--por-pagina", type=int, default=50)
+        historial.add_argument("--canceladas", action="store_true", help="Incluye las reservaciones canceladas.")
+
+    horario = subcomandos.add_parser("horario-sala", help="Muestra las reservaciones por horario y los horarios libres de una sala.")
+    horario.add_argument("--sala", required=True, type=int)
+    horario.add_argument("--fecha", required=True, type=_leer_fecha, help="Fecha a consultar (mm-dd-yyyy).")
+    horario.add_argument("--duracion-minima", type=int, default=MINUTOS_INTERVALO, help="Minutos mínimos de un horario libre.")
+
+    cancelacion = subcomandos.add_parser("cancelar-reservacion", help="Cancela una reservación por turno o por horario.")
+    cancelacion.add_argument("--folio", required=True, type=int)
+
+    asistencia = subcomandos.add_parser("registrar-asistencia", help="Registra si el cliente se presentó a su reservación.")
+    asistencia.add_argument("--folio", required=True, type=int)
+    asistencia.add_argument("--no-se-presento", action="store_true", help="El cliente no se presentó.")
+
+    frecuentes = subcomandos.add_parser("clientes-frecuentes",
+                                        help="Muestra los clientes con más reservaciones, sus cancelaciones e inasistencias.")
+    frecuentes.add_argument("--desde", type=_leer_fecha, help="Fecha de inicio (mm-dd-yyyy).")
+    frecuentes.add_argument("--hasta", type=_leer_fecha, help="Fecha fin (mm-dd-yyyy).")
+    frecuentes.add_argument("--limite", type=int, default=10)
+
+    return parser
+
+
 if __name__ == "__main__":
-    programa = Coworking()
+    argumentos = _crear_argumentos().parse_args()
+    opciones_lote, opciones_concurrencia = _leer_opciones_bd(argumentos)
+
+    metricas = None
+    if argumentos.metricas_archivo or argumentos.metricas_puerto:
+        metricas = Metricas()
+        if argumentos.metricas_archivo:
+            metricas.iniciar_archivo(argumentos.metricas_archivo, argumentos.metricas_intervalo)
+        if argumentos.metricas_puerto:
+            metricas.iniciar_servidor(argumentos.metricas_puerto)
+        atexit.register(metricas.detener)
+
+    if argumentos.perfil_memoria:
+        perfil_memoria = PerfilMemoria()
+        perfil_memoria.iniciar()
+        atexit.register(perfil_memoria.mostrar)
+
+    match argumentos.comando:
+        case "exportar-cambios":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            programa.exportar_cambios(argumentos.formato)
+        case "exportar-lote":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            if argumentos.desde > argumentos.hasta:
+                print("La fecha de inicio no puede ser posterior a la de fin.")
+                sys.exit(1)
+            programa.exportar_lote(argumentos.desde, argumentos.hasta, argumentos.formatos, argumentos.trabajadores, argumentos.directorio)
+        case "respaldar":
+            if not os.path.exists(argumentos.bd):
+                print(f"No se encontró la base de datos '{argumentos.bd}'.")
+                sys.exit(1)
+
+            almacenamiento = AlmacenamientoSQLite(argumentos.bd, **opciones_concurrencia)
+            try:
+                resumen = almacenamiento.respaldar(argumentos.directorio, argumentos.paginas_por_paso, argumentos.pausa,
+                                                   argumentos.conservar, not argumentos.sin_verificar)
+            except (Error, OSError) as e:
+                print(e)
+                sys.exit(1)
+
+            filas = [
+                ["Respaldo", resumen["ruta"]],
+                ["Páginas", resumen["paginas"]],
+                ["Bytes", resumen["bytes"]],
+                ["Pasos", resumen["pasos"]],
+                ["Reinicios por escrituras", resumen["reinicios"]],
+                ["Copia final forzada (bloqueante)", "Sí" if resumen["copia_forzada"] else "No"],
+                ["Duración (s)", f"{resumen['duracion']:.2f}"],
+                ["Respaldos eliminados", len(resumen["eliminados"])],
+            ]
+            print(tabulate(filas, ["Resumen", "Valor"], tablefmt='grid'))
+        case "historial-cliente":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            resultado = programa.reservaciones.obtener_reservaciones_por_cliente(
+                argumentos.id_buscado, argumentos.desde, argumentos.hasta, argumentos.despues, argumentos.por_pagina, argumentos.canceladas)
+            programa.reservaciones.mostrar_pagina(resultado, ['Folio', 'Fecha', 'Turno', 'ID sala', 'Sala', 'Nombre del evento', 'Cancelada'])
+        case "agenda-sala":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            resultado = programa.reservaciones.obtener_agenda_sala(
+                argumentos.id_buscado, argumentos.desde, argumentos.hasta, argumentos.despues, argumentos.por_pagina, argumentos.canceladas)
+            programa.reservaciones.mostrar_pagina(resultado, ['Folio', 'Fecha', 'Turno', 'ID cliente', 'Cliente', 'Nombre del evento', 'Cancelada'])
+        case "horario-sala":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            programa.reservaciones.mostrar_horario_sala(argumentos.fecha, argumentos.sala, argumentos.duracion_minima)
+        case "cancelar-reservacion":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            programa.reservaciones.cancelar_reservación(argumentos.folio)
+        case "registrar-asistencia":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            programa.reservaciones.registrar_asistencia(argumentos.folio, not argumentos.no_se_presento)
+        case "clientes-frecuentes":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            programa.clientes.mostrar_clientes_frecuentes(argumentos.desde, argumentos.hasta, argumentos.limite)
+        case "cambios":
+            programa = Coworking(argumentos.bd, **opciones_concurrencia, metricas=metricas)
+            desde = argumentos.desde
+            if desde is None:
+                desde = programa.eventos.obtener_cursor(argumentos.consumidor) if argumentos.consumidor else 0
+
+            if argumentos.seguir:
+                eventos = programa.eventos.seguir_cambios(desde, argumentos.limite)
+            else:
+                eventos = programa.eventos.obtener_cambios(desde, argumentos.limite) or []
 
-    programa.mostrar_menu()
\ No newline at end of file
+            try:
+                for secuencia, folio, tipo, datos, momento in eventos:
+                    print(json.dumps({"secuencia": secuencia, "folio": folio, "tipo": tipo, "datos": datos, "momento": momento},
+                                     ensure_ascii=False), flush=True)
+                    if argumentos.consumidor:
+                        programa.eventos.guardar_cursor(argumentos.consumidor, secuencia)
+            except KeyboardInterrupt:
+                pass
+        case _:
+            programa = Coworking(argumentos.bd, argumentos.agrupar_escrituras, **opciones_lote, **opciones_concurrencia, metricas=metricas)
+
+            programa.mostrar_menu()
\ No newline at end of file
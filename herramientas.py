@@ -0,0 +1,490 @@
+"""Herramientas de medición del coworking.
+
+Las mediciones de rendimiento y la prueba de carga que antes eran subcomandos
+de coworking.py. No forman parte del programa: crean sus propias bases de datos
+temporales y solo importan de coworking lo que miden. Las verificaciones con
+resultado de éxito o falla están en tests/ y se corren con pytest.
+"""
+
+import argparse
+import contextlib
+import datetime as dt
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from tabulate import tabulate
+
+from coworking import (Almacenamiento, AlmacenamientoMemoria, AlmacenamientoSQLite, Coworking, Metricas, _agregar_opciones_bd,
+                       _leer_opciones_bd)
+
+# Peso relativo de cada operación en la prueba de carga.
+MEZCLA_CARGA = {
+    "disponibilidad": 40,
+    "verificar": 30,
+    "reservar": 15,
+    "renombrar": 10,
+    "cancelar": 5,
+}
+
+
+def medir_escrituras(operaciones: int = 2000, hilos: int = 16, agrupar_escrituras: bool = False, **opciones_lote) -> float:
+    """Mide las escrituras por segundo de varios hilos registrando clientes en una base temporal.
+
+    Args:
+        operaciones (int): Total de escrituras a realizar.
+        hilos (int): Número de hilos escritores concurrentes.
+        agrupar_escrituras (bool): Si es True, se usa el agrupador de escrituras.
+        **opciones_lote: Opciones del agrupador (max_operaciones_lote, intervalo_lote_ms, durabilidad).
+
+    Returns:
+        float: Escrituras confirmadas por segundo.
+    """
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_bd = os.path.join(directorio, "medicion.db")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            programa = Coworking(ruta_bd, agrupar_escrituras, **opciones_lote)
+
+        def escribir(indice_hilo: int) -> None:
+            for i in range(indice_hilo, operaciones, hilos):
+                programa.clientes.registrar_cliente(f"Cliente {i}", "Medición")
+
+        trabajadores = [threading.Thread(target=escribir, args=(i,)) for i in range(hilos)]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            for trabajador in trabajadores:
+                trabajador.start()
+            for trabajador in trabajadores:
+                trabajador.join()
+            programa.cerrar()
+            duracion = time.perf_counter() - inicio
+
+        with sqlite3.connect(ruta_bd) as conn:
+            confirmadas = conn.execute("SELECT COUNT(*) FROM clientes;").fetchone()[0]
+        conn.close()
+
+    return confirmadas / duracion
+
+
+def _percentil(valores: list, percentil: float) -> float:
+    """Obtiene un percentil por rango más cercano de una lista ya ordenada."""
+
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(percentil / 100 * len(valores)))]
+
+
+def _cliente_de_carga(ruta_bd: str, indice: int, duracion: float, mezcla: dict, fechas: list, salas: int,
+                      clientes: int, folios: int, opciones: dict, barrera, resultados) -> None:
+    """Cliente que ejecuta operaciones al azar según la mezcla hasta que se agota la duración.
+
+    Args:
+        ruta_bd (str): Ruta de la base de datos compartida.
+        indice (int): Número del cliente; también es la semilla de sus operaciones.
+        duracion (float): Segundos de carga.
+        mezcla (dict): Peso relativo de cada operación.
+        fechas (list): Fechas sobre las que se consulta y reserva.
+        salas (int): Número de salas registradas.
+        clientes (int): Número de clientes registrados.
+        folios (int): Folios sembrados que se pueden renombrar o cancelar.
+        opciones (dict): Opciones de Coworking (tiempo de espera, reintentos, etc.).
+        barrera (threading.Barrier | multiprocessing.Barrier): Sincroniza el arranque de todos los clientes.
+        resultados (queue.Queue | multiprocessing.Queue): Cola donde se reportan las latencias y contadores.
+    """
+
+    generador = random.Random(indice)
+    metricas = Metricas()
+    programa = Coworking(ruta_bd, **opciones, metricas=metricas)
+    operaciones, pesos = list(mezcla), list(mezcla.values())
+    latencias = {operacion: [] for operacion in operaciones}
+    barrera.wait()
+
+    # Reloj de pared para poder comparar los tiempos de distintos procesos.
+    comienzo = time.time()
+    limite = time.perf_counter() + duracion
+    while time.perf_counter() < limite:
+        operacion = generador.choices(operaciones, pesos)[0]
+        fecha = generador.choice(fechas)
+        id_sala = generador.randint(1, salas)
+        turno = generador.choice(("Matutino", "Vespertino", "Nocturno"))
+
+        inicio = time.perf_counter()
+        match operacion:
+            case "disponibilidad":
+                programa.salas.obtener_salas_disponibles(fecha)
+            case "verificar":
+                programa.reservaciones.verificar_existencia_reservacion(fecha, id_sala, turno)
+            case "reservar":
+                # Igual que en el menú: se consultan los lugares libres y, si alcanzan, se reserva.
+                asistentes = generador.randint(1, 4)
+                if programa.reservaciones.obtener_lugares_libres(fecha, id_sala, turno) >= asistentes:
+                    programa.reservaciones.registrar_reservacion(generador.randint(1, clientes), fecha, turno, id_sala,
+                                                                 f"Carga {indice}", asistentes)
+            case "renombrar":
+                programa.reservaciones.editar_nombre_evento(generador.randint(1, folios), f"Renombrada por {indice}")
+            case "cancelar":
+                programa.reservaciones.cancelar_reservación(generador.randint(1, folios))
+        latencias[operacion].append(time.perf_counter() - inicio)
+
+    termino = time.time()
+    programa.cerrar()
+
+    errores = {}
+    for (_, tipo), total in metricas.errores().items():
+        errores[tipo] = errores.get(tipo, 0) + total
+
+    cache = getattr(programa.almacenamiento, "cache", None)
+    resultados.put({"latencias": latencias, "errores": errores, "comienzo": comienzo, "termino": termino,
+                    "concurrencia": programa.almacenamiento.concurrencia.estadisticas(),
+                    "cache": cache.estadisticas() if cache is not None else {}})
+
+
+def _proceso_de_carga(*argumentos) -> None:
+    """Ejecuta un cliente de carga en su propio proceso, sin imprimir los mensajes del programa."""
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _cliente_de_carga(*argumentos)
+
+
+def probar_carga(clientes: int = 8, duracion: float = 10.0, procesos: bool = False, mezcla: dict = None, salas: int = 10,
+                 dias: int = 30, ocupacion: float = 0.3, etiqueta: str = None, **opciones) -> dict:
+    """Somete una base de datos sembrada a varios clientes concurrentes y resume su comportamiento.
+
+    Cada cliente tiene su propia instancia de Coworking y ejecuta una mezcla de consultas de
+    disponibilidad, verificaciones, reservaciones, renombres y cancelaciones. Al terminar se
+    buscan turnos con más asistentes que el cupo de la sala y contadores de ocupación que
+    no coinciden con la suma de las reservaciones.
+
+    Args:
+        clientes (int): Número de clientes concurrentes.
+        duracion (float): Segundos de carga.
+        procesos (bool): Si es True, cada cliente es un proceso; si no, un hilo.
+        mezcla (dict): Peso relativo de cada operación; por omisión MEZCLA_CARGA. (opcional)
+        salas (int): Salas de la base de datos sembrada.
+        dias (int): Días reservables sobre los que se opera.
+        ocupacion (float): Fracción de turnos reservados antes de empezar.
+        etiqueta (str): Nombre de la versión o configuración medida. (opcional)
+        **opciones: Opciones de Coworking (tiempo_espera_bd, max_reintentos, modo_wal, agrupar_escrituras...).
+
+    Returns:
+        dict: Resumen de la prueba, serializable como JSON.
+    """
+
+    mezcla = mezcla or MEZCLA_CARGA
+    semilla = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_bd = os.path.join(directorio, "carga.db")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            programa = Coworking(ruta_bd, **opciones)
+            fecha_minima = programa.calendario.fecha_minima()
+            fechas = programa.calendario.obtener_fechas_reservables(fecha_minima, fecha_minima + dt.timedelta(days=dias - 1))
+
+            almacenamiento = programa.almacenamiento
+            for i in range(50):
+                almacenamiento.insertar_cliente(f"Cliente {i + 1}", "Carga")
+            for i in range(salas):
+                almacenamiento.insertar_sala(f"Sala {i + 1}", 10)
+
+            folios = 0
+            for fecha in fechas:
+                for id_sala in range(1, salas + 1):
+                    for id_turno in (1, 2, 3):
+                        if semilla.random() < ocupacion:
+                            almacenamiento.insertar_reservacion(semilla.randint(1, 50), fecha, id_turno, id_sala, "Sembrada")
+                            folios += 1
+            programa.cerrar()
+
+        if procesos:
+            barrera, resultados = multiprocessing.Barrier(clientes), multiprocessing.Queue()
+            crear, destino = multiprocessing.Process, _proceso_de_carga
+        else:
+            barrera, resultados = threading.Barrier(clientes), queue.Queue()
+            crear, destino = threading.Thread, _cliente_de_carga
+
+        trabajadores = [
+            crear(target=destino, args=(ruta_bd, i + 1, duracion, mezcla, fechas, salas, 50, max(folios, 1), opciones, barrera, resultados))
+            for i in range(clientes)
+        ]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for trabajador in trabajadores:
+                trabajador.start()
+            reportes = [resultados.get() for _ in trabajadores]
+            for trabajador in trabajadores:
+                trabajador.join()
+
+        # Las operaciones por segundo se calculan sobre el tiempo que de verdad
+        # duró la carga, que puede pasar de `duracion` si los clientes se atrasan.
+        transcurrido = max(reporte["termino"] for reporte in reportes) - min(reporte["comienzo"] for reporte in reportes)
+
+        with sqlite3.connect(ruta_bd) as conn:
+            registradas = conn.execute("SELECT COUNT(*) FROM reservaciones;").fetchone()[0] - folios
+            sobrecupo = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(ocupados - cupo), 0) FROM (
+                    SELECT SUM(r.asistentes) AS ocupados, s.cupo
+                    FROM reservaciones r
+                    JOIN salas s ON s.id_sala = r.id_sala
+                    WHERE r.cancelado IS NULL
+                    AND r.id_turno IS NOT NULL
+                    GROUP BY r.fecha, r.id_sala, r.id_turno
+                    HAVING SUM(r.asistentes) > s.cupo
+                );
+            """).fetchone()
+            inconsistentes = conn.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT fecha, id_sala, id_turno, SUM(asistentes) AS ocupados
+                    FROM reservaciones
+                    WHERE cancelado IS NULL
+                    AND id_turno IS NOT NULL
+                    GROUP BY fecha, id_sala, id_turno
+                ) AS r
+                FULL JOIN ocupacion_turnos o USING (fecha, id_sala, id_turno)
+                WHERE COALESCE(r.ocupados, 0) <> COALESCE(o.ocupados, 0);
+            """).fetchone()[0]
+        conn.close()
+
+    operaciones = {}
+    for operacion in mezcla:
+        valores = sorted(itertools.chain.from_iterable(reporte["latencias"][operacion] for reporte in reportes))
+        operaciones[operacion] = {
+            "total": len(valores),
+            "por_segundo": len(valores) / transcurrido,
+            "p50_ms": _percentil(valores, 50) * 1000,
+            "p95_ms": _percentil(valores, 95) * 1000,
+            "p99_ms": _percentil(valores, 99) * 1000,
+            "max_ms": (valores[-1] if valores else 0.0) * 1000,
+        }
+
+    errores = {}
+    for reporte in reportes:
+        for tipo, total in reporte["errores"].items():
+            errores[tipo] = errores.get(tipo, 0) + total
+
+    total = sum(operacion["total"] for operacion in operaciones.values())
+    return {
+        "etiqueta": etiqueta,
+        "momento": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "modo": "procesos" if procesos else "hilos",
+        "clientes": clientes,
+        "duracion": duracion,
+        "transcurrido": transcurrido,
+        "mezcla": mezcla,
+        "opciones": opciones,
+        "sembradas": folios,
+        "operaciones": operaciones,
+        "total": total,
+        "por_segundo": total / transcurrido,
+        "errores": errores,
+        "concurrencia": {contador: sum(reporte["concurrencia"][contador] for reporte in reportes)
+                         for contador in reportes[0]["concurrencia"]},
+        "cache": {contador: sum(reporte["cache"][contador] for reporte in reportes) for contador in reportes[0]["cache"]},
+        "registradas": registradas,
+        "turnos_sobrecupo": sobrecupo[0],
+        "lugares_excedidos": sobrecupo[1],
+        "contadores_inconsistentes": inconsistentes,
+    }
+
+
+def mostrar_carga(resultado: dict) -> None:
+    """Muestra en formato tabular el resumen de una prueba de carga.
+
+    Args:
+        resultado (dict): Resumen devuelto por probar_carga.
+    """
+
+    filas = [[operacion, datos["total"], f"{datos['por_segundo']:.0f}", f"{datos['p50_ms']:.2f}",
+              f"{datos['p95_ms']:.2f}", f"{datos['p99_ms']:.2f}", f"{datos['max_ms']:.2f}"]
+             for operacion, datos in resultado["operaciones"].items()]
+    filas.append(["Total", resultado["total"], f"{resultado['por_segundo']:.0f}", "", "", "", ""])
+    print(tabulate(filas, ["Operación", "Llamadas", "Op/s", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Máx. (ms)"], tablefmt='grid'))
+
+    concurrencia = resultado["concurrencia"]
+    filas = [
+        ["Clientes", f"{resultado['clientes']} ({resultado['modo']})"],
+        ["Reservaciones registradas", resultado["registradas"]],
+        ["Esperas por bloqueo", concurrencia["esperas_bloqueo"]],
+        ["Segundos esperando bloqueo", f"{concurrencia['segundos_bloqueo']:.3f}"],
+        ["Errores de bloqueo", concurrencia["errores_bloqueo"]],
+        ["Reintentos", concurrencia["reintentos"]],
+        ["Abandonos", concurrencia["abandonos"]],
+    ]
+    if resultado.get("cache"):
+        filas += [
+            ["Aciertos de caché", resultado["cache"]["aciertos"]],
+            ["Fallos de caché", resultado["cache"]["fallos"]],
+        ]
+    filas += [[f"Errores {tipo}", total] for tipo, total in sorted(resultado["errores"].items())]
+    filas += [
+        ["Turnos con sobrecupo", resultado["turnos_sobrecupo"]],
+        ["Lugares excedidos", resultado["lugares_excedidos"]],
+        ["Contadores inconsistentes", resultado["contadores_inconsistentes"]],
+    ]
+    print(tabulate(filas, ["Métrica", "Valor"], tablefmt='grid'))
+
+
+def comparar_cargas(ruta: str, ultimas: int = 5) -> None:
+    """Muestra lado a lado las últimas pruebas de carga guardadas en un archivo JSON Lines.
+
+    Args:
+        ruta (str): Archivo donde probar_carga guarda sus resultados.
+        ultimas (int): Número de pruebas a comparar.
+    """
+
+    with open(ruta, encoding="utf-8") as archivo:
+        resultados = [json.loads(linea) for linea in archivo if linea.strip()][-ultimas:]
+
+    filas = [[resultado["etiqueta"] or "-", resultado["momento"], f"{resultado['clientes']} {resultado['modo']}",
+              f"{resultado['por_segundo']:.0f}",
+              f"{resultado['operaciones'].get('reservar', {}).get('p95_ms', 0.0):.2f}",
+              f"{resultado['operaciones'].get('disponibilidad', {}).get('p95_ms', 0.0):.2f}",
+              resultado["concurrencia"]["errores_bloqueo"], resultado["concurrencia"]["abandonos"],
+              resultado.get("turnos_sobrecupo", resultado.get("turnos_duplicados"))]
+             for resultado in resultados]
+    print(tabulate(filas, ["Etiqueta", "Momento", "Clientes", "Op/s", "p95 reservar (ms)", "p95 disponibilidad (ms)",
+                           "Errores de bloqueo", "Abandonos", "Turnos con sobrecupo"], tablefmt='grid'))
+
+
+def medir_almacenamiento(crear_almacenamiento: Callable[[], Almacenamiento], reservaciones: int = 2000) -> dict:
+    """Mide las operaciones por segundo de un almacenamiento con un conjunto de datos sintético.
+
+    Args:
+        crear_almacenamiento (Callable): Función que devuelve un almacenamiento vacío.
+        reservaciones (int): Número de reservaciones a registrar.
+
+    Returns:
+        dict: Operaciones por segundo de cada tipo de operación.
+    """
+
+    salas = 10
+    inicio = dt.date(2100, 1, 4)
+    dias = -(-reservaciones // (salas * 3))
+    # Los domingos no admiten reservaciones.
+    naturales = (inicio + dt.timedelta(days=i) for i in itertools.count())
+    fechas = list(itertools.islice((fecha for fecha in naturales if fecha.weekday() != 6), dias))
+    turnos = [(fecha, id_sala, id_turno) for fecha in fechas for id_sala in range(1, salas + 1) for id_turno in (1, 2, 3)]
+    turnos = turnos[:reservaciones]
+
+    almacenamiento = crear_almacenamiento()
+    try:
+        almacenamiento.agregar_fechas(fechas)
+        for i in range(20):
+            almacenamiento.insertar_cliente(f"Cliente {i}", "Medición")
+        for i in range(salas):
+            almacenamiento.insertar_sala(f"Sala {i + 1}", 10)
+
+        def medir(operaciones: list, operacion: Callable) -> float:
+            comienzo = time.perf_counter()
+            for argumentos in operaciones:
+                operacion(*argumentos)
+            return len(operaciones) / (time.perf_counter() - comienzo)
+
+        return {
+            "Registrar reservación": medir(turnos, lambda fecha, id_sala, id_turno: almacenamiento.insertar_reservacion(
+                id_sala, fecha, id_turno, id_sala, "Medición")),
+            "Verificar existencia": medir(turnos, almacenamiento.existe_reservacion),
+            "Salas disponibles": medir([(fecha,) for fecha in fechas], almacenamiento.obtener_salas_disponibles),
+            "Reservaciones por fecha": medir([(fecha, fecha) for fecha in fechas],
+                                             lambda desde, hasta: list(almacenamiento.iterar_reservaciones_en_rango(desde, hasta))),
+            "Cancelar reservación": medir([(folio,) for folio in range(1, len(turnos) + 1, 2)], almacenamiento.cancelar_reservacion),
+        }
+    finally:
+        almacenamiento.cerrar()
+
+
+def _crear_argumentos() -> argparse.ArgumentParser:
+    """Define los argumentos de línea de comandos de las herramientas."""
+
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento del coworking.")
+    _agregar_opciones_bd(parser)
+
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    medicion = subcomandos.add_parser("medir-escrituras", help="Compara escrituras por segundo con y sin agrupación.")
+    medicion.add_argument("--operaciones", type=int, default=2000)
+    medicion.add_argument("--hilos", type=int, default=16)
+
+    almacenamiento = subcomandos.add_parser("medir-almacenamiento",
+                                            help="Compara las operaciones por segundo de los almacenamientos SQLite y en memoria.")
+    almacenamiento.add_argument("--reservaciones", type=int, default=2000, help="Reservaciones de la medición.")
+
+    carga = subcomandos.add_parser("probar-carga", help="Somete una base de datos sembrada a varios clientes concurrentes.")
+    carga.add_argument("--clientes", type=int, default=8)
+    carga.add_argument("--duracion", type=float, default=10.0, help="Segundos de carga.")
+    carga.add_argument("--procesos", action="store_true", help="Un proceso por cliente en lugar de un hilo.")
+    carga.add_argument("--mezcla", nargs="+", metavar="OPERACION=PESO",
+                       help=f"Peso de cada operación ({', '.join(MEZCLA_CARGA)}); las omitidas no se ejecutan.")
+    carga.add_argument("--salas", type=int, default=10)
+    carga.add_argument("--dias", type=int, default=30, help="Días reservables sobre los que se opera.")
+    carga.add_argument("--ocupacion", type=float, default=0.3, help="Fracción de turnos reservados antes de empezar.")
+    carga.add_argument("--etiqueta", help="Nombre de la versión o configuración medida.")
+    carga.add_argument("--resultados", default="pruebas_carga.jsonl", help="Archivo JSON Lines donde se agregan los resultados.")
+    carga.add_argument("--comparar", type=int, default=5, help="Pruebas guardadas a mostrar lado a lado (0 para ninguna).")
+
+    return parser
+
+
+if __name__ == "__main__":
+    argumentos = _crear_argumentos().parse_args()
+    opciones_lote, opciones_concurrencia = _leer_opciones_bd(argumentos)
+
+    match argumentos.comando:
+        case "medir-escrituras":
+            sin_agrupar = medir_escrituras(argumentos.operaciones, argumentos.hilos)
+            agrupadas = medir_escrituras(argumentos.operaciones, argumentos.hilos, True, **opciones_lote)
+            print(tabulate([["Sin agrupar", f"{sin_agrupar:.0f}"], ["Agrupadas", f"{agrupadas:.0f}"]],
+                           ["Modo", "Escrituras/s"], tablefmt='grid'))
+        case "medir-almacenamiento":
+            with tempfile.TemporaryDirectory() as directorio:
+                bases = (os.path.join(directorio, f"almacenamiento_{i}.db") for i in itertools.count())
+
+                def crear_sqlite() -> Almacenamiento:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        return AlmacenamientoSQLite(next(bases), **opciones_concurrencia)
+
+                implementaciones = {"SQLite": crear_sqlite, "Memoria": AlmacenamientoMemoria}
+                mediciones = {nombre: medir_almacenamiento(crear, argumentos.reservaciones) for nombre, crear in implementaciones.items()}
+
+            filas = [[operacion] + [f"{mediciones[nombre][operacion]:.0f}" for nombre in implementaciones]
+                     for operacion in mediciones["SQLite"]]
+            print(tabulate(filas, ["Operación"] + [f"{nombre} (op/s)" for nombre in implementaciones], tablefmt='grid'))
+        case "probar-carga":
+            mezcla = None
+            if argumentos.mezcla:
+                try:
+                    mezcla = {operacion: float(peso) for operacion, _, peso in (par.partition("=") for par in argumentos.mezcla)}
+                except ValueError:
+                    print("La mezcla debe tener la forma OPERACION=PESO.")
+                    sys.exit(1)
+                desconocidas = set(mezcla) - set(MEZCLA_CARGA)
+                if desconocidas:
+                    print(f"Operaciones desconocidas: {', '.join(sorted(desconocidas))}.")
+                    sys.exit(1)
+
+            resultado = probar_carga(argumentos.clientes, argumentos.duracion, argumentos.procesos, mezcla, argumentos.salas,
+                                     argumentos.dias, argumentos.ocupacion, argumentos.etiqueta,
+                                     agrupar_escrituras=argumentos.agrupar_escrituras, **opciones_lote, **opciones_concurrencia)
+            mostrar_carga(resultado)
+
+            if argumentos.resultados:
+                with open(argumentos.resultados, "a", encoding="utf-8") as archivo:
+                    archivo.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+                if argumentos.comparar:
+                    comparar_cargas(argumentos.resultados, argumentos.comparar)
+            sys.exit(1 if resultado["turnos_sobrecupo"] or resultado["contadores_inconsistentes"] else 0)
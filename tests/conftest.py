@@ -0,0 +1,11 @@
+"""Configuración común de las pruebas.
+
+coworking.py vive en la raíz del repositorio y no es un paquete instalable, así
+que se agrega la raíz al sys.path. Los procesos hijos creados con spawn heredan
+esta ruta, de modo que también pueden importar coworking y los módulos de prueba.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,550 @@
+"""Contrato de Almacenamiento: las mismas pruebas corren sobre SQLite y en memoria.
+
+Cada prueba parte de un almacenamiento vacío con el calendario de dos semanas
+de 2100 (lunes 4 de enero a domingo 17), así que las fechas siempre cumplen la
+anticipación mínima y los domingos sirven para probar fechas no reservables.
+"""
+
+import contextlib
+import datetime as dt
+import io
+import os
+import sqlite3
+
+import pytest
+
+from coworking import (AlmacenamientoMemoria, AlmacenamientoSQLite, CupoInsuficiente, FechaNoReservable,
+                       HorarioOcupado)
+
+LUNES = dt.date(2100, 1, 4)
+DIAS = [LUNES + dt.timedelta(days=i) for i in range(14)]
+MARTES, MIERCOLES, JUEVES, DOMINGO = DIAS[1], DIAS[2], DIAS[3], DIAS[6]
+SIGUIENTE_LUNES, SIGUIENTE_MARTES = DIAS[7], DIAS[8]
+hora = dt.time
+
+
+@pytest.fixture(params=["sqlite", "memoria"])
+def almacenamiento(request, tmp_path):
+    if request.param == "sqlite":
+        with contextlib.redirect_stdout(io.StringIO()):
+            almacenamiento = AlmacenamientoSQLite(os.path.join(tmp_path, "almacenamiento.db"))
+    else:
+        almacenamiento = AlmacenamientoMemoria()
+
+    almacenamiento.agregar_fechas(DIAS)
+    yield almacenamiento
+    almacenamiento.cerrar()
+
+
+def _sembrar(almacenamiento) -> list:
+    """Registra dos clientes, dos salas y tres reservaciones; devuelve sus folios."""
+
+    almacenamiento.insertar_cliente("Ana", "Zapata")
+    almacenamiento.insertar_cliente("Luis", "Benítez")
+    almacenamiento.insertar_sala("Sala A", 10)
+    almacenamiento.insertar_sala("Sala B", 4)
+
+    return [
+        almacenamiento.insertar_reservacion(1, LUNES, 1, 1, "Junta"),
+        almacenamiento.insertar_reservacion(2, LUNES, 2, 1, "Taller"),
+        almacenamiento.insertar_reservacion(2, MARTES, 1, 2, "Curso"),
+    ]
+
+
+@pytest.fixture
+def con_datos(almacenamiento):
+    """Reservaciones 1 (lunes, Sala A, Matutino), 2 (lunes, Sala A, Vespertino) y 3 (martes, Sala B, Matutino)."""
+
+    _sembrar(almacenamiento)
+    return almacenamiento
+
+
+@pytest.fixture
+def con_cambios(con_datos):
+    """Los datos base con la reservación 1 renombrada y la 2 cancelada: eventos 1 a 5."""
+
+    con_datos.renombrar_reservacion(1, "Junta anual")
+    con_datos.cancelar_reservacion(2)
+    return con_datos
+
+
+@pytest.fixture
+def con_historial(con_cambios):
+    """Los cambios anteriores más la reservación 4 (jueves, Sala A, Nocturno) del cliente 2."""
+
+    con_cambios.insertar_reservacion(2, JUEVES, 3, 1, "Cierre")
+    return con_cambios
+
+
+@pytest.fixture
+def con_horarios(con_datos):
+    """Los datos base más las reservaciones por horario 4 (09:00-10:30) y 5 (10:30-11:00) de la Sala A."""
+
+    con_datos.insertar_reservacion_intervalo(1, SIGUIENTE_MARTES, 1, hora(9), hora(10, 30), "Reunión")
+    con_datos.insertar_reservacion_intervalo(2, SIGUIENTE_MARTES, 1, hora(10, 30), hora(11), "Llamada")
+    return con_datos
+
+
+# Clientes, salas y turnos
+
+def test_ids_de_clientes(almacenamiento):
+    assert [almacenamiento.insertar_cliente("Ana", "Zapata"), almacenamiento.insertar_cliente("Luis", "Benítez")] == [1, 2]
+
+
+def test_clientes_ordenados_por_apellidos(con_datos):
+    assert [cliente[0] for cliente in con_datos.obtener_clientes()] == [2, 1]
+
+
+@pytest.mark.parametrize("id_cliente, existe", [(2, True), (3, False)])
+def test_existe_cliente(con_datos, id_cliente, existe):
+    assert con_datos.existe_cliente(id_cliente) is existe
+
+
+def test_ids_de_salas(almacenamiento):
+    assert [almacenamiento.insertar_sala("Sala A", 10), almacenamiento.insertar_sala("Sala B", 4)] == [1, 2]
+
+
+@pytest.mark.parametrize("id_sala, existe", [(1, True), (3, False)])
+def test_existe_sala(con_datos, id_sala, existe):
+    assert con_datos.existe_sala(id_sala) is existe
+
+
+def test_nombre_de_turno(almacenamiento):
+    assert almacenamiento.nombre_turno(2) == "Vespertino"
+
+
+# Reservaciones por turno
+
+def test_folios_consecutivos(almacenamiento):
+    assert _sembrar(almacenamiento) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("argumentos", [(9, LUNES, 3, 2, "X"), (1, LUNES, 3, 9, "X"), (1, LUNES, 9, 2, "X")],
+                         ids=["cliente", "sala", "turno"])
+def test_referencia_inexistente(con_datos, argumentos):
+    with pytest.raises(sqlite3.IntegrityError):
+        con_datos.insertar_reservacion(*argumentos)
+
+
+@pytest.mark.parametrize("fecha", [lambda: DOMINGO, lambda: LUNES - dt.timedelta(days=1), dt.date.today],
+                         ids=["domingo", "fuera_del_calendario", "sin_anticipacion"])
+@pytest.mark.parametrize("reservar", [
+    lambda almacenamiento, fecha: almacenamiento.insertar_reservacion(1, fecha, 3, 2, "X"),
+    lambda almacenamiento, fecha: almacenamiento.insertar_reservacion_intervalo(1, fecha, 2, hora(9), hora(10), "X"),
+], ids=["por_turno", "por_horario"])
+def test_fecha_no_reservable(con_datos, fecha, reservar):
+    with pytest.raises(FechaNoReservable):
+        reservar(con_datos, fecha())
+
+
+@pytest.mark.parametrize("id_turno, ocupado", [(1, True), (3, False)])
+def test_existe_reservacion(con_datos, id_turno, ocupado):
+    assert con_datos.existe_reservacion(LUNES, 1, id_turno) is ocupado
+
+
+def test_salas_disponibles(con_datos):
+    assert con_datos.obtener_salas_disponibles(LUNES) == [
+        (1, "Sala A", 10, "Nocturno (10)"),
+        (2, "Sala B", 4, "Matutino (4), Vespertino (4), Nocturno (4)"),
+    ]
+
+
+def test_salas_disponibles_en_domingo(con_datos):
+    assert con_datos.obtener_salas_disponibles(DOMINGO) == []
+
+
+def test_cancelar_libera_el_turno(con_cambios):
+    assert con_cambios.existe_reservacion(LUNES, 1, 2) is False
+
+
+def test_reservaciones_del_rango(con_cambios):
+    assert list(con_cambios.iterar_reservaciones_en_rango(LUNES, DOMINGO)) == [
+        (LUNES, 1, 1, "Sala A", "Ana Zapata", "Junta anual", "Matutino"),
+        (MARTES, 3, 2, "Sala B", "Luis Benítez", "Curso", "Matutino"),
+    ]
+
+
+def test_reservaciones_de_un_dia_vacio(con_cambios):
+    assert list(con_cambios.iterar_reservaciones_en_rango(DOMINGO, DOMINGO)) == []
+
+
+def test_siguiente_turno_libre(con_cambios):
+    assert con_cambios.obtener_siguiente_turno_libre(1, LUNES) == (LUNES, "Vespertino")
+
+
+# Calendario
+
+@pytest.fixture
+def con_festivo(con_cambios):
+    """Los cambios anteriores con el martes marcado como festivo."""
+
+    con_cambios.marcar_fecha(MARTES, "festivo", True, "Feriado")
+    return con_cambios
+
+
+def test_dia_festivo(con_festivo):
+    assert con_festivo.obtener_dia(MARTES) == (1, 1, 0, "Feriado", 0)
+
+
+def test_agregar_fecha_conserva_sus_marcas(con_festivo):
+    con_festivo.agregar_fechas([MARTES])
+    assert con_festivo.obtener_dia(MARTES) == (1, 1, 0, "Feriado", 0)
+
+
+def test_dia_habil(con_festivo):
+    assert con_festivo.obtener_dia(LUNES) == (0, 0, 0, None, 1)
+
+
+def test_dia_fuera_del_calendario(con_festivo):
+    assert con_festivo.obtener_dia(LUNES - dt.timedelta(days=1)) is None
+
+
+def test_fechas_reservables(con_festivo):
+    assert con_festivo.obtener_fechas_reservables(LUNES, DOMINGO) == [LUNES, MIERCOLES, JUEVES, DIAS[4], DIAS[5]]
+
+
+def test_siguiente_fecha_reservable(con_festivo):
+    assert con_festivo.siguiente_fecha_reservable(MARTES) == MIERCOLES
+
+
+def test_siguiente_fecha_fuera_del_calendario(con_festivo):
+    assert con_festivo.siguiente_fecha_reservable(DIAS[-1] + dt.timedelta(days=1)) is None
+
+
+def test_fechas_libres(con_festivo):
+    assert con_festivo.obtener_fechas_libres(1, 1, LUNES, JUEVES) == [MIERCOLES, JUEVES]
+
+
+def test_festivo_rechaza_reservaciones(con_festivo):
+    with pytest.raises(FechaNoReservable):
+        con_festivo.insertar_reservacion(1, MARTES, 3, 2, "X")
+
+
+# Registro de cambios
+
+def test_eventos(con_cambios):
+    assert [evento[:3] for evento in con_cambios.obtener_cambios(0, 100)] == [
+        (1, 1, "creada"), (2, 2, "creada"), (3, 3, "creada"), (4, 1, "renombrada"), (5, 2, "cancelada"),
+    ]
+
+
+def test_datos_del_evento(con_cambios):
+    assert con_cambios.obtener_cambios(3, 1)[0][3] == {
+        "id_cliente": 1, "fecha": LUNES.isoformat(), "turno": "Matutino", "id_sala": 1,
+        "nombre_evento": "Junta anual", "asistentes": 10,
+    }
+
+
+def test_limite_de_eventos(con_cambios):
+    assert [evento[0] for evento in con_cambios.obtener_cambios(1, 2)] == [2, 3]
+
+
+def test_sin_eventos_al_cancelar_de_nuevo_o_un_folio_inexistente(con_cambios):
+    assert con_cambios.cancelar_reservacion(2) is False
+    assert con_cambios.cancelar_reservacion(99) is False
+    assert len(con_cambios.obtener_cambios(0, 100)) == 5
+
+
+def test_reservaciones_modificadas(con_cambios):
+    assert [(fila[0], fila[6], fila[8]) for fila in con_cambios.obtener_reservaciones_modificadas(-1)] == [
+        (3, False, 3), (1, False, 4), (2, True, 5),
+    ]
+
+
+def test_reservacion_cancelada_modificada(con_cambios):
+    assert con_cambios.obtener_reservaciones_modificadas(4)[0][:6] == (2, "Sala A", "Luis Benítez", "Taller", "Vespertino", LUNES)
+
+
+def test_momento_de_actualizacion(con_cambios):
+    assert con_cambios.obtener_reservaciones_modificadas(4)[0][7] == con_cambios.obtener_cambios(4, 1)[0][4]
+
+
+def test_modificadas_despues_de_una_version(con_cambios):
+    assert [fila[0] for fila in con_cambios.obtener_reservaciones_modificadas(4)] == [2]
+
+
+def test_cursor_nuevo(almacenamiento):
+    assert almacenamiento.obtener_cursor("prueba") is None
+
+
+def test_cursor_guardado(almacenamiento):
+    almacenamiento.guardar_cursor("prueba", 3)
+    almacenamiento.guardar_cursor("prueba", 5)
+    assert almacenamiento.obtener_cursor("prueba") == 5
+
+
+# Historial de clientes y agenda de salas
+
+def test_historial_de_cliente(con_historial):
+    assert con_historial.obtener_reservaciones_por_cliente(2, LUNES, DOMINGO, 10, None, False) == (
+        [(3, MARTES, "Matutino", 2, "Sala B", "Curso", False), (4, JUEVES, "Nocturno", 1, "Sala A", "Cierre", False)], 2, 1)
+
+
+def test_historial_con_canceladas(con_historial):
+    assert con_historial.obtener_reservaciones_por_cliente(2, LUNES, DOMINGO, 1, None, True) == (
+        [(2, LUNES, "Vespertino", 1, "Sala A", "Taller", True)], 2, 1)
+
+
+def test_segunda_pagina_del_historial(con_historial):
+    pagina = con_historial.obtener_reservaciones_por_cliente(2, LUNES, DOMINGO, 2, (LUNES, 2), True)[0]
+    assert [fila[0] for fila in pagina] == [3, 4]
+
+
+def test_historial_acotado(con_historial):
+    assert con_historial.obtener_reservaciones_por_cliente(2, MIERCOLES, DOMINGO, 10, None, False)[1:] == (1, 0)
+
+
+def test_agenda_de_sala(con_historial):
+    assert con_historial.obtener_agenda_sala(1, LUNES, DOMINGO, 10, None, True) == (
+        [(1, LUNES, "Matutino", 1, "Ana Zapata", "Junta anual", False),
+         (2, LUNES, "Vespertino", 2, "Luis Benítez", "Taller", True),
+         (4, JUEVES, "Nocturno", 2, "Luis Benítez", "Cierre", False)], 2, 1)
+
+
+def test_agenda_de_sala_sin_reservaciones(con_historial):
+    assert con_historial.obtener_agenda_sala(3, LUNES, DOMINGO, 10, None, False) == ([], 0, 0)
+
+
+# Asistencia y clientes frecuentes
+
+@pytest.fixture
+def con_asistencia(con_historial):
+    """El historial con el cliente 2 ausente en el folio 3 y presente en el 4; el folio 1 se corrige a presente."""
+
+    con_historial.registrar_asistencia(3, False)
+    con_historial.registrar_asistencia(4, True)
+    con_historial.registrar_asistencia(1, False)
+    con_historial.registrar_asistencia(1, True)
+    return con_historial
+
+
+@pytest.mark.parametrize("folio", [2, 99], ids=["cancelada", "inexistente"])
+def test_asistencia_rechazada(con_historial, folio):
+    with pytest.raises(ValueError):
+        con_historial.registrar_asistencia(folio, False)
+
+
+def test_clientes_frecuentes(con_asistencia):
+    assert con_asistencia.obtener_clientes_frecuentes(LUNES, DOMINGO, 10) == [
+        (2, "Luis Benítez", 3, 2, 1, 1), (1, "Ana Zapata", 1, 1, 0, 0),
+    ]
+
+
+def test_clientes_frecuentes_con_limite(con_asistencia):
+    assert len(con_asistencia.obtener_clientes_frecuentes(LUNES, DOMINGO, 1)) == 1
+
+
+# Cupo por asistentes
+
+@pytest.fixture
+def con_parcial(con_datos):
+    """Los datos base más la reservación 4: 3 de los 4 lugares de la Sala B el siguiente lunes por la mañana."""
+
+    con_datos.insertar_reservacion(1, SIGUIENTE_LUNES, 1, 2, "Mesa", 3)
+    return con_datos
+
+
+def test_lugares_libres_tras_reservacion_parcial(con_parcial):
+    assert con_parcial.obtener_lugares_libres(SIGUIENTE_LUNES, 2, 1) == 1
+
+
+def test_turno_parcial_ocupado(con_parcial):
+    assert con_parcial.existe_reservacion(SIGUIENTE_LUNES, 2, 1) is True
+
+
+def test_salas_con_lugares_libres(con_parcial):
+    assert con_parcial.obtener_salas_disponibles(SIGUIENTE_LUNES) == [
+        (1, "Sala A", 10, "Matutino (10), Vespertino (10), Nocturno (10)"),
+        (2, "Sala B", 4, "Matutino (1), Vespertino (4), Nocturno (4)"),
+    ]
+
+
+@pytest.mark.parametrize("asistentes", [2, None], ids=["excede_el_cupo", "sala_completa_con_lugares_ocupados"])
+def test_cupo_insuficiente(con_parcial, asistentes):
+    with pytest.raises(CupoInsuficiente):
+        con_parcial.insertar_reservacion(2, SIGUIENTE_LUNES, 1, 2, "Excedida", asistentes)
+
+
+def test_lugares_intactos_tras_rechazo(con_parcial):
+    with pytest.raises(CupoInsuficiente):
+        con_parcial.insertar_reservacion(2, SIGUIENTE_LUNES, 1, 2, "Excedida", 2)
+    assert con_parcial.obtener_lugares_libres(SIGUIENTE_LUNES, 2, 1) == 1
+
+
+def test_reservacion_sin_asistentes(con_parcial):
+    with pytest.raises(ValueError):
+        con_parcial.insertar_reservacion(2, SIGUIENTE_LUNES, 2, 2, "Vacía", 0)
+
+
+@pytest.fixture
+def con_turno_lleno(con_parcial):
+    """La reservación parcial más la 5, que toma el último lugar del turno."""
+
+    con_parcial.insertar_reservacion(2, SIGUIENTE_LUNES, 1, 2, "Último lugar", 1)
+    return con_parcial
+
+
+def test_turno_lleno(con_turno_lleno):
+    assert con_turno_lleno.obtener_lugares_libres(SIGUIENTE_LUNES, 2, 1) == 0
+
+
+def test_fechas_libres_con_turno_lleno(con_turno_lleno):
+    assert con_turno_lleno.obtener_fechas_libres(2, 1, SIGUIENTE_LUNES, SIGUIENTE_LUNES) == []
+
+
+def test_siguiente_turno_con_lugares(con_turno_lleno):
+    assert con_turno_lleno.obtener_siguiente_turno_libre(2, SIGUIENTE_LUNES) == (SIGUIENTE_LUNES, "Vespertino")
+
+
+def test_cancelar_dos_veces_libera_los_lugares_una_vez(con_turno_lleno):
+    assert con_turno_lleno.cancelar_reservacion(4) is True
+    assert con_turno_lleno.cancelar_reservacion(4) is False
+    assert con_turno_lleno.obtener_lugares_libres(SIGUIENTE_LUNES, 2, 1) == 3
+
+
+def test_lugares_de_sala_inexistente(con_datos):
+    assert con_datos.obtener_lugares_libres(SIGUIENTE_LUNES, 9, 1) == 0
+
+
+# Reservaciones por horario
+
+def test_folios_por_horario_siguen_la_serie(con_datos):
+    assert [
+        con_datos.insertar_reservacion_intervalo(1, SIGUIENTE_MARTES, 1, hora(9), hora(10, 30), "Reunión"),
+        con_datos.insertar_reservacion_intervalo(2, SIGUIENTE_MARTES, 1, hora(10, 30), hora(11), "Llamada"),
+    ] == [4, 5]
+
+
+@pytest.mark.parametrize("inicio, fin", [(hora(10), hora(10, 30)), (hora(8, 30), hora(9, 30)), (hora(8), hora(12))])
+def test_horario_traslapado(con_horarios, inicio, fin):
+    with pytest.raises(HorarioOcupado):
+        con_horarios.insertar_reservacion_intervalo(2, SIGUIENTE_MARTES, 1, inicio, fin, "Traslape")
+
+
+@pytest.mark.parametrize("inicio, fin", [(hora(9, 15), hora(10)), (hora(11), hora(10)), (hora(21), hora(22, 30))],
+                         ids=["fuera_de_bloque", "fin_antes_de_inicio", "despues_del_cierre"])
+def test_horario_invalido(con_horarios, inicio, fin):
+    with pytest.raises(ValueError) as error:
+        con_horarios.insertar_reservacion_intervalo(2, SIGUIENTE_MARTES, 1, inicio, fin, "Inválido")
+    assert not isinstance(error.value, HorarioOcupado)
+
+
+def test_horario_con_cliente_inexistente(con_horarios):
+    with pytest.raises(sqlite3.IntegrityError):
+        con_horarios.insertar_reservacion_intervalo(9, SIGUIENTE_MARTES, 1, hora(20), hora(21), "X")
+
+
+@pytest.mark.parametrize("inicio, fin, traslape", [(hora(11), hora(12), False), (hora(10), hora(11), True)])
+def test_existe_traslape(con_horarios, inicio, fin, traslape):
+    assert con_horarios.existe_traslape(SIGUIENTE_MARTES, 1, inicio, fin) is traslape
+
+
+def test_reservaciones_por_horario(con_horarios):
+    assert con_horarios.obtener_reservaciones_intervalo(SIGUIENTE_MARTES, 1) == [
+        (4, hora(9), hora(10, 30), 1, "Ana Zapata", "Reunión"),
+        (5, hora(10, 30), hora(11), 2, "Luis Benítez", "Llamada"),
+    ]
+
+
+def test_reservaciones_por_horario_en_el_rango(con_horarios):
+    assert list(con_horarios.iterar_reservaciones_en_rango(SIGUIENTE_MARTES, SIGUIENTE_MARTES)) == [
+        (SIGUIENTE_MARTES, 4, 1, "Sala A", "Ana Zapata", "Reunión", "09:00-10:30"),
+        (SIGUIENTE_MARTES, 5, 1, "Sala A", "Luis Benítez", "Llamada", "10:30-11:00"),
+    ]
+
+
+def test_evento_de_reservacion_por_horario(con_horarios):
+    assert con_horarios.obtener_cambios(4, 1)[0][1:4] == (5, "creada", {
+        "id_cliente": 2, "fecha": SIGUIENTE_MARTES.isoformat(), "turno": "10:30-11:00", "id_sala": 1,
+        "nombre_evento": "Llamada", "asistentes": 10, "inicio": "10:30", "fin": "11:00",
+    })
+
+
+def test_historial_con_reservacion_por_horario(con_horarios):
+    assert con_horarios.obtener_reservaciones_por_cliente(1, SIGUIENTE_MARTES, SIGUIENTE_MARTES, 10, None, False) == (
+        [(4, SIGUIENTE_MARTES, "09:00-10:30", 1, "Sala A", "Reunión", False)], 1, 0)
+
+
+def test_turno_cubierto_por_horario_sin_lugares(con_horarios):
+    assert con_horarios.obtener_lugares_libres(SIGUIENTE_MARTES, 1, 1) == 0
+
+
+def test_turno_cubierto_por_horario_ocupado(con_horarios):
+    assert con_horarios.existe_reservacion(SIGUIENTE_MARTES, 1, 1) is True
+
+
+def test_salas_sin_el_turno_cubierto(con_horarios):
+    assert con_horarios.obtener_salas_disponibles(SIGUIENTE_MARTES)[0] == (1, "Sala A", 10, "Vespertino (10), Nocturno (10)")
+
+
+def test_turno_cubierto_rechaza_reservaciones(con_horarios):
+    with pytest.raises(HorarioOcupado):
+        con_horarios.insertar_reservacion(1, SIGUIENTE_MARTES, 1, 1, "Turno cubierto", 2)
+
+
+def test_huecos_con_turno_ocupado(con_datos):
+    con_datos.insertar_reservacion(1, SIGUIENTE_LUNES, 1, 2, "Mesa", 1)
+    assert con_datos.obtener_huecos(SIGUIENTE_LUNES, 2) == [(hora(12), hora(22))]
+
+
+@pytest.fixture
+def con_horarios_y_turno(con_horarios):
+    """Las reservaciones por horario más la 6: 3 asistentes en el turno vespertino de la Sala A."""
+
+    con_horarios.insertar_reservacion(1, SIGUIENTE_MARTES, 2, 1, "Taller", 3)
+    return con_horarios
+
+
+def test_horario_dentro_de_un_turno_con_asistentes(con_horarios_y_turno):
+    assert con_horarios_y_turno.existe_traslape(SIGUIENTE_MARTES, 1, hora(13), hora(14)) is True
+
+
+def test_huecos(con_horarios_y_turno):
+    assert con_horarios_y_turno.obtener_huecos(SIGUIENTE_MARTES, 1) == [
+        (hora(8), hora(9)), (hora(11), hora(12)), (hora(17), hora(22)),
+    ]
+
+
+def test_huecos_de_dos_horas(con_horarios_y_turno):
+    assert con_horarios_y_turno.obtener_huecos(SIGUIENTE_MARTES, 1, 120) == [(hora(17), hora(22))]
+
+
+def test_huecos_tras_cancelar(con_horarios_y_turno):
+    assert con_horarios_y_turno.cancelar_reservacion_intervalo(4) is True
+    assert con_horarios_y_turno.cancelar_reservacion_intervalo(4) is False
+    assert con_horarios_y_turno.obtener_huecos(SIGUIENTE_MARTES, 1) == [
+        (hora(8), hora(10, 30)), (hora(11), hora(12)), (hora(17), hora(22)),
+    ]
+
+
+def test_turno_cubierto_por_el_horario_restante(con_horarios):
+    con_horarios.cancelar_reservacion_intervalo(4)
+    assert con_horarios.obtener_lugares_libres(SIGUIENTE_MARTES, 1, 1) == 0
+
+
+def test_cancelacion_por_horario_ignora_folios_por_turno(con_horarios_y_turno):
+    assert con_horarios_y_turno.cancelar_reservacion_intervalo(6) is False
+    assert con_horarios_y_turno.existe_traslape(SIGUIENTE_MARTES, 1, hora(13), hora(14)) is True
+
+
+def test_cancelar_reservacion_libera_el_horario(con_horarios):
+    con_horarios.cancelar_reservacion(4)
+    con_horarios.cancelar_reservacion(5)
+    assert con_horarios.obtener_lugares_libres(SIGUIENTE_MARTES, 1, 1) == 10
+
+
+def test_eventos_de_cancelacion_por_horario(con_horarios):
+    con_horarios.cancelar_reservacion_intervalo(4)
+    con_horarios.cancelar_reservacion(5)
+    assert [evento[1:3] for evento in con_horarios.obtener_cambios(5, 100)] == [(4, "cancelada"), (5, "cancelada")]
+
+
+def test_modificadas_por_horario(con_horarios):
+    con_horarios.cancelar_reservacion(5)
+    assert con_horarios.obtener_reservaciones_modificadas(5)[0][:7] == (
+        5, "Sala A", "Luis Benítez", "Llamada", "10:30-11:00", SIGUIENTE_MARTES, True)
+
+
+@pytest.mark.parametrize("fecha, id_sala", [(DOMINGO, 1), (SIGUIENTE_MARTES, 9)], ids=["domingo", "sala_inexistente"])
+def test_sin_huecos(con_horarios, fecha, id_sala):
+    assert con_horarios.obtener_huecos(fecha, id_sala) == []
@@ -0,0 +1,111 @@
+"""Pico de memoria de los listados y exportaciones con un conjunto de datos fijo.
+
+El conjunto de datos es siempre el mismo (200 salas y 30 días con la mitad de
+los turnos reservados), así que un pico mayor que su presupuesto indica que el
+código empezó a retener más filas o copias que antes. La caché por fecha se
+desactiva para medir las consultas en sí.
+"""
+
+import contextlib
+import datetime as dt
+import functools
+import io
+import os
+import sqlite3
+
+import pytest
+
+from coworking import EXPORTADORES, AlmacenamientoSQLite, Coworking, PerfilMemoria, _exportar_archivo
+
+# Pico de memoria máximo, en KiB, de cada operación medida.
+PRESUPUESTO_MEMORIA = {
+    "Listar reservaciones del día": 160,
+    "Listar reservaciones del rango": 160,
+    "Listar salas disponibles": 128,
+    "Exportar día a JSON": 320,
+    "Exportar día a CSV": 400,
+    "Exportar día a EXCEL": 1800,
+    "Exportar cambios a JSON": 9000,
+    "Exportar cambios a CSV": 10000,
+    "Exportar cambios a EXCEL": 52000,
+}
+
+
+@pytest.fixture(scope="module")
+def picos(tmp_path_factory) -> dict:
+    """Mide una sola vez el pico de cada operación.
+
+    Returns:
+        dict: Pico en KiB por nombre de operación.
+    """
+
+    salas, dias = 200, 30
+    fechas = [dt.date(2100, 1, 4) + dt.timedelta(days=i) for i in range(dias)]
+    reservaciones = [
+        (id_sala % 50 + 1, fecha.toordinal(), id_turno, id_sala, f"Evento {fecha.day}-{id_sala}-{id_turno}")
+        for fecha in fechas for id_sala in range(1, salas + 1) for id_turno in (1, 2, 3)
+        if (fecha.day + id_sala + id_turno) % 2 == 0
+    ]
+
+    directorio = str(tmp_path_factory.mktemp("memoria"))
+    ruta_bd = os.path.join(directorio, "memoria.db")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        almacenamiento = AlmacenamientoSQLite(ruta_bd)
+        almacenamiento.agregar_fechas(fechas)
+        almacenamiento.cerrar()
+
+    with sqlite3.connect(ruta_bd) as conn:
+        conn.executemany("INSERT INTO clientes (nombre, apellidos) VALUES (?, ?);",
+                         [(f"Cliente {i + 1}", "Memoria") for i in range(50)])
+        conn.executemany("INSERT INTO salas (nombre, cupo) VALUES (?, ?);",
+                         [(f"Sala {i + 1}", 10) for i in range(salas)])
+        conn.executemany("""
+            INSERT INTO reservaciones (id_cliente, fecha, id_turno, id_sala, nombre_evento, asistentes, creado)
+            VALUES (?, ?, ?, ?, ?, 10, '2100-01-01T00:00:00.000Z');
+        """, reservaciones)
+        conn.execute("""
+            INSERT INTO ocupacion_turnos (fecha, id_sala, id_turno, ocupados)
+            SELECT fecha, id_sala, id_turno, SUM(asistentes) FROM reservaciones GROUP BY fecha, id_sala, id_turno;
+        """)
+    conn.close()
+
+    with contextlib.chdir(directorio):
+        with contextlib.redirect_stdout(io.StringIO()):
+            programa = Coworking(ruta_bd, tamano_cache=0)
+
+        fecha = fechas[0]
+
+        def exportar_dia(formato: str) -> None:
+            _exportar_archivo(formato, programa.reservaciones.obtener_reservaciones_por_fecha(fecha), fecha, directorio)
+
+        operaciones = [
+            ("Listar reservaciones del día", lambda: programa.reservaciones.mostrar_reservaciones_por_fecha(fecha)),
+            ("Listar reservaciones del rango", lambda: programa.reservaciones.mostrar_reservaciones_en_rango(fechas[0], fechas[-1])),
+            ("Listar salas disponibles", lambda: programa.salas.mostrar_salas_disponibles(fecha)),
+        ]
+        operaciones += [(f"Exportar día a {formato}", functools.partial(exportar_dia, formato)) for formato in EXPORTADORES]
+        operaciones += [(f"Exportar cambios a {formato}", functools.partial(programa.exportar_cambios, formato))
+                        for formato in EXPORTADORES]
+
+        perfil = PerfilMemoria()
+        perfil.iniciar()
+        try:
+            with open(os.devnull, "w", encoding="utf-8") as nulo:
+                for nombre, operacion in operaciones:
+                    with contextlib.redirect_stdout(nulo), perfil.medir(nombre):
+                        operacion()
+        finally:
+            perfil.detener()
+            programa.cerrar()
+
+    return {registro["nombre"]: registro["pico"] / 1024 for registro in perfil.registros()}
+
+
+def test_todas_las_operaciones_tienen_presupuesto(picos):
+    assert set(picos) == set(PRESUPUESTO_MEMORIA)
+
+
+@pytest.mark.parametrize("nombre, presupuesto", PRESUPUESTO_MEMORIA.items(), ids=list(PRESUPUESTO_MEMORIA))
+def test_pico_dentro_del_presupuesto(picos, nombre, presupuesto):
+    assert picos[nombre] <= presupuesto, f"{nombre}: {picos[nombre]:.1f} KiB, presupuesto {presupuesto} KiB"
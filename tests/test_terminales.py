@@ -0,0 +1,81 @@
+"""Varias terminales, cada una en su propio proceso, escribiendo sobre la misma base de datos."""
+
+import contextlib
+import datetime as dt
+import io
+import multiprocessing
+import os
+import sqlite3
+
+import pytest
+
+from coworking import HORIZONTE_CALENDARIO, Coworking
+
+TERMINALES = 4
+RESERVACIONES_POR_TERMINAL = 30
+
+
+def _terminal(ruta_bd: str, id_sala: int, reservaciones: int, opciones: dict, barrera, resultados) -> None:
+    """Proceso que simula una terminal registrando reservaciones en su propia sala.
+
+    Args:
+        ruta_bd (str): Ruta de la base de datos compartida.
+        id_sala (int): Sala en la que registra esta terminal.
+        reservaciones (int): Número de reservaciones a registrar.
+        opciones (dict): Opciones de Coworking (agrupación de escrituras, etc.).
+        barrera (multiprocessing.Barrier): Sincroniza el arranque de todas las terminales.
+        resultados (multiprocessing.Queue): Cola donde se reportan los contadores.
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()) as salida:
+        programa = Coworking(ruta_bd, **opciones)
+        fecha_minima = programa.calendario.fecha_minima()
+        fechas = programa.calendario.obtener_fechas_reservables(fecha_minima, fecha_minima + dt.timedelta(days=HORIZONTE_CALENDARIO))
+        barrera.wait()
+
+        for i in range(reservaciones):
+            fecha = fechas[i // 3]
+            turno = ("Matutino", "Vespertino", "Nocturno")[i % 3]
+            programa.reservaciones.registrar_reservacion(1, fecha, turno, id_sala, f"Terminal {id_sala} #{i}")
+
+        programa.cerrar()
+
+    estadisticas = programa.almacenamiento.concurrencia.estadisticas()
+    estadisticas["registradas"] = salida.getvalue().count("Evento registrado de manera exitosa.")
+    resultados.put(estadisticas)
+
+
+@pytest.mark.parametrize("opciones", [{}, {"agrupar_escrituras": True}], ids=["transaccion_por_escritura", "agrupadas"])
+def test_terminales_sin_escrituras_perdidas(tmp_path, opciones):
+    ruta_bd = os.path.join(tmp_path, "terminales.db")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        programa = Coworking(ruta_bd, **opciones)
+        programa.clientes.registrar_cliente("Cliente", "Prueba")
+        for i in range(TERMINALES):
+            programa.salas.registrar_sala(f"Sala {i + 1}", 10)
+        programa.cerrar()
+
+    # Como en exportar_lote, spawn evita que los hijos hereden hilos y conexiones del proceso de pytest.
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(TERMINALES)
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_terminal, args=(ruta_bd, i + 1, RESERVACIONES_POR_TERMINAL, opciones, barrera, resultados))
+        for i in range(TERMINALES)
+    ]
+
+    for proceso in procesos:
+        proceso.start()
+    estadisticas = [resultados.get(timeout=120) for _ in procesos]
+    for proceso in procesos:
+        proceso.join()
+
+    with contextlib.closing(sqlite3.connect(ruta_bd)) as conn:
+        guardadas = conn.execute("SELECT COUNT(*) FROM reservaciones;").fetchone()[0]
+
+    esperadas = TERMINALES * RESERVACIONES_POR_TERMINAL
+    assert all(proceso.exitcode == 0 for proceso in procesos)
+    assert guardadas == esperadas
+    assert sum(e["registradas"] for e in estadisticas) == esperadas
+    assert sum(e["abandonos"] for e in estadisticas) == 0